@@ -0,0 +1,82 @@
+"""
+Compares a node making one call per evaluation with a `BatchedAsyncNode`
+coalescing calls from concurrent evaluations.
+
+Run with `python -m benchmarks.bench_coalescing`. Both nodes call a simulated
+model server which handles up to 4 requests at a time, each taking 5ms plus
+0.02ms per item. `evaluate_many` keeps up to `concurrency` evaluations in
+flight.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Sequence, Tuple
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.batched_node import BatchedAsyncNode
+
+INPUTS = 2_000
+CONCURRENCY = (16, 64, 256)
+ROUND_TRIP, PER_ITEM = 0.005, 0.00002
+CONNECTIONS = 4
+
+round_trips = 0
+connections: dict[str, asyncio.Semaphore] = {}
+
+
+async def call_server(items: Sequence[int]) -> list[int]:
+    global round_trips
+    round_trips += 1
+    async with connections["server"]:
+        await asyncio.sleep(ROUND_TRIP + PER_ITEM * len(items))
+    return [2 * item for item in items]
+
+
+class Infer(AsyncNode, frozen=True):
+    async def evaluate(self, value: int) -> int:
+        (output,) = await call_server([value])
+        return output
+
+
+class BatchedInfer(BatchedAsyncNode, frozen=True):
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        return await call_server([value for (value,) in calls])
+
+
+async def throughput(dag: AsyncFunctionDAG, concurrency: int) -> Tuple[float, int]:
+    global round_trips
+    round_trips = 0
+    start = time.perf_counter()
+    async for _ in dag.evaluate_many(range(INPUTS), concurrency):
+        pass
+    return INPUTS / (time.perf_counter() - start), round_trips
+
+
+async def run():
+    connections["server"] = asyncio.Semaphore(CONNECTIONS)
+    dag = AsyncFunctionDAG.throwable_from_string("infer", {"infer": Infer})
+    batched_dag = AsyncFunctionDAG.throwable_from_string(
+        "infer", {"infer": BatchedInfer}
+    )
+    print(
+        f"{'concurrency':>11} {'per call (/s)':>14} {'trips':>6} "
+        f"{'batched (/s)':>13} {'trips':>6} {'speedup':>8}"
+    )
+    for concurrency in CONCURRENCY:
+        single, single_trips = await throughput(dag, concurrency)
+        batched, batched_trips = await throughput(batched_dag, concurrency)
+        print(
+            f"{concurrency:>11} {single:>14.0f} {single_trips:>6} "
+            f"{batched:>13.0f} {batched_trips:>6} {batched / single:>7.2f}x"
+        )
+
+
+def main():
+    logging.getLogger("daggery.async_dag").setLevel(logging.WARNING)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares building DAGs with and without trusted construction.
+
+Run with `python -m benchmarks.bench_construction`. Two layers are measured:
+
+* Building the `PrevalidatedNode`s of a `PrevalidatedDAG`, which the validator
+  now does without re-running the node's own (Python-level) validators.
+* Building a `FunctionDAG` from a `PrevalidatedDAG`, where trusted mode skips
+  pydantic validation of the nodes and the DAG itself.
+"""
+
+import time
+from typing import Callable
+
+from daggery.dag import FunctionDAG
+from daggery.node import Node
+from daggery.prevalidate import PrevalidatedDAG, PrevalidatedNode
+from daggery.utils.construction import unvalidated_construct
+
+SIZES = (100, 1_000, 10_000)
+
+
+class Increment(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value + 1
+
+
+op_node_map: dict[str, type[Node]] = {"inc": Increment}
+
+
+def best_time(function: Callable[[], object], repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, size: int, validated: float, trusted: float) -> None:
+    speedup = validated / trusted
+    print(f"{label:<18} {size:>8} {validated:>14.4f} {trusted:>12.4f} {speedup:>7.2f}x")
+
+
+def main():
+    print(
+        f"{'layer':<18} {'nodes':>8} {'validated (s)':>14} {'trusted (s)':>12} "
+        f"{'speedup':>8}"
+    )
+    for size in SIZES:
+        prevalidated_dag = PrevalidatedDAG.from_string(" >> ".join(["inc"] * size))
+        assert isinstance(prevalidated_dag, PrevalidatedDAG)
+        fields = [node.model_dump() for node in prevalidated_dag.nodes]
+
+        validated = best_time(lambda: [PrevalidatedNode(**f) for f in fields])
+        trusted = best_time(
+            lambda: [unvalidated_construct(PrevalidatedNode, **f) for f in fields]
+        )
+        report("PrevalidatedNode", size, validated, trusted)
+
+        validated = best_time(
+            lambda: FunctionDAG.from_prevalidated_dag(prevalidated_dag, op_node_map)
+        )
+        trusted = best_time(
+            lambda: FunctionDAG.from_prevalidated_dag(
+                prevalidated_dag, op_node_map, trusted=True
+            )
+        )
+        report("FunctionDAG", size, validated, trusted)
+
+
+if __name__ == "__main__":
+    main()
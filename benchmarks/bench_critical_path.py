@@ -0,0 +1,118 @@
+"""
+Compares the end-to-end latency of wide async DAGs under a concurrency limit,
+depending on which ready nodes `CriticalPathScheduler` starts first.
+
+Run with `python -m benchmarks.bench_critical_path`. Each DAG fans out from
+one node to random (but seeded) chains of 1 to 8 nodes, given shortest first,
+which are joined by another. Each node sleeps for a random 1-20ms. The
+policies compared are:
+
+* fifo: ready nodes start in order, ignoring costs.
+* hops: the longest path is measured in nodes (no costs are known).
+* learned: costs are learned from a warm-up evaluation.
+* exact: the true cost of every node is supplied.
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.plan import ExecutionPlan
+from daggery.scheduling import CriticalPathScheduler
+
+SHAPES = ((16, 4), (32, 4), (32, 8))
+SEED = 0
+REPEATS = 5
+
+# The latency of each node, by name.
+latencies: dict[str, float] = {}
+
+
+class Sleep(AsyncNode, frozen=True):
+    async def evaluate(self, *values: int) -> int:
+        await asyncio.sleep(latencies[self.name])
+        return sum(values)
+
+
+op_node_map: dict[str, type[AsyncNode]] = {"sleep": Sleep}
+
+
+class FIFOScheduler(CriticalPathScheduler):
+    def priorities(self, plan: ExecutionPlan) -> list[float]:
+        return [0.0] * len(plan.steps)
+
+
+def chains_description(chains: int, rng: random.Random) -> DAGDescription:
+    lengths = sorted(rng.randint(1, 8) for _ in range(chains))
+    ops = [
+        Operation(
+            name="head",
+            op_name="sleep",
+            children=tuple(f"c{i}_0" for i in range(chains)),
+        )
+    ]
+    tails = []
+    for i, length in enumerate(lengths):
+        for j in range(length):
+            child = f"c{i}_{j + 1}" if j + 1 < length else "tail"
+            ops.append(Operation(name=f"c{i}_{j}", op_name="sleep", children=(child,)))
+        tails.append(f"c{i}_{length - 1}")
+    ops.append(Operation(name="tail", op_name="sleep"))
+    for op in ops:
+        latencies[op.name] = rng.uniform(0.001, 0.02)
+    return DAGDescription(
+        operations=OperationSequence(ops=tuple(ops)),
+        argument_mappings=(ArgumentMapping(op_name="tail", inputs=tuple(tails)),),
+    )
+
+
+async def best_latency(dag: AsyncFunctionDAG) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await dag.evaluate(0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run():
+    rng = random.Random(SEED)
+    print(
+        f"{'chains':>7} {'limit':>6} {'fifo (ms)':>10} {'hops (ms)':>10} "
+        f"{'learned (ms)':>13} {'exact (ms)':>11}"
+    )
+    for chains, limit in SHAPES:
+        description = chains_description(chains, rng)
+        dag = AsyncFunctionDAG.throwable_from_dag_description(description, op_node_map)
+        learned = CriticalPathScheduler(limit)
+        await dag.with_scheduler(learned).evaluate(0)
+        exact = dict(latencies)
+        schedulers = (
+            FIFOScheduler(limit, learn=False),
+            CriticalPathScheduler(limit, learn=False),
+            learned,
+            CriticalPathScheduler(limit, costs=exact, learn=False),
+        )
+        times = [await best_latency(dag.with_scheduler(s)) for s in schedulers]
+        print(
+            f"{chains:>7} {limit:>6} {times[0] * 1000:>10.1f} {times[1] * 1000:>10.1f} "
+            f"{times[2] * 1000:>13.1f} {times[3] * 1000:>11.1f}"
+        )
+
+
+def main():
+    logging.getLogger("daggery.async_dag").setLevel(logging.WARNING)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares editing a built DAG with rebuilding it from a `DAGDescription`.
+
+Run with `python -m benchmarks.bench_edit`. Each DAG is a ladder of nodes (see
+`bench_startup`), and each edit touches a single node in the middle of it.
+"""
+
+from daggery.dag import FunctionDAG
+from daggery.node import Node
+
+from .bench_construction import best_time
+from .bench_startup import ladder_description, op_node_map
+
+SIZES = (1_000, 10_000)
+
+
+class Double(Node, frozen=True):
+    def evaluate(self, *values: int) -> int:
+        return 2 * sum(values)
+
+
+def main():
+    print(
+        f"{'nodes':>8} {'edit':>8} {'rebuild (s)':>12} {'edit (s)':>10} {'speedup':>9}"
+    )
+    for size in SIZES:
+        description = ladder_description(size)
+        dag = FunctionDAG.throwable_from_dag_description(description, op_node_map)
+        middle = size // 2
+        inserted = dag.insert_node(
+            "extra", Double, inputs=(f"n{middle}",), children=(f"n{middle + 3}",)
+        )
+        assert isinstance(inserted, FunctionDAG), inserted
+        edits = {
+            "replace": lambda: dag.replace_node(f"n{middle}", Double),
+            "insert": lambda: dag.insert_node(
+                "extra", Double, inputs=(f"n{middle}",), children=(f"n{middle + 3}",)
+            ),
+            "remove": lambda: inserted.remove_node("extra"),
+            "rewire": lambda: dag.rewire(f"n{middle}", (f"n{middle - 1}",)),
+        }
+        rebuilt = best_time(
+            lambda: FunctionDAG.throwable_from_dag_description(description, op_node_map)
+        )
+        for label, edit in edits.items():
+            # Also builds the node index, which later edits reuse.
+            assert isinstance(edit(), FunctionDAG)
+            edited = best_time(edit)
+            print(
+                f"{size:>8} {label:>8} {rebuilt:>12.4f} {edited:>10.6f} "
+                f"{rebuilt / edited:>8.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
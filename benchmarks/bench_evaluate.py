@@ -0,0 +1,93 @@
+"""
+Measures the per-evaluation overhead of `FunctionDAG.evaluate` on small DAGs.
+
+Run with `python -m benchmarks.bench_evaluate`. Logging is disabled so that
+the interpreter loop itself is measured. The baseline resolves node inputs by
+name through a dict, as `evaluate` did before compiled execution plans, and
+the last column is the straight-line function generated by `compile`.
+"""
+
+import logging
+import time
+from typing import Any, Callable
+
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+
+EVALUATIONS = 100_000
+
+
+class Increment(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value + 1
+
+
+class Add(Node, frozen=True):
+    def evaluate(self, *values: int) -> int:
+        return sum(values)
+
+
+op_node_map: dict[str, type[Node]] = {"inc": Increment, "add": Add}
+
+
+def chain_dag() -> FunctionDAG:
+    return FunctionDAG.throwable_from_string(" >> ".join(["inc"] * 8), op_node_map)
+
+
+def diamond_dag() -> FunctionDAG:
+    ops = OperationSequence(
+        ops=(
+            Operation(name="head", op_name="inc", children=("left", "right")),
+            Operation(name="left", op_name="inc", children=("tail",)),
+            Operation(name="right", op_name="inc", children=("tail",)),
+            Operation(name="tail", op_name="add"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="tail", inputs=("left", "right")),)
+    return FunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+def evaluate_by_name(dag: FunctionDAG, value: Any) -> Any:
+    context = {"__INPUT__": value}
+    for node in dag.nodes:
+        input_values = tuple(context[node_name] for node_name in node.input_nodes)
+        node_output_value = node.evaluate(*input_values)
+        context[node.naked_node.name] = node_output_value
+    return node_output_value
+
+
+def evaluations_per_second(evaluate: Callable[[Any], Any]) -> float:
+    start = time.perf_counter()
+    for i in range(EVALUATIONS):
+        evaluate(i)
+    return EVALUATIONS / (time.perf_counter() - start)
+
+
+def main():
+    logging.getLogger("daggery").setLevel(logging.WARNING)
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    print(
+        f"{'dag':<8} {'by name (eval/s)':>17} {'plan (eval/s)':>14} {'speedup':>8} "
+        f"{'compiled (eval/s)':>18} {'speedup':>8}"
+    )
+    for label, dag in (("chain", chain_dag()), ("diamond", diamond_dag())):
+        baseline = evaluations_per_second(lambda v: evaluate_by_name(dag, v))
+        planned = evaluations_per_second(dag.evaluate)
+        compiled = evaluations_per_second(dag.compile())
+        print(
+            f"{label:<8} {baseline:>17.0f} {planned:>14.0f} "
+            f"{planned / baseline:>7.2f}x {compiled:>18.0f} "
+            f"{compiled / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
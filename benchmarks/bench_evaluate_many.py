@@ -0,0 +1,111 @@
+"""
+Compares evaluating many inputs with `evaluate_many` against calling
+`evaluate` per input.
+
+Run with `python -m benchmarks.bench_evaluate_many`. Logging is disabled. For
+`AsyncFunctionDAG`, the baseline gathers one `evaluate` coroutine per input,
+with every input in flight at once. Each async node yields to the event loop
+once, as nodes awaiting I/O would. The async DAGs are diamonds: one node fans
+out to two, which are joined by a fourth.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.scheduling import ReadyScheduler
+
+from .bench_evaluate import chain_dag, diamond_dag
+
+INPUTS = 10_000
+CONCURRENCY = (64, 1024)
+
+
+class Increment(AsyncNode, frozen=True):
+    async def evaluate(self, value: int) -> int:
+        await asyncio.sleep(0)
+        return value + 1
+
+
+class Add(AsyncNode, frozen=True):
+    async def evaluate(self, *values: int) -> int:
+        await asyncio.sleep(0)
+        return sum(values)
+
+
+op_node_map: dict[str, type[AsyncNode]] = {"inc": Increment, "add": Add}
+
+
+def async_diamond_dag() -> AsyncFunctionDAG:
+    ops = OperationSequence(
+        ops=(
+            Operation(name="head", op_name="inc", children=("left", "right")),
+            Operation(name="left", op_name="inc", children=("tail",)),
+            Operation(name="right", op_name="inc", children=("tail",)),
+            Operation(name="tail", op_name="add"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="tail", inputs=("left", "right")),)
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+def inputs_per_second(run: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    run()
+    return INPUTS / (time.perf_counter() - start)
+
+
+async def gather_evaluate(dag: AsyncFunctionDAG) -> list:
+    return await asyncio.gather(*(dag.evaluate(i) for i in range(INPUTS)))
+
+
+async def collect(dag: AsyncFunctionDAG, max_concurrency: int, ordered: bool) -> list:
+    return [
+        output
+        async for output in dag.evaluate_many(range(INPUTS), max_concurrency, ordered)
+    ]
+
+
+def report(label: str, baseline: float, measured: float) -> None:
+    print(f"{label:<32} {measured:>12.0f} {measured / baseline:>7.2f}x")
+
+
+def main():
+    logging.getLogger("daggery").setLevel(logging.WARNING)
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    logging.getLogger("daggery.async_dag").setLevel(logging.WARNING)
+    print(f"{'':<32} {'inputs/s':>12} {'speedup':>8}")
+    for name, dag in (("chain", chain_dag()), ("diamond", diamond_dag())):
+        baseline = inputs_per_second(lambda: [dag.evaluate(i) for i in range(INPUTS)])
+        report(f"{name} evaluate", baseline, baseline)
+        measured = inputs_per_second(lambda: list(dag.evaluate_many(range(INPUTS))))
+        report(f"{name} evaluate_many", baseline, measured)
+
+    for name, async_dag in (
+        ("async", async_diamond_dag()),
+        ("async ready", async_diamond_dag().with_scheduler(ReadyScheduler())),
+    ):
+        baseline = inputs_per_second(lambda: asyncio.run(gather_evaluate(async_dag)))
+        report(f"{name} gather(evaluate)", baseline, baseline)
+        for max_concurrency in CONCURRENCY:
+            for ordered in (True, False):
+                measured = inputs_per_second(
+                    lambda: asyncio.run(collect(async_dag, max_concurrency, ordered))
+                )
+                order = "ordered" if ordered else "as completed"
+                report(f"{name} {max_concurrency} {order}", baseline, measured)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compares `DAGDescription.fingerprint()` with hashing a description's JSON.
+
+Run with `python -m benchmarks.bench_fingerprint`. The first fingerprint of an
+instance is computed in full, and later calls return the memoised value.
+"""
+
+import hashlib
+
+from benchmarks.bench_construction import best_time
+from benchmarks.bench_startup import ladder_description
+from daggery.description import DAGDescription
+
+SIZES = (1_000, 10_000)
+
+
+def uncached_fingerprint(description: DAGDescription) -> str:
+    # Drops the memoised value, to time computing the fingerprint itself.
+    description.__dict__.pop("_fingerprint", None)
+    return description.fingerprint()
+
+
+def main():
+    print(
+        f"{'nodes':>8} {'JSON hash (s)':>14} {'fingerprint (s)':>16} "
+        f"{'memoised (s)':>13}"
+    )
+    for size in SIZES:
+        description = ladder_description(size)
+        json_hash = best_time(
+            lambda: hashlib.blake2b(description.model_dump_json().encode()).digest()
+        )
+        first = best_time(lambda: uncached_fingerprint(description))
+        memoised = best_time(description.fingerprint)
+        print(f"{size:>8} {json_hash:>14.4f} {first:>16.4f} {memoised:>13.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures the memory held per node by a large set of DAGs, with and without
+nodes being shared between them.
+
+Run with `python -m benchmarks.bench_interning`. Each set holds 100 DAGs of
+around 1,000 nodes (see `bench_startup` for the ladder graphs used), either
+built from the same description or from ladders of slightly different sizes -
+which share every node but the last few. Memory is measured with
+`tracemalloc`. The baseline deep-copies each DAG as it is built, giving it its
+own nodes, as before nodes were interned.
+"""
+
+import copy
+import gc
+import tracemalloc
+from typing import Callable
+
+from daggery.dag import FunctionDAG
+
+from .bench_startup import ladder_description, op_node_map
+
+NUM_DAGS = 100
+SIZE = 1_000
+
+
+def retained_memory(build: Callable[[], list]) -> tuple[int, int]:
+    # Returns the bytes still allocated once the DAGs are built, and the total
+    # number of nodes across them.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        dags = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return retained, sum(len(dag.nodes) for dag in dags)
+
+
+def main():
+    descriptions = {
+        "identical": [ladder_description(SIZE)] * NUM_DAGS,
+        "overlapping": [ladder_description(SIZE + i) for i in range(NUM_DAGS)],
+    }
+    print(
+        f"{'graphs':>12} {'nodes':>8} {'copied (B/node)':>16} {'shared (B/node)':>16}"
+    )
+    for label, dag_descriptions in descriptions.items():
+
+        def build_shared() -> list:
+            return [
+                FunctionDAG.throwable_from_dag_description(description, op_node_map)
+                for description in dag_descriptions
+            ]
+
+        def build_copied() -> list:
+            return [copy.deepcopy(dag) for dag in build_shared()]
+
+        copied, num_nodes = retained_memory(build_copied)
+        shared, _ = retained_memory(build_shared)
+        print(
+            f"{label:>12} {num_nodes:>8} {copied / num_nodes:>16.0f} "
+            f"{shared / num_nodes:>16.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Measures peak memory while evaluating a wide DAG whose nodes produce large
+buffers.
+
+Run with `python -m benchmarks.bench_memory`. The DAG fans out from a head node
+to several chains of nodes, which a tail node joins. Peak memory is measured
+with `tracemalloc`, since (unlike peak RSS) it can be reset between runs in the
+same process. The baseline keeps every intermediate output until evaluation
+finishes, as `evaluate` did before liveness analysis.
+"""
+
+import asyncio
+import logging
+import tracemalloc
+from typing import Any, Callable
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+
+BUFFER_SIZE = 1 << 20
+WIDTH = 8
+DEPTH = 8
+
+
+class Produce(Node, frozen=True):
+    def evaluate(self, *values: Any) -> bytes:
+        return bytes(BUFFER_SIZE)
+
+
+class Join(Node, frozen=True):
+    def evaluate(self, *values: bytes) -> int:
+        return sum(len(value) for value in values)
+
+
+class AsyncProduce(AsyncNode, frozen=True):
+    async def evaluate(self, *values: Any) -> bytes:
+        await asyncio.sleep(0)
+        return bytes(BUFFER_SIZE)
+
+
+class AsyncJoin(AsyncNode, frozen=True):
+    async def evaluate(self, *values: bytes) -> int:
+        await asyncio.sleep(0)
+        return sum(len(value) for value in values)
+
+
+def wide_description() -> DAGDescription:
+    ends = [f"p{branch}_{DEPTH - 1}" for branch in range(WIDTH)]
+    ops = [
+        Operation(
+            name="head",
+            op_name="produce",
+            children=tuple(f"p{branch}_0" for branch in range(WIDTH)),
+        )
+    ]
+    for branch in range(WIDTH):
+        for depth in range(DEPTH):
+            child = f"p{branch}_{depth + 1}" if depth < DEPTH - 1 else "tail"
+            ops.append(
+                Operation(
+                    name=f"p{branch}_{depth}", op_name="produce", children=(child,)
+                )
+            )
+    ops.append(Operation(name="tail", op_name="join"))
+    return DAGDescription(
+        operations=OperationSequence(ops=tuple(ops)),
+        argument_mappings=(ArgumentMapping(op_name="tail", inputs=tuple(ends)),),
+    )
+
+
+def evaluate_keeping_outputs(dag: FunctionDAG, value: Any) -> Any:
+    context = {"__INPUT__": value}
+    for node in dag.nodes:
+        input_values = tuple(context[node_name] for node_name in node.input_nodes)
+        context[node.naked_node.name] = node.evaluate(*input_values)
+    return context["tail"]
+
+
+def peak_megabytes(evaluate: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    evaluate()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1 << 20)
+
+
+def main():
+    logging.getLogger("daggery").setLevel(logging.WARNING)
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    logging.getLogger("daggery.async_dag").setLevel(logging.WARNING)
+    description = wide_description()
+    dag = FunctionDAG.throwable_from_dag_description(
+        description, {"produce": Produce, "join": Join}
+    )
+    async_dag = AsyncFunctionDAG.throwable_from_dag_description(
+        description, {"produce": AsyncProduce, "join": AsyncJoin}
+    )
+    compiled = dag.compile()
+    async_compiled = async_dag.compile()
+
+    print(f"{WIDTH} chains of {DEPTH} nodes, each producing {BUFFER_SIZE} bytes")
+    print(f"{'evaluation':<26} {'peak (MiB)':>11}")
+    for label, evaluate in (
+        ("keeping all outputs", lambda: evaluate_keeping_outputs(dag, None)),
+        ("FunctionDAG.evaluate", lambda: dag.evaluate(None)),
+        ("FunctionDAG.compile", lambda: compiled(None)),
+        ("AsyncFunctionDAG.evaluate", lambda: asyncio.run(async_dag.evaluate(None))),
+        ("AsyncFunctionDAG.compile", lambda: asyncio.run(async_compiled(None))),
+    ):
+        print(f"{label:<26} {peak_megabytes(evaluate):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Measures how `PrevalidatedDAG.from_dag_description` scales with graph size.
+
+Run with `python -m benchmarks.bench_prevalidate`. Validation is linear in the
+number of operations and edges, so the time per operation should stay roughly
+flat as the graphs grow.
+"""
+
+import time
+
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.prevalidate import PrevalidatedDAG
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def chain(size: int) -> DAGDescription:
+    names = [f"op{i}" for i in range(size)]
+    ops = tuple(
+        Operation(name=name, op_name="op", children=(child,))
+        for name, child in zip(names, names[1:])
+    )
+    return DAGDescription(
+        operations=OperationSequence(
+            ops=(*ops, Operation(name=names[-1], op_name="op"))
+        )
+    )
+
+
+def fan_out(size: int) -> DAGDescription:
+    # One head feeding `size - 2` independent nodes, which all feed one tail.
+    branches = [f"branch{i}" for i in range(size - 2)]
+    ops = (
+        Operation(name="head", op_name="op", children=tuple(branches)),
+        *(Operation(name=name, op_name="op", children=("tail",)) for name in branches),
+        Operation(name="tail", op_name="op"),
+    )
+    mappings = (ArgumentMapping(op_name="tail", inputs=tuple(branches)),)
+    return DAGDescription(
+        operations=OperationSequence(ops=ops), argument_mappings=mappings
+    )
+
+
+def time_validation(dag_description: DAGDescription, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = PrevalidatedDAG.from_dag_description(dag_description)
+        best = min(best, time.perf_counter() - start)
+        assert isinstance(result, PrevalidatedDAG)
+    return best
+
+
+def main():
+    print(f"{'shape':<8} {'nodes':>8} {'total (s)':>10} {'per node (us)':>14}")
+    for shape, factory in (("chain", chain), ("fan-out", fan_out)):
+        for size in SIZES:
+            duration = time_validation(factory(size))
+            per_node = duration / size * 1e6
+            print(f"{shape:<8} {size:>8} {duration:>10.4f} {per_node:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
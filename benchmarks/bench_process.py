@@ -0,0 +1,101 @@
+"""
+Compares the latency of a CPU-bound DAG evaluated on one thread by
+`FunctionDAG`, and by `ProcessFunctionDAG` with its branches assigned to
+blocks evaluated on 1, 2, 4 and 8 worker processes.
+
+Run with `python -m benchmarks.bench_process`. The DAG fans out from one node
+to 8 branches, each a block of two nodes running a pure Python loop (which
+never releases the GIL), and joins them with a node summing their results.
+Only the branch inputs and outputs (small integers) cross processes, so the
+speedup should grow almost linearly with the number of workers, up to the
+number of cores available.
+"""
+
+import logging
+import os
+import time
+
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.process_dag import ProcessFunctionDAG
+
+WIDTH = 8
+ITERATIONS = 1_000_000
+WORKERS = (1, 2, 4, 8)
+REPEATS = 3
+
+
+class Head(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value
+
+
+class Spin(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        total = value
+        for i in range(ITERATIONS):
+            total = (total * 31 + i) % 1_000_003
+        return total
+
+
+class Join(Node, frozen=True):
+    def evaluate(self, *values: int) -> int:
+        return sum(values)
+
+
+op_node_map: dict[str, type[Node]] = {"head": Head, "spin": Spin, "join": Join}
+
+
+def fan_out_description() -> DAGDescription:
+    firsts = [f"spin{i}a" for i in range(WIDTH)]
+    lasts = [f"spin{i}b" for i in range(WIDTH)]
+    ops = [Operation(name="head", op_name="head", children=tuple(firsts))]
+    for i, (first, last) in enumerate(zip(firsts, lasts)):
+        block = f"branch{i}"
+        ops.append(Operation(name=first, op_name="spin", children=(last,), block=block))
+        ops.append(
+            Operation(name=last, op_name="spin", children=("join",), block=block)
+        )
+    ops.append(Operation(name="join", op_name="join"))
+    return DAGDescription(
+        operations=OperationSequence(ops=tuple(ops)),
+        argument_mappings=(ArgumentMapping(op_name="join", inputs=tuple(lasts)),),
+    )
+
+
+def latency(dag: FunctionDAG) -> float:
+    best = float("inf")
+    for seed in range(REPEATS):
+        start = time.perf_counter()
+        dag.evaluate(seed)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    description = fan_out_description()
+    dag = FunctionDAG.throwable_from_dag_description(description, op_node_map)
+    sequential = latency(dag)
+    print(f"{os.cpu_count()} CPUs, {WIDTH} branches")
+    print(f"{'workers':>7} {'latency (ms)':>13} {'speedup':>8}")
+    print(f"{'-':>7} {1e3 * sequential:>13.1f} {1.0:>7.2f}x")
+    process_dag = ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    )
+    for workers in WORKERS:
+        with process_dag.with_workers(workers) as parallel_dag:
+            parallel_dag.start()
+            assert parallel_dag.evaluate(1) == dag.evaluate(1)
+            parallel = latency(parallel_dag)
+        print(f"{workers:>7} {1e3 * parallel:>13.1f} {sequential / parallel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares the `__slots__`-based runtime nodes of DAGs with the pydantic models
+previously used for them.
+
+Run with `python -m benchmarks.bench_runtime`. Two things are measured:
+
+* The memory held per runtime node (excluding the node it wraps), measured
+  with `tracemalloc`.
+* Evaluating a chain of runtime nodes one by one through their `evaluate`
+  methods, reading their inputs by name, as DAGs did before execution plans.
+"""
+
+import gc
+import tracemalloc
+from typing import Any, Callable, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from daggery.dag import DAGNode
+from daggery.node import Node
+from daggery.plan import INPUT_NAME
+from daggery.utils.construction import unvalidated_construct
+
+from .bench_construction import best_time
+
+SIZE = 100_000
+
+
+class PydanticDAGNode(BaseModel, frozen=True):
+    naked_node: Node
+    input_nodes: Tuple[str, ...]
+
+    def evaluate(self, *args) -> Any:
+        return self.naked_node.evaluate(*args)
+
+
+class Increment(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value + 1
+
+
+def chain(build: Callable[[Node, Tuple[str, ...]], Any], naked_nodes) -> list:
+    inputs = [(INPUT_NAME,)] + [(node.name,) for node in naked_nodes[:-1]]
+    return [build(node, node_inputs) for node, node_inputs in zip(naked_nodes, inputs)]
+
+
+def memory_per_node(build: Callable[[], list]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        nodes = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return retained / len(nodes)
+
+
+def evaluate_by_name(nodes: Sequence[Any], value: Any) -> Any:
+    outputs = {INPUT_NAME: value}
+    for node in nodes:
+        output = node.evaluate(*(outputs[name] for name in node.input_nodes))
+        outputs[node.naked_node.name] = output
+    return output
+
+
+def main():
+    naked_nodes = [
+        Increment(name=f"inc{i}", children=(f"inc{i + 1}",)) for i in range(SIZE)
+    ]
+    builders = {
+        "pydantic": lambda node, inputs: unvalidated_construct(
+            PydanticDAGNode, naked_node=node, input_nodes=inputs
+        ),
+        "slots": DAGNode.trusted,
+    }
+    print(f"{'runtime node':>13} {'bytes/node':>11} {'evaluate (s)':>13}")
+    for label, build in builders.items():
+        nodes = chain(build, naked_nodes)
+        assert evaluate_by_name(nodes, 0) == SIZE
+        memory = memory_per_node(lambda: chain(build, naked_nodes))
+        evaluate = best_time(lambda: evaluate_by_name(nodes, 0))
+        print(f"{label:>13} {memory:>11.0f} {evaluate:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
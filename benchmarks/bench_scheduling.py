@@ -0,0 +1,117 @@
+"""
+Compares the end-to-end latency of async DAGs evaluated batch by batch with
+`BatchScheduler`, and node by node as inputs become ready with
+`ReadyScheduler`.
+
+Run with `python -m benchmarks.bench_scheduling`. Each DAG is a random (but
+seeded) grid of `width` chains of nodes with cross-links between neighbouring
+layers, fanned out from one node and joined by another. Every node sleeps:
+most for 1ms, but one in ten for 20ms, as with I/O-heavy graphs where a few
+calls are much slower than the rest.
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.scheduling import BatchScheduler, ReadyScheduler, Scheduler
+
+SHAPES = ((4, 10), (8, 10), (16, 20))
+SEED = 0
+FAST, SLOW, SLOW_FRACTION = 0.001, 0.02, 0.1
+REPEATS = 5
+
+# The latency of each node, by name.
+latencies: dict[str, float] = {}
+
+
+class Sleep(AsyncNode, frozen=True):
+    async def evaluate(self, *values: int) -> int:
+        await asyncio.sleep(latencies[self.name])
+        return sum(values)
+
+
+op_node_map: dict[str, type[AsyncNode]] = {"sleep": Sleep}
+
+
+def grid_description(width: int, depth: int, rng: random.Random) -> DAGDescription:
+    # Node (k, i) always takes node (k - 1, i) as an input, and sometimes also
+    # a neighbour of it, so that every node has a child.
+    parents: dict[str, list[str]] = {"tail": []}
+    children: dict[str, list[str]] = {"head": []}
+    for k in range(depth):
+        for i in range(width):
+            name = f"n{k}_{i}"
+            children[name] = []
+            if k == 0:
+                parents[name] = ["head"]
+                continue
+            parents[name] = [f"n{k - 1}_{i}"]
+            neighbour = rng.choice((i - 1, i + 1))
+            if 0 <= neighbour < width and rng.random() < 0.5:
+                parents[name].append(f"n{k - 1}_{neighbour}")
+    parents["tail"] = [f"n{depth - 1}_{i}" for i in range(width)]
+    for name, inputs in parents.items():
+        for parent in inputs:
+            children[parent].append(name)
+
+    names = list(children) + ["tail"]
+    for name in names:
+        latencies[name] = SLOW if rng.random() < SLOW_FRACTION else FAST
+    ops = tuple(
+        Operation(name=name, op_name="sleep", children=tuple(children.get(name, ())))
+        for name in names
+    )
+    mappings = tuple(
+        ArgumentMapping(op_name=name, inputs=tuple(inputs))
+        for name, inputs in parents.items()
+        if len(inputs) > 1
+    )
+    return DAGDescription(
+        operations=OperationSequence(ops=ops), argument_mappings=mappings
+    )
+
+
+async def best_latency(dag: AsyncFunctionDAG, scheduler: Scheduler) -> float:
+    dag = dag.with_scheduler(scheduler)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await dag.evaluate(0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run():
+    rng = random.Random(SEED)
+    print(
+        f"{'width':>6} {'depth':>6} {'batches':>8} {'batch (ms)':>11} "
+        f"{'ready (ms)':>11} {'speedup':>8}"
+    )
+    for width, depth in SHAPES:
+        description = grid_description(width, depth, rng)
+        dag = AsyncFunctionDAG.throwable_from_dag_description(description, op_node_map)
+        batched = await best_latency(dag, BatchScheduler())
+        ready = await best_latency(dag, ReadyScheduler())
+        print(
+            f"{width:>6} {depth:>6} {len(dag.nodes):>8} {batched * 1000:>11.1f} "
+            f"{ready * 1000:>11.1f} {batched / ready:>7.2f}x"
+        )
+
+
+def main():
+    logging.getLogger("daggery.async_dag").setLevel(logging.WARNING)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares rebuilding DAGs from `DAGDescription` JSON with loading them from
+binary artifacts, as a worker would at startup.
+
+Run with `python -m benchmarks.bench_startup`. Each DAG is a ladder of nodes,
+where every node feeds both of the next two, written once with
+`serialise.dump` and then loaded (memory-mapped) with `serialise.load`.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from daggery import serialise
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+
+SIZES = (100, 1_000, 5_000)
+
+
+class Add(Node, frozen=True):
+    def evaluate(self, *values: int) -> int:
+        return sum(values)
+
+
+op_node_map: dict[str, type[Node]] = {"add": Add}
+
+
+def ladder_description(size: int) -> DAGDescription:
+    ops = []
+    mappings = []
+    for i in range(size):
+        children = tuple(f"n{j}" for j in (i + 1, i + 2) if j < size)
+        ops.append(Operation(name=f"n{i}", op_name="add", children=children))
+        if i >= 2:
+            inputs = (f"n{i - 2}", f"n{i - 1}")
+            mappings.append(ArgumentMapping(op_name=f"n{i}", inputs=inputs))
+    return DAGDescription(
+        operations=OperationSequence(ops=tuple(ops)),
+        argument_mappings=tuple(mappings),
+    )
+
+
+def best_time(function: Callable[[], object], repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def from_json(json: str) -> FunctionDAG:
+    description = DAGDescription.model_validate_json(json)
+    return FunctionDAG.throwable_from_dag_description(description, op_node_map)
+
+
+def main():
+    print(
+        f"{'nodes':>8} {'from JSON (s)':>14} {'artifact (s)':>13} {'speedup':>8} "
+        f"{'JSON (KiB)':>11} {'artifact (KiB)':>15}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            json = ladder_description(size).model_dump_json()
+            path = Path(directory) / f"ladder{size}.dag"
+            serialise.dump(from_json(json), path, op_node_map)
+            assert serialise.load(path, op_node_map) == from_json(json)
+
+            rebuilt = best_time(lambda: from_json(json))
+            loaded = best_time(lambda: serialise.load(path, op_node_map))
+            print(
+                f"{size:>8} {rebuilt:>14.4f} {loaded:>13.4f} "
+                f"{rebuilt / loaded:>7.2f}x {len(json) / 1024:>11.1f} "
+                f"{path.stat().st_size / 1024:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares validating a large `DAGDescription` JSON file with
+`DAGDescription.model_validate_json` against the streaming loader.
+
+Run with `python -m benchmarks.bench_stream`. Each file holds a ladder of nodes
+(see `bench_startup`), and both approaches produce the same `PrevalidatedDAG`.
+Peak memory is measured with `tracemalloc` in a separate run from the timings,
+since tracing slows allocation down.
+"""
+
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from daggery import stream
+from daggery.description import DAGDescription
+from daggery.prevalidate import PrevalidatedDAG
+
+from .bench_construction import best_time
+from .bench_startup import ladder_description
+
+SIZES = (10_000, 100_000)
+
+
+def from_json(path: Path) -> object:
+    description = DAGDescription.model_validate_json(path.read_text())
+    return PrevalidatedDAG.from_dag_description(description)
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    print(
+        f"{'nodes':>8} {'file (MiB)':>11} {'JSON (s)':>9} {'stream (s)':>11} "
+        f"{'JSON peak (MiB)':>16} {'stream peak (MiB)':>18}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = Path(directory) / f"ladder{size}.json"
+            path.write_text(ladder_description(size).model_dump_json())
+            assert stream.load_prevalidated(path) == from_json(path)
+
+            json_time = best_time(lambda: from_json(path), repeats=3)
+            stream_time = best_time(lambda: stream.load_prevalidated(path), repeats=3)
+            json_peak = peak_memory(lambda: from_json(path))
+            stream_peak = peak_memory(lambda: stream.load_prevalidated(path))
+            print(
+                f"{size:>8} {path.stat().st_size / 2**20:>11.1f} {json_time:>9.3f} "
+                f"{stream_time:>11.3f} {json_peak / 2**20:>16.1f} "
+                f"{stream_peak / 2**20:>18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares the latency of NumPy-heavy DAGs evaluated node by node on one thread
+by `FunctionDAG`, and with independent nodes in parallel by
+`ThreadedFunctionDAG`.
+
+Run with `python -m benchmarks.bench_threaded` (NumPy is needed, but is not a
+dependency of daggery). Each DAG fans out from one node to `width` branches,
+each sorting and then taking the FFT of a large array (both release the GIL),
+and joins them with a node summing their results. With `width` 2 this is a
+diamond. The speedup is bounded by the number of cores available.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.threaded_dag import ThreadedFunctionDAG
+
+SIZE = 2_000_000
+WIDTHS = (2, 4, 8)
+REPEATS = 5
+
+
+class Head(Node, frozen=True):
+    def evaluate(self, seed: int) -> np.ndarray:
+        return np.random.default_rng(seed).random(SIZE)
+
+
+class Sort(Node, frozen=True):
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        return np.sort(values, kind="stable")
+
+
+class FFT(Node, frozen=True):
+    def evaluate(self, values: np.ndarray) -> float:
+        return float(np.abs(np.fft.rfft(values)).max())
+
+
+class Join(Node, frozen=True):
+    def evaluate(self, *values: float) -> float:
+        return sum(values)
+
+
+op_node_map: dict[str, type[Node]] = {
+    "head": Head,
+    "sort": Sort,
+    "fft": FFT,
+    "join": Join,
+}
+
+
+def fan_out_description(width: int) -> DAGDescription:
+    sorts = [f"sort{i}" for i in range(width)]
+    ffts = [f"fft{i}" for i in range(width)]
+    ops = (
+        Operation(name="head", op_name="head", children=tuple(sorts)),
+        *(
+            Operation(name=sort, op_name="sort", children=(fft,))
+            for sort, fft in zip(sorts, ffts)
+        ),
+        *(Operation(name=fft, op_name="fft", children=("join",)) for fft in ffts),
+        Operation(name="join", op_name="join"),
+    )
+    mappings = (ArgumentMapping(op_name="join", inputs=tuple(ffts)),)
+    return DAGDescription(
+        operations=OperationSequence(ops=ops), argument_mappings=mappings
+    )
+
+
+def latency(dag: FunctionDAG) -> float:
+    dag.evaluate(0)
+    best = float("inf")
+    for seed in range(REPEATS):
+        start = time.perf_counter()
+        dag.evaluate(seed)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    print(f"{os.cpu_count()} CPUs, arrays of {SIZE:,} floats")
+    print(f"{'width':>5} {'sequential (ms)':>16} {'threaded (ms)':>14} {'speedup':>8}")
+    for width in WIDTHS:
+        description = fan_out_description(width)
+        dag = FunctionDAG.throwable_from_dag_description(description, op_node_map)
+        threaded = ThreadedFunctionDAG.throwable_from_dag_description(
+            description, op_node_map
+        )
+        assert dag.evaluate(1) == threaded.evaluate(1)
+        sequential, parallel = latency(dag), latency(threaded)
+        print(
+            f"{width:>5} {1e3 * sequential:>16.1f} {1e3 * parallel:>14.1f} "
+            f"{sequential / parallel:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
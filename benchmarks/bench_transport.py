@@ -0,0 +1,117 @@
+"""
+Compares the latency of a `ProcessFunctionDAG` passing large NumPy arrays
+between processes by pickling them, and through shared memory with a
+`SharedMemoryTransport`.
+
+Run with `python -m benchmarks.bench_transport` (NumPy is needed, but is not a
+dependency of daggery). Each DAG loads a float32 image in this process, and
+fans out to two blocks on worker processes, each applying a cheap filter and
+returning an image of the same size. A node in this process then combines the
+two. Every evaluation moves four images between processes, so the work is
+dominated by moving them.
+"""
+
+import logging
+import time
+
+import numpy as np
+
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.process_dag import ProcessFunctionDAG
+from daggery.transport import SharedMemoryTransport
+
+SIDES = (1024, 2048, 4096)
+REPEATS = 5
+
+images: dict[int, np.ndarray] = {}
+
+
+class Load(Node, frozen=True):
+    def evaluate(self, side: int) -> np.ndarray:
+        return images[side]
+
+
+class Brighten(Node, frozen=True):
+    def evaluate(self, image: np.ndarray) -> np.ndarray:
+        return np.minimum(image * np.float32(1.5), np.float32(1))
+
+
+class Gamma(Node, frozen=True):
+    def evaluate(self, image: np.ndarray) -> np.ndarray:
+        return np.sqrt(image)
+
+
+class Difference(Node, frozen=True):
+    def evaluate(self, left: np.ndarray, right: np.ndarray) -> float:
+        return float(np.abs(left - right).max())
+
+
+op_node_map: dict[str, type[Node]] = {
+    "load": Load,
+    "brighten": Brighten,
+    "gamma": Gamma,
+    "difference": Difference,
+}
+
+DESCRIPTION = DAGDescription(
+    operations=OperationSequence(
+        ops=(
+            Operation(name="load", op_name="load", children=("brighten", "gamma")),
+            Operation(
+                name="brighten",
+                op_name="brighten",
+                children=("difference",),
+                block="brighten",
+            ),
+            Operation(
+                name="gamma", op_name="gamma", children=("difference",), block="gamma"
+            ),
+            Operation(name="difference", op_name="difference"),
+        )
+    ),
+    argument_mappings=(
+        ArgumentMapping(op_name="difference", inputs=("brighten", "gamma")),
+    ),
+)
+
+
+def latency(dag: ProcessFunctionDAG, side: int) -> float:
+    dag.evaluate(side)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        dag.evaluate(side)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    logging.getLogger("daggery.dag").setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    for side in SIDES:
+        images[side] = rng.random((side, side), dtype=np.float32)
+    dag = ProcessFunctionDAG.throwable_from_dag_description(
+        DESCRIPTION, op_node_map
+    ).with_workers(2)
+    shared_dag = dag.with_transport(SharedMemoryTransport())
+    print(f"{'image (MB)':>10} {'pickled (ms)':>13} {'shared (ms)':>12} {'speedup':>8}")
+    with dag, shared_dag:
+        dag.start()
+        shared_dag.start()
+        for side in SIDES:
+            assert dag.evaluate(side) == shared_dag.evaluate(side)
+            pickled, shared = latency(dag, side), latency(shared_dag, side)
+            print(
+                f"{images[side].nbytes / 2**20:>10.0f} {1e3 * pickled:>13.1f} "
+                f"{1e3 * shared:>12.1f} {pickled / shared:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
-from .async_dag import AsyncFunctionDAG as AsyncFunctionDAG
+import importlib
+
+from .async_dag import (
+    AsyncFunctionDAG as AsyncFunctionDAG,
+    BatchingInfo as BatchingInfo,
+)
+from .cache import CacheInfo as CacheInfo, DAGCache as DAGCache
 from .dag import FunctionDAG as FunctionDAG
 from .description import (
     DAGDescription as DAGDescription,
@@ -7,11 +13,38 @@ from .description import (
     OperationSequence as OperationSequence,
 )
 from .async_node import AsyncNode as AsyncNode
+from .batched_node import BatchedAsyncNode as BatchedAsyncNode
 from .node import Node as Node
+from .scheduling import (
+    BatchScheduler as BatchScheduler,
+    ConcurrencyLimits as ConcurrencyLimits,
+    CriticalPathScheduler as CriticalPathScheduler,
+    ReadyScheduler as ReadyScheduler,
+    Scheduler as Scheduler,
+)
+from .process_dag import ProcessFunctionDAG as ProcessFunctionDAG
+from .threaded_dag import ThreadedFunctionDAG as ThreadedFunctionDAG
 from .prevalidate import (
     EmptyDAG as EmptyDAG,
     InvalidDAG as InvalidDAG,
     PrevalidatedDAG as PrevalidatedDAG,
     PrevalidatedNode as PrevalidatedNode,
 )
-from .utils import decorators as decorators
+
+# These modules are only imported on first access, keeping `import daggery`
+# cheap for callers that don't use them.
+_LAZY_MODULES = {
+    "decorators": ".utils.decorators",
+    "registry": ".registry",
+    "serialise": ".serialise",
+    "stream": ".stream",
+    "transport": ".transport",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name], __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,36 +1,120 @@
 import asyncio
 import inspect
-from typing import Any, Optional, Tuple, Union
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from functools import cached_property
+from itertools import islice
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    ClassVar,
+    Coroutine,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from pydantic import BaseModel
+from typing_extensions import Self
 
 from .async_node import AsyncNode
+from .codegen import compile_batches
 from .description import DAGDescription
+from .edit import EditableDAG
+from .node import Node
+from .plan import ExecutionPlan
 from .prevalidate import EmptyDAG, InvalidDAG, PrevalidatedDAG
+from .runtime import RuntimeNode
+from .scheduling import BatchScheduler, Scheduler
+from .utils.construction import (
+    dag_node_factory,
+    node_factory,
+    trusted_construct,
+)
 from .utils.logging import logger_factory
 
 logger = logger_factory(__name__)
 
+_DEFAULT_SCHEDULER = BatchScheduler()
 
-class AsyncDAGNode(BaseModel, frozen=True):
-    naked_node: AsyncNode
-    input_nodes: Tuple[str, ...]
+# The default number of inputs `evaluate_many` evaluates at once.
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class AsyncDAGNode(RuntimeNode):
+    __slots__ = ()
+
+    node_class = (AsyncNode, Node)
+    naked_node: Union[AsyncNode, Node]
 
     async def evaluate(self, *args) -> Any:
-        return await self.naked_node.evaluate(*args)
+        return await _evaluate_of(self.naked_node, None)(*args)
+
+
+def _evaluate_of(
+    naked_node: Union[AsyncNode, Node], executor: Optional[Executor]
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    # Sync nodes are evaluated on `executor` (or the event loop's default
+    # executor), unless they are cheap enough to be evaluated inline.
+    if isinstance(naked_node, AsyncNode):
+        return naked_node.evaluate
+    evaluate = naked_node.evaluate
+    if naked_node.run_inline:
+
+        async def evaluate_inline(*args: Any) -> Any:
+            return evaluate(*args)
+
+        return evaluate_inline
+
+    async def evaluate_in_executor(*args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, evaluate, *args)
+
+    return evaluate_in_executor
 
 
-class AsyncFunctionDAG(BaseModel, frozen=True):
+def _cancel(tasks: Iterable[asyncio.Task]) -> None:
+    for task in tasks:
+        if not task.cancel() and not task.cancelled():
+            # Already finished - the exception (if any) is retrieved so that it
+            # isn't reported as never having been.
+            task.exception()
+
+
+class BatchingInfo(BaseModel, frozen=True):
+    batches: int
+    max_width: int
+    mean_width: float
+
+
+class AsyncFunctionDAG(BaseModel, EditableDAG, frozen=True):
     nodes: Tuple[Tuple[AsyncDAGNode, ...], ...]
 
+    # Cached attributes derived from the nodes. The compiled evaluator is a
+    # generated function, which cannot be pickled, so these are left out of
+    # pickles and rebuilt on first use once unpickled.
+    _derived: ClassVar[Tuple[str, ...]] = ("plan", "_compiled", "_node_index")
+
     # We separate the creation of the DAG from the init method since this allows
     # returning instances of InvalidDAG, making this code exception-free.
     @classmethod
     def from_prevalidated_dag(
         cls,
         prevalidated_dag: PrevalidatedDAG,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> Union["AsyncFunctionDAG", InvalidDAG]:
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+        trusted: bool = False,
+    ) -> Union[Self, InvalidDAG]:
+        """
+        Builds a DAG from a `PrevalidatedDAG`. With `trusted` set, the nodes and
+        the DAG itself are constructed without running pydantic validation
+        again - the prevalidated DAG has already guaranteed their contents.
+        This is what the other factory methods use once validation succeeds.
+        """
         node_classes = [node.node_class for node in prevalidated_dag.nodes]
         for node_class in node_classes:
             if node_class not in custom_op_node_map.keys():
@@ -38,41 +122,56 @@ class AsyncFunctionDAG(BaseModel, frozen=True):
                     message=f"Invalid internal node class found in prevalidated DAG: {node_class}"
                 )
 
-        current_batch: list[AsyncDAGNode] = []
-        ordered_nodes: list[tuple[AsyncDAGNode, ...]] = []
+        ordered_nodes: list[AsyncDAGNode] = []
+        node_factories: dict[type, Callable[[str, Tuple[str, ...]], Any]] = {}
+        build_dag_node = dag_node_factory(AsyncDAGNode, trusted)
 
         # Creating immutable nodes back-to-front guarantees an immutable DAG.
-        # When building the graph, we keep track of all nodes in the same
-        # logical 'batch'. A batch is just a set of nodes where none of them
-        # have any parent/child relationships between them, direct or otherwise.
-        # This implies they are independent of each other. Starting from the
-        # tail (which is the last batch and has size 1), we build up a set of
-        # nodes and ensure none of them are each other's parent/child. If and
-        # when this eventually happens, we know we have crossed into another
-        # batch. Consequently, this set of nodes is stored as a batch, and we
-        # create the next set with the current node in the next batch.
         for prevalidated_node in reversed(prevalidated_dag.nodes):
             name = prevalidated_node.name
             child_nodes = prevalidated_node.children
 
             node_class_constructor = custom_op_node_map[prevalidated_node.node_class]
-            node = node_class_constructor(name=name, children=child_nodes)
-            if not node.model_config.get("frozen", False):
-                return InvalidDAG(
-                    message=f"Mutable node found in DAG ({node}). This is not supported."
-                )
-            if not inspect.iscoroutinefunction(node.evaluate):
-                return InvalidDAG(
-                    message=f"Node {node} evaluate method is not a coroutine function."
+            build_node = node_factories.get(node_class_constructor)
+            if build_node is None:
+                # Identical nodes are shared between DAGs, not built per DAG.
+                build_node = node_factory(
+                    node_class_constructor, trusted, interned=True
                 )
+            node = build_node(name, child_nodes)
+            # Mutability and the evaluate method are properties of the node
+            # class, so each class only needs checking once.
+            if node_class_constructor not in node_factories:
+                if invalid := cls._check_node(node):
+                    return invalid
+                node_factories[node_class_constructor] = build_node
 
             # We have a special case for the root node, enabling a standard
             # fetching of inputs in the evaluate method.
             input_nodes = tuple(prevalidated_node.input_nodes) or ("__INPUT__",)
-            annotated_node = AsyncDAGNode(
-                naked_node=node,
-                input_nodes=input_nodes,
-            )
+            annotated_node = build_dag_node(node, input_nodes)
+            ordered_nodes.append(annotated_node)
+
+        nodes = cls._batch(ordered_nodes[::-1])
+        return trusted_construct(cls, nodes=nodes) if trusted else cls(nodes=nodes)
+
+    @staticmethod
+    def _batch(
+        ordered_nodes: Sequence[AsyncDAGNode],
+    ) -> Tuple[Tuple[AsyncDAGNode, ...], ...]:
+        # We keep track of all nodes in the same logical 'batch'. A batch is
+        # just a set of nodes where none of them have any parent/child
+        # relationships between them, direct or otherwise. This implies they
+        # are independent of each other. Starting from the tail (which is the
+        # last batch and has size 1), we build up a set of nodes and ensure none
+        # of them are each other's parent/child. If and when this eventually
+        # happens, we know we have crossed into another batch. Consequently,
+        # this set of nodes is stored as a batch, and we create the next set
+        # with the current node in the next batch.
+        current_batch: list[AsyncDAGNode] = []
+        batches: list[tuple[AsyncDAGNode, ...]] = []
+        for annotated_node in reversed(ordered_nodes):
+            child_nodes = annotated_node.naked_node.children
             # Given the order of traversal, check if any nodes in the current batch
             # are children of this node. Given the sortedness we know they can't be
             # its parents.
@@ -80,32 +179,34 @@ class AsyncFunctionDAG(BaseModel, frozen=True):
                 sibling.naked_node.name in child_nodes for sibling in current_batch
             )
             if found_new_batch:
-                ordered_nodes.append(tuple(reversed(current_batch)))
+                batches.append(tuple(reversed(current_batch)))
                 current_batch = [annotated_node]
             else:
                 current_batch.append(annotated_node)
 
         # Ensure the last batch is added.
-        ordered_nodes.append(tuple(reversed(current_batch)))
-        return cls(nodes=tuple(reversed(ordered_nodes)))
+        batches.append(tuple(reversed(current_batch)))
+        return tuple(reversed(batches))
 
     @classmethod
     def from_dag_description(
         cls,
         dag_description: DAGDescription,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> Union["AsyncFunctionDAG", InvalidDAG]:
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Union[Self, InvalidDAG]:
         prevalidated_dag = PrevalidatedDAG.from_dag_description(dag_description)
         if isinstance(prevalidated_dag, InvalidDAG):
             return prevalidated_dag
-        return cls.from_prevalidated_dag(prevalidated_dag, custom_op_node_map)
+        return cls.from_prevalidated_dag(
+            prevalidated_dag, custom_op_node_map, trusted=True
+        )
 
     @classmethod
     def nullable_from_dag_description(
         cls,
         dag_description: DAGDescription,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> Optional["AsyncFunctionDAG"]:
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Optional[Self]:
         dag = cls.from_dag_description(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             return None
@@ -115,8 +216,8 @@ class AsyncFunctionDAG(BaseModel, frozen=True):
     def throwable_from_dag_description(
         cls,
         dag_description: DAGDescription,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> "AsyncFunctionDAG":
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Self:
         dag = cls.from_dag_description(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             raise Exception(dag.message)
@@ -126,19 +227,21 @@ class AsyncFunctionDAG(BaseModel, frozen=True):
     def from_string(
         cls,
         dag_description: str,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> Union["AsyncFunctionDAG", InvalidDAG]:
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Union[Self, InvalidDAG]:
         prevalidated_dag = PrevalidatedDAG.from_string(dag_description)
         if isinstance(prevalidated_dag, EmptyDAG):
             return InvalidDAG(message=prevalidated_dag.message)
-        return cls.from_prevalidated_dag(prevalidated_dag, custom_op_node_map)
+        return cls.from_prevalidated_dag(
+            prevalidated_dag, custom_op_node_map, trusted=True
+        )
 
     @classmethod
     def nullable_from_string(
         cls,
         dag_description: str,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> Optional["AsyncFunctionDAG"]:
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Optional[Self]:
         dag = cls.from_string(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             return None
@@ -148,38 +251,242 @@ class AsyncFunctionDAG(BaseModel, frozen=True):
     def throwable_from_string(
         cls,
         dag_description: str,
-        custom_op_node_map: dict[str, type[AsyncNode]],
-    ) -> "AsyncFunctionDAG":
+        custom_op_node_map: Mapping[str, type[Union[AsyncNode, Node]]],
+    ) -> Self:
         dag = cls.from_string(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             raise Exception(dag.message)
         return dag
 
-    # TODO: Consider implementing threadpool policy along with tests/verification.
-    # The current policy of batching nodes into a single task is not
-    # optimal, but is provably correct and serves as a baseline.
-    # This would likely include changing `from_prevalidated_dag` as well.
     async def evaluate(self, value: Any) -> Any:
-        context = {"__INPUT__": value}
-        # The nodes are topologically sorted. As it turns out, this is also
-        # a valid order of evaluation - by the time a node is reached, all
-        # of its parents will already have been evaluated.
-        # When nodes are independent of each other - which we group in
-        # 'batches', we can evaluate them concurrently.
-        for batch in self.nodes:
-            nodes_with_args = [
-                (n, tuple(context[v] for v in n.input_nodes)) for n in batch
-            ]
-            tasks = [n.evaluate(*vs) for (n, vs) in nodes_with_args]
-            output_values = await asyncio.gather(*tasks)
-            zipped_nodes = zip(nodes_with_args, output_values)
-            for (node, input_vs), output_v in zipped_nodes:
-                self._pretty_log_node(node, input_vs, output_v)
-                context[node.naked_node.name] = output_v
-        return context[node.naked_node.name]
-
-    # TODO: Consider adding a `reorder` method returning a new DAG with
-    # optimal batching.
+        # The nodes are evaluated in an order decided by the DAG's scheduler.
+        # Checking this once per evaluation avoids formatting log lines (with
+        # potentially large values) that would then be discarded.
+        log_node = self._pretty_log_node if logger.isEnabledFor(logging.INFO) else None
+        return await self.scheduler.evaluate(self.plan, value, log_node)
+
+    async def evaluate_many(
+        self,
+        inputs: Iterable[Any],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = True,
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Evaluates the DAG for each of `inputs`, with up to `max_concurrency`
+        evaluations in flight at once. Inputs are only taken as there is room
+        for them, so this suits long (or endless) streams of them.
+
+        With `ordered` set, outputs are yielded in the order of the inputs.
+        Otherwise `(index, output)` pairs are yielded as evaluations finish,
+        where `index` is the position of the input. If an evaluation raises,
+        the others are cancelled and the exception is raised from here.
+
+        The per-evaluation setup of `evaluate` is done once for all of the
+        inputs. With the default scheduler, the DAG is also compiled (see
+        `compile`) once rather than interpreted per input.
+        """
+        if max_concurrency < 1:
+            raise ValueError("evaluate_many max_concurrency must be >= 1")
+        evaluate = self._evaluator()
+        loop = asyncio.get_running_loop()
+        remaining = iter(inputs)
+        if ordered:
+            pending: deque[asyncio.Task] = deque(
+                loop.create_task(evaluate(value))
+                for value in islice(remaining, max_concurrency)
+            )
+            try:
+                while pending:
+                    output_value = await pending.popleft()
+                    for value in islice(remaining, 1):
+                        pending.append(loop.create_task(evaluate(value)))
+                    yield output_value
+            finally:
+                _cancel(pending)
+            return
+
+        indexed = enumerate(remaining)
+        running: dict[asyncio.Task, int] = {
+            loop.create_task(evaluate(value)): index
+            for index, value in islice(indexed, max_concurrency)
+        }
+        # Finished tasks not yet yielded, last first.
+        finished: list[Tuple[int, asyncio.Task]] = []
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                finished = sorted(
+                    ((running.pop(task), task) for task in done), reverse=True
+                )
+                for index, value in islice(indexed, len(done)):
+                    running[loop.create_task(evaluate(value))] = index
+                while finished:
+                    index, task = finished.pop()
+                    yield index, task.result()
+        finally:
+            _cancel([*running, *(task for _, task in finished)])
+
+    def _evaluator(self) -> Callable[[Any], Coroutine[Any, Any, Any]]:
+        # Resolves everything `evaluate` would per input up front.
+        scheduler = self.scheduler
+        if type(scheduler) is BatchScheduler and scheduler.limits is None:
+            return self._compiled
+        plan = self.plan
+        log_node = self._pretty_log_node if logger.isEnabledFor(logging.INFO) else None
+
+        def evaluate(value: Any) -> Coroutine[Any, Any, Any]:
+            return scheduler.evaluate(plan, value, log_node)
+
+        return evaluate
+
+    @cached_property
+    def scheduler(self) -> Scheduler:
+        """
+        Decides when each node is evaluated. Unless set with `with_scheduler`,
+        this is a `BatchScheduler`.
+        """
+        return _DEFAULT_SCHEDULER
+
+    def with_scheduler(self, scheduler: Scheduler) -> "AsyncFunctionDAG":
+        """
+        Returns a copy of this DAG evaluated with `scheduler`. The copy shares
+        its nodes (and execution plan) with this DAG, and compares equal to it.
+        """
+        dag = self._copy(self.nodes)
+        if "plan" in self.__dict__:
+            dag.__dict__["plan"] = self.plan
+        dag.__dict__["scheduler"] = scheduler
+        return dag
+
+    @cached_property
+    def executor(self) -> Optional[Executor]:
+        """
+        Evaluates the DAG's sync nodes (other than those set to `run_inline`).
+        Unless set with `with_executor`, this is None, meaning the event loop's
+        default executor.
+        """
+        return None
+
+    def with_executor(self, executor: Optional[Executor]) -> "AsyncFunctionDAG":
+        """
+        Returns a copy of this DAG whose sync nodes are evaluated on `executor`
+        (typically a `ThreadPoolExecutor`). The copy shares its nodes with this
+        DAG, and compares equal to it.
+        """
+        dag = self._copy(self.nodes)
+        dag.__dict__["executor"] = executor
+        return dag
+
+    def _copy(self, nodes: Tuple[Tuple[AsyncDAGNode, ...], ...]) -> "AsyncFunctionDAG":
+        # Copies (including edited DAGs) keep the scheduler and executor.
+        dag = trusted_construct(type(self), nodes=nodes)
+        for name in ("scheduler", "executor"):
+            if name in self.__dict__:
+                dag.__dict__[name] = self.__dict__[name]
+        return dag
+
+    @classmethod
+    def _check_node(cls, node: Any) -> Optional[InvalidDAG]:
+        if not isinstance(node, (AsyncNode, Node)):
+            return InvalidDAG(message=f"Node {node} is not an AsyncNode or a Node.")
+        if not node.model_config.get("frozen", False):
+            return InvalidDAG(
+                message=f"Mutable node found in DAG ({node}). This is not supported."
+            )
+        if isinstance(node, Node):
+            if inspect.iscoroutinefunction(node.evaluate):
+                return InvalidDAG(
+                    message=f"Node {node} evaluate method should not be a coroutine function."
+                )
+        elif not inspect.iscoroutinefunction(node.evaluate):
+            return InvalidDAG(
+                message=f"Node {node} evaluate method is not a coroutine function."
+            )
+        return None
+
+    def __getstate__(self) -> dict[Any, Any]:
+        state = super().__getstate__()
+        state["__dict__"] = {
+            name: value
+            for name, value in state["__dict__"].items()
+            if name not in self._derived
+        }
+        return state
+
+    def _ordered_nodes(self) -> Tuple[AsyncDAGNode, ...]:
+        return tuple(node for batch in self.nodes for node in batch)
+
+    def _from_ordered_nodes(
+        self, nodes: Tuple[AsyncDAGNode, ...]
+    ) -> "AsyncFunctionDAG":
+        # Edits can change which nodes are independent, so the DAG is batched
+        # afresh (which, unlike validation, is cheap).
+        return self._copy(self._batch(nodes))
+
+    @classmethod
+    def _dag_node(
+        cls, naked_node: AsyncNode, input_nodes: Tuple[str, ...]
+    ) -> AsyncDAGNode:
+        return AsyncDAGNode.trusted(naked_node, input_nodes)
+
+    @cached_property
+    def plan(self) -> ExecutionPlan:
+        # Batches are evaluated in order, so flattening them gives a valid
+        # order of evaluation for the plan.
+        executor = self.executor
+        return ExecutionPlan.from_nodes(
+            [node for batch in self.nodes for node in batch],
+            batch_sizes=[len(batch) for batch in self.nodes],
+            evaluate_of=lambda node: _evaluate_of(node.naked_node, executor),
+        )
+
+    def compile(self) -> Callable[[Any], Coroutine[Any, Any, Any]]:
+        """
+        Generates a coroutine function equivalent to `evaluate`, but with the
+        batches unrolled: each node's output is held in a local variable, nodes
+        in batches of one are awaited directly, and only wider batches are
+        gathered. Hold on to the result rather than compiling per evaluation.
+        """
+        return compile_batches(self.plan.batches, logger, self._pretty_log_node)
+
+    @cached_property
+    def _compiled(self) -> Callable[[Any], Coroutine[Any, Any, Any]]:
+        return self.compile()
+
+    def reorder(self) -> "AsyncFunctionDAG":
+        """
+        Returns a copy of this DAG with the fewest possible batches, however
+        its nodes happened to be ordered. Each node is batched by the length
+        of the longest path from it to the tail, so every batch is as wide as
+        the graph allows and the number of batches is the length of the
+        longest path through the DAG. Compare `batching_info` before and after.
+        """
+        ordered_nodes = self._ordered_nodes()
+        depths: dict[str, int] = {}
+        for node in reversed(ordered_nodes):
+            children = node.naked_node.children
+            depth = 1 + max((depths[child] for child in children), default=-1)
+            depths[node.naked_node.name] = depth
+        levels: list[list[AsyncDAGNode]] = [[] for _ in range(max(depths.values()) + 1)]
+        for node in ordered_nodes:
+            levels[depths[node.naked_node.name]].append(node)
+        # Every node has a child one level below it, so batching the nodes in
+        # this order gives back exactly these levels. This keeps the batches
+        # through edits (which batch afresh) and serialisation.
+        return self._from_ordered_nodes(
+            tuple(node for level in reversed(levels) for node in level)
+        )
+
+    def batching_info(self) -> BatchingInfo:
+        """Summarises how the nodes are batched, e.g. to check `reorder`."""
+        widths = [len(batch) for batch in self.nodes]
+        return BatchingInfo(
+            batches=len(widths),
+            max_width=max(widths),
+            mean_width=sum(widths) / len(widths),
+        )
 
     def _pretty_log_node(
         self,
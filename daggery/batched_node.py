@@ -0,0 +1,99 @@
+import asyncio
+from abc import abstractmethod
+from functools import partial
+from typing import Any, ClassVar, Sequence, Tuple
+
+from .async_node import AsyncNode
+
+# The calls waiting to be dispatched, by node and event loop. Equal nodes are
+# interchangeable, so their calls are coalesced too (e.g. from separate DAGs).
+_pending: dict[Tuple["BatchedAsyncNode", asyncio.AbstractEventLoop], "_Batch"] = {}
+# The event loop only holds weak references to tasks.
+_running: set[asyncio.Task] = set()
+
+
+class _Batch:
+    __slots__ = ("calls", "futures", "timer")
+
+    def __init__(self) -> None:
+        self.calls: list[Tuple[Any, ...]] = []
+        self.futures: list[asyncio.Future] = []
+        self.timer: Any = None
+
+
+class BatchedAsyncNode(AsyncNode, frozen=True):
+    """
+    A node whose work is far cheaper per call when done for many calls at
+    once, e.g. one calling a model server or database.
+
+    Calls to `evaluate` are not evaluated one at a time. Instead they are
+    collected for up to `batch_window` seconds after the first (or until
+    `max_batch_size` are waiting), then passed together to `evaluate_batch`,
+    and each caller gets its own output back. This includes calls from
+    concurrent evaluations of a DAG, and from other DAGs with an equal node,
+    so under load N round trips become one. Subclasses tune the window and
+    size by overriding the class variables.
+    """
+
+    max_batch_size: ClassVar[int] = 64
+    batch_window: ClassVar[float] = 0.005
+
+    @abstractmethod
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        """
+        Evaluates a batch of calls, each given as its tuple of arguments.
+        Returns the output of each call, in the same order. If this raises,
+        every call in the batch raises the same exception.
+        """
+
+    async def evaluate(self, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        key = (self, loop)
+        batch = _pending.get(key)
+        if batch is None:
+            batch = _pending[key] = _Batch()
+            batch.timer = loop.call_later(self.batch_window, self._dispatch, key)
+        future = loop.create_future()
+        batch.calls.append(args)
+        batch.futures.append(future)
+        if len(batch.calls) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._dispatch(key)
+        return await future
+
+    def _dispatch(
+        self, key: Tuple["BatchedAsyncNode", asyncio.AbstractEventLoop]
+    ) -> None:
+        batch = _pending.pop(key)
+        task = key[1].create_task(self._evaluate_batch(batch.calls))
+        _running.add(task)
+        task.add_done_callback(_running.discard)
+        # Callers are resolved once the task is done, rather than by the task
+        # itself, so that they are cancelled even if it is cancelled before it
+        # starts.
+        task.add_done_callback(partial(_resolve, batch.futures))
+
+    async def _evaluate_batch(self, calls: list[Tuple[Any, ...]]) -> Sequence[Any]:
+        outputs = await self.evaluate_batch(calls)
+        if len(outputs) != len(calls):
+            raise ValueError(
+                f"{self.name} evaluate_batch returned {len(outputs)} outputs "
+                f"for {len(calls)} calls"
+            )
+        return outputs
+
+
+def _resolve(futures: list[asyncio.Future], task: asyncio.Task) -> None:
+    # Errors of the batch are raised by each caller. They are retrieved even if
+    # every caller was cancelled, so that the task does not log them.
+    error = None if task.cancelled() else task.exception()
+    for index, future in enumerate(futures):
+        # Callers that were cancelled no longer want a result.
+        if future.done():
+            continue
+        if task.cancelled():
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(task.result()[index])
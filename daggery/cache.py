@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, TypeVar, Union
+
+from pydantic import BaseModel
+
+from .async_dag import AsyncFunctionDAG
+from .dag import FunctionDAG
+from .description import DAGDescription
+from .prevalidate import InvalidDAG
+
+DAG = TypeVar("DAG", FunctionDAG, AsyncFunctionDAG)
+
+
+class CacheInfo(BaseModel, frozen=True):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _CacheEntry:
+    __slots__ = ("dag", "custom_op_node_map", "expires_at")
+
+    def __init__(self, dag: Any, custom_op_node_map: dict, expires_at: float):
+        self.dag = dag
+        # Holding a reference to the map keeps its `id` (which is part of the
+        # key) from being reused by another object while the entry is alive.
+        self.custom_op_node_map = custom_op_node_map
+        self.expires_at = expires_at
+
+
+class DAGCache:
+    """
+    A bounded LRU cache of constructed DAGs.
+
+    Entries are keyed on the DAG class, the graph (either the DSL string or the
+    fingerprint and order of operations of a `DAGDescription`) and the
+    *identity* of the `custom_op_node_map` used to build it. Entries are
+    evicted when the cache exceeds `maxsize` (least recently used first) or
+    once they are older than `ttl` seconds.
+
+    Only valid DAGs are cached - an `InvalidDAG` is returned as-is and the next
+    request for the same graph will attempt construction again. Since DAGs are
+    immutable, a cached instance can safely be shared between callers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("A DAGCache must have a maxsize of at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("A DAGCache ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def from_string(
+        self,
+        dag_class: type[DAG],
+        dag_description: str,
+        custom_op_node_map: dict,
+    ) -> Union[DAG, InvalidDAG]:
+        key = (dag_class, "string", dag_description.strip(), id(custom_op_node_map))
+        return self._get_or_build(
+            key,
+            custom_op_node_map,
+            lambda: dag_class.from_string(dag_description, custom_op_node_map),
+        )
+
+    def from_dag_description(
+        self,
+        dag_class: type[DAG],
+        dag_description: DAGDescription,
+        custom_op_node_map: dict,
+    ) -> Union[DAG, InvalidDAG]:
+        # The order of operations decides whether a description is valid (they
+        # must be topologically sorted) and the order of the built DAG's nodes,
+        # so it is part of the key along with the fingerprint of the graph. The
+        # order of argument mappings has no bearing on either.
+        ordered_ops = tuple(
+            (op.name, op.children) for op in dag_description.operations.ops
+        )
+        graph = (dag_description.fingerprint(), ordered_ops)
+        key = (dag_class, "description", graph, id(custom_op_node_map))
+        return self._get_or_build(
+            key,
+            custom_op_node_map,
+            lambda: dag_class.from_dag_description(dag_description, custom_op_node_map),
+        )
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def _get_or_build(
+        self,
+        key: Hashable,
+        custom_op_node_map: dict,
+        build: Callable[[], Union[DAG, InvalidDAG]],
+    ) -> Union[DAG, InvalidDAG]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > self._timer():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.dag
+                del self._entries[key]
+            self._misses += 1
+
+        # Construction happens outside the lock so that slow builds do not
+        # block lookups of other graphs. Concurrent misses on the same key may
+        # both build, in which case the last one wins - both are equivalent.
+        dag = build()
+        if isinstance(dag, InvalidDAG):
+            return dag
+
+        expires_at = float("inf") if self.ttl is None else self._timer() + self.ttl
+        with self._lock:
+            self._entries[key] = _CacheEntry(dag, custom_op_node_map, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return dag
@@ -0,0 +1,178 @@
+import asyncio
+import linecache
+import logging
+import weakref
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Optional, Sequence
+
+if TYPE_CHECKING:
+    # Only imported for annotations, as plans use `compose_steps` themselves.
+    from .plan import Batch, PlanStep
+
+LogNode = Callable[[Any, tuple[Any, ...], Any], None]
+
+# Distinguishes the pseudo-filenames of generated functions in tracebacks.
+_compiled_ids = count()
+
+
+def compile_steps(
+    steps: Sequence["PlanStep"],
+    logger: logging.Logger,
+    log_node: LogNode,
+) -> Callable[[Any], Any]:
+    """
+    Generates a straight-line function evaluating `steps` in order.
+
+    Each slot becomes a local variable (`v0` holding the input) and each node's
+    bound `evaluate` method is called directly, so no lookups, tuple packing or
+    loop overhead remain beyond the calls themselves. Logging matches
+    `FunctionDAG.evaluate`, and locals are deleted once no longer needed.
+    """
+    namespace: dict[str, Any] = {}
+    lines = _prologue("def", logger, log_node, namespace)
+    for index, step in enumerate(steps):
+        lines.extend(_call(index, step, "", namespace))
+        lines.extend(_release(step.release_slots))
+    lines.append(f"    return v{steps[-1].output_slot}")
+    return _build(lines, namespace)
+
+
+def compile_batches(
+    batches: Sequence["Batch"],
+    logger: logging.Logger,
+    log_node: LogNode,
+) -> Callable[[Any], Coroutine[Any, Any, Any]]:
+    """
+    Generates a straight-line coroutine function evaluating `batches` in order.
+
+    Batches holding a single node await it directly. Only batches where the
+    graph actually branches are evaluated concurrently with `asyncio.gather`.
+    Logging matches `AsyncFunctionDAG.evaluate`, and locals are deleted once no
+    longer needed.
+    """
+    namespace: dict[str, Any] = {"gather": asyncio.gather}
+    lines = _prologue("async def", logger, log_node, namespace)
+    index = 0
+    for batch, release_slots in batches:
+        if len(batch) == 1:
+            lines.extend(_call(index, batch[0], "await ", namespace))
+            lines.extend(_release(release_slots))
+            index += 1
+            continue
+        outputs, calls, logs = [], [], []
+        for step in batch:
+            namespace[f"e{index}"] = step.evaluate
+            namespace[f"n{index}"] = step.node
+            arguments = _arguments(step)
+            outputs.append(f"v{step.output_slot}")
+            calls.append(f"e{index}({arguments})")
+            logs.append(
+                f"        log_node(n{index}, ({arguments},), v{step.output_slot})"
+            )
+            index += 1
+        lines.append(f"    {', '.join(outputs)} = await gather({', '.join(calls)})")
+        lines.append("    if log:")
+        lines.extend(logs)
+        lines.extend(_release(release_slots))
+    lines.append(f"    return v{batches[-1].steps[-1].output_slot}")
+    return _build(lines, namespace)
+
+
+def compose_steps(
+    steps: Sequence["PlanStep"],
+    logger: Optional[logging.Logger] = None,
+    log_node: Optional[LogNode] = None,
+) -> Callable[..., Any]:
+    """
+    Generates a single function applying each of `steps` to the output of the
+    one before, i.e. `e2(e1(e0(...)))`. Only the first step may take more than
+    one input. If `log_node` is given, each node is logged as by
+    `compile_steps` whenever `logger` is enabled for INFO.
+    """
+    namespace: dict[str, Any] = {
+        f"e{index}": step.evaluate for index, step in enumerate(steps)
+    }
+    parameters = "v0" if steps[0].single_input else "*args"
+    # Each call is a separate statement rather than nested in the next, since
+    # the parser limits how deeply calls can be nested.
+    if log_node is None:
+        lines = [f"def evaluate({parameters}):", f"    v = e0({parameters})"]
+        lines.extend(f"    v = e{index}(v)" for index in range(1, len(steps)))
+    else:
+        assert logger is not None
+        lines = _prologue("def", logger, log_node, namespace)
+        lines[0] = f"def evaluate({parameters}):"
+        arguments = "(v0,)" if steps[0].single_input else "args"
+        lines.append(f"    v = e0({parameters})")
+        lines.append(f"    if log: log_node(n0, {arguments}, v)")
+        for index in range(1, len(steps)):
+            lines.append(f"    w = e{index}(v)")
+            lines.append(f"    if log: log_node(n{index}, (v,), w)")
+            lines.append("    v = w")
+        namespace.update((f"n{index}", step.node) for index, step in enumerate(steps))
+    lines.append("    return v")
+    # Fused segments are built for every plan, so their sources are not kept
+    # around for tracebacks.
+    return _build(lines, namespace, register_source=False)
+
+
+def _prologue(
+    keyword: str,
+    logger: logging.Logger,
+    log_node: LogNode,
+    namespace: dict[str, Any],
+) -> list[str]:
+    namespace["is_enabled_for"] = logger.isEnabledFor
+    namespace["INFO"] = logging.INFO
+    namespace["log_node"] = log_node
+    return [
+        f"{keyword} evaluate(v0):",
+        "    log = is_enabled_for(INFO)",
+    ]
+
+
+def _arguments(step: "PlanStep") -> str:
+    return ", ".join(f"v{slot}" for slot in step.input_slots)
+
+
+def _call(
+    index: int, step: "PlanStep", prefix: str, namespace: dict[str, Any]
+) -> list[str]:
+    namespace[f"e{index}"] = step.evaluate
+    namespace[f"n{index}"] = step.node
+    arguments = _arguments(step)
+    output = f"v{step.output_slot}"
+    return [
+        f"    {output} = {prefix}e{index}({arguments})",
+        f"    if log: log_node(n{index}, ({arguments},), {output})",
+    ]
+
+
+def _release(slots: Sequence[int]) -> list[str]:
+    if not slots:
+        return []
+    return [f"    del {', '.join(f'v{slot}' for slot in slots)}"]
+
+
+def _build(
+    lines: list[str], namespace: dict[str, Any], register_source: bool = True
+) -> Callable:
+    source = "\n".join(lines) + "\n"
+    filename = f"<daggery-compiled-{next(_compiled_ids)}>"
+    if register_source:
+        # Registering the source lets tracebacks through generated code show it.
+        linecache.cache[filename] = (
+            len(source),
+            None,
+            source.splitlines(True),
+            filename,
+        )
+    exec(compile(source, filename, "exec"), namespace)
+    # Taking the function out of its own globals leaves no reference cycle, so
+    # it is freed (and its source with it) as soon as it is dropped.
+    function = namespace.pop("evaluate")
+    if register_source:
+        # Every copy or edit of a DAG compiles afresh, so sources would
+        # otherwise pile up in a long-running process.
+        weakref.finalize(function, linecache.cache.pop, filename, None)
+    return function
@@ -1,27 +1,54 @@
 import inspect
-from typing import Any, Optional, Tuple, Union
+from functools import cached_property
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from pydantic import BaseModel
+from typing_extensions import Self
 
+from .codegen import compile_steps
 from .description import DAGDescription
+from .edit import EditableDAG
 from .node import Node
+from .plan import ExecutionPlan
 from .prevalidate import EmptyDAG, InvalidDAG, PrevalidatedDAG
+from .runtime import RuntimeNode
+from .utils.construction import (
+    dag_node_factory,
+    node_factory,
+    trusted_construct,
+)
 from .utils.logging import logger_factory
 
 logger = logger_factory(__name__)
 
 
-class DAGNode(BaseModel, frozen=True):
+class DAGNode(RuntimeNode):
+    __slots__ = ()
+
+    node_class = Node
     naked_node: Node
-    input_nodes: Tuple[str, ...]
 
     def evaluate(self, *args) -> Any:
         return self.naked_node.evaluate(*args)
 
 
-class FunctionDAG(BaseModel, frozen=True):
+class FunctionDAG(BaseModel, EditableDAG, frozen=True):
     nodes: Tuple[DAGNode, ...]
 
+    # Cached attributes derived from the nodes. The plan holds generated
+    # functions, which cannot be pickled, so these are left out of pickles and
+    # rebuilt on first use once unpickled.
+    _derived: ClassVar[Tuple[str, ...]] = ("plan", "_node_index")
+
     # We separate the creation of the DAG from the init method since this allows
     # returning instances of InvalidDAG, making this code exception-free.
     @classmethod
@@ -29,7 +56,14 @@ class FunctionDAG(BaseModel, frozen=True):
         cls,
         prevalidated_dag: PrevalidatedDAG,
         custom_op_node_map: dict[str, type[Node]],
-    ) -> Union["FunctionDAG", InvalidDAG]:
+        trusted: bool = False,
+    ) -> Union[Self, InvalidDAG]:
+        """
+        Builds a DAG from a `PrevalidatedDAG`. With `trusted` set, the nodes and
+        the DAG itself are constructed without running pydantic validation
+        again - the prevalidated DAG has already guaranteed their contents.
+        This is what the other factory methods use once validation succeeds.
+        """
         node_classes = [node.node_class for node in prevalidated_dag.nodes]
         for node_class in node_classes:
             if node_class not in custom_op_node_map.keys():
@@ -38,6 +72,8 @@ class FunctionDAG(BaseModel, frozen=True):
                 )
 
         ordered_nodes: list[DAGNode] = []
+        node_factories: dict[type, Callable[[str, Tuple[str, ...]], Any]] = {}
+        build_dag_node = dag_node_factory(DAGNode, trusted)
 
         # Creating immutable nodes back-to-front guarantees an immutable DAG.
         for prevalidated_node in reversed(prevalidated_dag.nodes):
@@ -45,40 +81,42 @@ class FunctionDAG(BaseModel, frozen=True):
             child_nodes = prevalidated_node.children
 
             node_class_constructor = custom_op_node_map[prevalidated_node.node_class]
-            node = node_class_constructor(name=name, children=child_nodes)
-            if not node.model_config.get("frozen", False):
-                return InvalidDAG(
-                    message=f"Mutable node found in DAG ({node}). This is not supported."
-                )
-            if inspect.iscoroutinefunction(node.evaluate):
-                return InvalidDAG(
-                    message=f"Node {node} evaluate method should not be a coroutine function."
+            build_node = node_factories.get(node_class_constructor)
+            if build_node is None:
+                # Identical nodes are shared between DAGs, not built per DAG.
+                build_node = node_factory(
+                    node_class_constructor, trusted, interned=True
                 )
+            node = build_node(name, child_nodes)
+            # Mutability and the evaluate method are properties of the node
+            # class, so each class only needs checking once.
+            if node_class_constructor not in node_factories:
+                if invalid := cls._check_node(node):
+                    return invalid
+                node_factories[node_class_constructor] = build_node
 
             # We have a special case for the root node, enabling a standard
             # fetching of inputs in the evaluate method.
             input_nodes = tuple(prevalidated_node.input_nodes) or ("__INPUT__",)
-            ordered_nodes.append(
-                DAGNode(
-                    naked_node=node,
-                    input_nodes=input_nodes,
-                )
-            )
+            dag_node = build_dag_node(node, input_nodes)
+            ordered_nodes.append(dag_node)
 
-        return cls(nodes=tuple(reversed(ordered_nodes)))
+        nodes = tuple(reversed(ordered_nodes))
+        return trusted_construct(cls, nodes=nodes) if trusted else cls(nodes=nodes)
 
     @classmethod
     def from_dag_description(
         cls,
         dag_description: DAGDescription,
         custom_op_node_map: dict[str, type[Node]],
-    ) -> Union["FunctionDAG", InvalidDAG]:
+    ) -> Union[Self, InvalidDAG]:
         prevalidated_dag = PrevalidatedDAG.from_dag_description(dag_description)
         if isinstance(prevalidated_dag, InvalidDAG):
             return prevalidated_dag
         return cls.from_prevalidated_dag(
             prevalidated_dag,
             custom_op_node_map,
+            trusted=True,
         )
 
     @classmethod
@@ -86,7 +124,7 @@ class FunctionDAG(BaseModel, frozen=True):
         cls,
         dag_description: DAGDescription,
         custom_op_node_map: dict[str, type[Node]],
-    ) -> Optional["FunctionDAG"]:
+    ) -> Optional[Self]:
         dag = cls.from_dag_description(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             return None
@@ -97,7 +135,7 @@ class FunctionDAG(BaseModel, frozen=True):
         cls,
         dag_description: DAGDescription,
         custom_op_node_map: dict[str, type[Node]],
-    ) -> "FunctionDAG":
+    ) -> Self:
         dag = cls.from_dag_description(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             raise ValueError(dag.message)
@@ -106,16 +144,18 @@ class FunctionDAG(BaseModel, frozen=True):
     @classmethod
     def from_string(
         cls, dag_description: str, custom_op_node_map: dict[str, type[Node]]
-    ) -> Union["FunctionDAG", InvalidDAG]:
+    ) -> Union[Self, InvalidDAG]:
         prevalidated_dag = PrevalidatedDAG.from_string(dag_description)
         if isinstance(prevalidated_dag, EmptyDAG):
             return InvalidDAG(message=prevalidated_dag.message)
-        return cls.from_prevalidated_dag(prevalidated_dag, custom_op_node_map)
+        return cls.from_prevalidated_dag(
+            prevalidated_dag, custom_op_node_map, trusted=True
+        )
 
     @classmethod
     def nullable_from_string(
         cls, dag_description: str, custom_op_node_map: dict[str, type[Node]]
-    ) -> Optional["FunctionDAG"]:
+    ) -> Optional[Self]:
         dag = cls.from_string(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             return None
@@ -124,26 +164,94 @@ class FunctionDAG(BaseModel, frozen=True):
     @classmethod
     def throwable_from_string(
         cls, dag_description: str, custom_op_node_map: dict[str, type[Node]]
-    ) -> "FunctionDAG":
+    ) -> Self:
         dag = cls.from_string(dag_description, custom_op_node_map)
         if isinstance(dag, InvalidDAG):
             raise ValueError(dag.message)
         return dag
 
+    @classmethod
+    def _check_node(cls, node: Any) -> Optional[InvalidDAG]:
+        if not isinstance(node, Node):
+            return InvalidDAG(message=f"Node {node} is not a Node.")
+        if not node.model_config.get("frozen", False):
+            return InvalidDAG(
+                message=f"Mutable node found in DAG ({node}). This is not supported."
+            )
+        if inspect.iscoroutinefunction(node.evaluate):
+            return InvalidDAG(
+                message=f"Node {node} evaluate method should not be a coroutine function."
+            )
+        return None
+
+    def __getstate__(self) -> dict[Any, Any]:
+        state = super().__getstate__()
+        state["__dict__"] = {
+            name: value
+            for name, value in state["__dict__"].items()
+            if name not in self._derived
+        }
+        return state
+
+    def _ordered_nodes(self) -> Tuple[DAGNode, ...]:
+        return self.nodes
+
+    def _from_ordered_nodes(self, nodes: Tuple[DAGNode, ...]) -> Self:
+        return trusted_construct(type(self), nodes=nodes)
+
+    @classmethod
+    def _dag_node(cls, naked_node: Node, input_nodes: Tuple[str, ...]) -> DAGNode:
+        return DAGNode.trusted(naked_node, input_nodes)
+
+    @cached_property
+    def plan(self) -> ExecutionPlan:
+        # The plan is derived from the (immutable) nodes, so it is built once,
+        # on first use, and reused by every subsequent evaluation.
+        return ExecutionPlan.from_nodes(
+            self.nodes, logger=logger, log_node=self._pretty_log_node
+        )
+
     def evaluate(self, value: Any) -> Any:
-        context = {"__INPUT__": value}
         # The nodes are topologically sorted. As it turns out, this is also
         # a valid order of evaluation - by the time a node is reached, all
         # of its parents will already have been evaluated.
-        for node in self.nodes:
-            input_values = tuple(context[node_name] for node_name in node.input_nodes)
-            node_output_value = node.evaluate(*input_values)
-            self._pretty_log_node(node, input_values, node_output_value)
-            context[node.naked_node.name] = node_output_value
-        return node_output_value
+        plan = self.plan
+        return plan.run(plan.new_slots(value))
+
+    def evaluate_many(
+        self, inputs: Iterable[Any], max_concurrency: int = 1, ordered: bool = True
+    ) -> Iterator[Any]:
+        """
+        Evaluates the DAG for each of `inputs`, yielding the outputs in the
+        same order. Inputs are only taken as they are needed, so this suits
+        long (or endless) streams of them. The per-evaluation setup of
+        `evaluate` is done once for all of the inputs.
+
+        With `ordered` unset, `(index, output)` pairs are yielded instead, as
+        by `AsyncFunctionDAG.evaluate_many`. Inputs are evaluated one at a
+        time here, so they also finish in order, and `max_concurrency` (which
+        must be at least 1) only takes effect for DAGs evaluating inputs in
+        parallel, such as `ThreadedFunctionDAG`.
+        """
+        if max_concurrency < 1:
+            raise ValueError("evaluate_many max_concurrency must be >= 1")
+        plan = self.plan
+        for index, value in enumerate(inputs):
+            output_value = plan.run(plan.new_slots(value))
+            yield output_value if ordered else (index, output_value)
+
+    def compile(self) -> Callable[[Any], Any]:
+        """
+        Generates a Python function equivalent to `evaluate`, but with the
+        interpreter loop unrolled: each node's output is held in a local
+        variable and each node's `evaluate` is called directly. This is worth
+        doing for DAGs that are evaluated many times - hold on to the result
+        rather than compiling per evaluation.
+        """
+        return compile_steps(self.plan.steps, logger, self._pretty_log_node)
 
+    @staticmethod
     def _pretty_log_node(
-        self,
         node: DAGNode,
         input_values: tuple[Any, ...],
         output_value: Any,
@@ -1,7 +1,11 @@
-from typing import Tuple
+from collections import defaultdict
+from functools import cached_property
+from typing import Any, Mapping, Optional, Tuple
 
 from pydantic import BaseModel, model_validator
 
+from .utils.fingerprint import structural_fingerprint
+
 
 class Operation(BaseModel, frozen=True):
     # A descriptive name for this specific operation. It must be unique.
@@ -10,6 +14,10 @@ class Operation(BaseModel, frozen=True):
     op_name: str
     # The names of dependent operations.
     children: Tuple[str, ...] = ()
+    # The block this operation is evaluated in, if any. Operations sharing a
+    # block are evaluated together on a worker process by a
+    # `ProcessFunctionDAG`, and are ignored by other DAGs.
+    block: Optional[str] = None
 
     @model_validator(mode="after")
     def name_and_op_name_not_empty(self):
@@ -17,6 +25,8 @@ class Operation(BaseModel, frozen=True):
             raise ValueError("An Operation must have a name")
         if self.op_name == "":
             raise ValueError("An Operation must have an op_name")
+        if self.block == "":
+            raise ValueError("An Operation block must not be empty")
         return self
 
     @model_validator(mode="after")
@@ -66,7 +76,7 @@ class OperationSequence(BaseModel, frozen=True):
         return self
 
 
-class DAGDescription(BaseModel):
+class DAGDescription(BaseModel, frozen=True):
     operations: OperationSequence
     argument_mappings: Tuple[ArgumentMapping, ...] = ()
 
@@ -92,3 +102,44 @@ class DAGDescription(BaseModel):
                 f"{self.argument_mappings}"
             )
         return self
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hex digest identifying the graph this describes. It does not
+        depend on the order of operations, children or argument mappings, and
+        (unless it assigns blocks) matches the fingerprint of the
+        `PrevalidatedDAG` built from this description. It is computed once per
+        instance.
+        """
+        return self._fingerprint
+
+    @cached_property
+    def _fingerprint(self) -> str:
+        argument_mappings = {
+            mapping.op_name: mapping.inputs for mapping in self.argument_mappings
+        }
+        parents: dict[str, list[str]] = defaultdict(list)
+        for op in self.operations.ops:
+            for child in op.children:
+                parents[child].append(op.name)
+        records = []
+        for op in self.operations.ops:
+            if op.name in argument_mappings:
+                inputs = argument_mappings[op.name]
+            else:
+                # Unmapped operations take their (single) parent as input, as
+                # when the description is validated.
+                inputs = tuple(sorted(parents[op.name]))
+            # Blocks change how a DAG is evaluated, so descriptions differing
+            # only in their blocks must not share a fingerprint.
+            op_name = op.op_name if op.block is None else f"{op.op_name}@{op.block}"
+            records.append((op.name, op_name, op.children, inputs))
+        return structural_fingerprint(records)
+
+    def model_copy(
+        self, *, update: Optional[Mapping[str, Any]] = None, deep: bool = False
+    ) -> "DAGDescription":
+        copy = super().model_copy(update=update, deep=deep)
+        # The fingerprint of the original does not carry over to an update.
+        copy.__dict__.pop("_fingerprint", None)
+        return copy
@@ -0,0 +1,249 @@
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any, Optional, Tuple, TypeVar, Union
+
+from .plan import INPUT_NAME
+from .prevalidate import InvalidDAG
+
+EditableDAGT = TypeVar("EditableDAGT", bound="EditableDAG")
+
+
+class EditableDAG(ABC):
+    """
+    Edits of a DAG that has already been built.
+
+    Each edit returns a new DAG (or an `InvalidDAG`), leaving the original
+    untouched. Only the nodes around the edit are validated and rebuilt - every
+    other node instance is shared with the original DAG - so editing a large
+    DAG is far cheaper than validating and building it again.
+
+    DAGs using this provide their nodes as a flat, topologically sorted tuple
+    through `_ordered_nodes`, and are built back from one by `_from_ordered_nodes`.
+    """
+
+    @abstractmethod
+    def _ordered_nodes(self) -> Tuple[Any, ...]:
+        """Returns the DAG's nodes, topologically sorted."""
+
+    @abstractmethod
+    def _from_ordered_nodes(self, nodes: Tuple[Any, ...]) -> Any:
+        """Builds a DAG like this one from topologically sorted nodes."""
+
+    @classmethod
+    @abstractmethod
+    def _dag_node(cls, naked_node: Any, input_nodes: Tuple[str, ...]) -> Any:
+        """Wraps a node of the DAG's kind with its inputs, unvalidated."""
+
+    @classmethod
+    @abstractmethod
+    def _check_node(cls, naked_node: Any) -> Optional[InvalidDAG]:
+        """Returns why a node cannot be part of the DAG, if it cannot."""
+
+    @cached_property
+    def _node_index(self) -> dict[str, int]:
+        return {
+            node.naked_node.name: index
+            for index, node in enumerate(self._ordered_nodes())
+        }
+
+    def replace_node(
+        self: EditableDAGT, name: str, node_class: type
+    ) -> Union[EditableDAGT, InvalidDAG]:
+        """
+        Replaces the node called `name` with an instance of `node_class`,
+        keeping its name, children and inputs.
+        """
+        index = self._node_index.get(name)
+        if index is None:
+            return InvalidDAG(message=f"Node {name} not found in DAG")
+        nodes = self._ordered_nodes()
+        old_node = nodes[index]
+        naked_node = node_class(name=name, children=old_node.naked_node.children)
+        if invalid := self._check_node(naked_node):
+            return invalid
+        new_node = self._dag_node(naked_node, old_node.input_nodes)
+        dag = self._from_ordered_nodes((*nodes[:index], new_node, *nodes[index + 1 :]))
+        # Names and positions are unchanged, so the index carries over.
+        dag.__dict__["_node_index"] = self._node_index
+        return dag
+
+    def insert_node(
+        self: EditableDAGT,
+        name: str,
+        node_class: type,
+        inputs: Tuple[str, ...],
+        children: Tuple[str, ...] = (),
+    ) -> Union[EditableDAGT, InvalidDAG]:
+        """
+        Inserts a node called `name`, taking `inputs` (in argument order) and
+        feeding `children`. The new node is appended to the inputs of each of
+        its children - use `rewire` to change their argument order. With no
+        children, the new node must take the current tail as an input, and
+        becomes the new tail.
+        """
+        node_index = self._node_index
+        nodes = self._ordered_nodes()
+        if name in node_index or name == INPUT_NAME:
+            return InvalidDAG(message=f"Node {name} already exists in DAG")
+        if not inputs:
+            return InvalidDAG(message=f"Node {name} must have at least one input")
+        if len(set(inputs)) != len(inputs) or len(set(children)) != len(children):
+            return InvalidDAG(
+                message=f"Node {name} has duplicate inputs or children: "
+                f"{inputs=}, {children=}"
+            )
+        missing = [n for n in (*inputs, *children) if n not in node_index]
+        if missing:
+            return InvalidDAG(message=f"Nodes {missing} not found in DAG")
+        tail_name = nodes[-1].naked_node.name
+        if not children and tail_name not in inputs:
+            return InvalidDAG(
+                message=f"Node {name} has no children, so would be a second tail"
+            )
+        # The new node goes straight after its last input, which must come
+        # before all of its children to keep the nodes topologically sorted.
+        position = max(node_index[n] for n in inputs) + 1
+        if children and min(node_index[n] for n in children) < position:
+            return InvalidDAG(
+                message=f"Node {name} must come after all of {inputs} and before "
+                f"all of {children}"
+            )
+
+        naked_node = node_class(name=name, children=children)
+        if invalid := self._check_node(naked_node):
+            return invalid
+
+        new_nodes = list(nodes)
+        for parent_name in inputs:
+            parent = nodes[node_index[parent_name]]
+            new_nodes[node_index[parent_name]] = self._with_children(
+                parent, (*parent.naked_node.children, name)
+            )
+        for child_name in children:
+            child = nodes[node_index[child_name]]
+            new_nodes[node_index[child_name]] = self._dag_node(
+                child.naked_node, (*child.input_nodes, name)
+            )
+        new_nodes.insert(position, self._dag_node(naked_node, inputs))
+        return self._from_ordered_nodes(tuple(new_nodes))
+
+    def remove_node(self: EditableDAGT, name: str) -> Union[EditableDAGT, InvalidDAG]:
+        """
+        Removes the node called `name`, which must have a single input (or be
+        the head, with a single child). Its children take its input in its
+        place, and its parent takes on its children.
+        """
+        index = self._node_index.get(name)
+        if index is None:
+            return InvalidDAG(message=f"Node {name} not found in DAG")
+        nodes = self._ordered_nodes()
+        if len(nodes) == 1:
+            return InvalidDAG(message=f"Cannot remove {name}, the only node in DAG")
+        node = nodes[index]
+        children = node.naked_node.children
+        new_nodes = list(nodes)
+
+        if node.input_nodes == (INPUT_NAME,):
+            # Removing the head means its (single) child becomes the head.
+            child_index = self._node_index[children[0]]
+            child = nodes[child_index]
+            if len(children) != 1 or child.input_nodes != (name,):
+                return InvalidDAG(
+                    message=f"Cannot remove head {name}, as its removal would "
+                    "leave more than one head"
+                )
+            new_nodes[child_index] = self._dag_node(child.naked_node, (INPUT_NAME,))
+            del new_nodes[index]
+            return self._from_ordered_nodes(tuple(new_nodes))
+
+        if len(node.input_nodes) != 1:
+            return InvalidDAG(
+                message=f"Cannot remove {name}, as it has more than one input"
+            )
+        (parent_name,) = node.input_nodes
+        parent_index = self._node_index[parent_name]
+        parent = nodes[parent_index]
+        parent_children = parent.naked_node.children
+        if set(parent_children) & set(children):
+            return InvalidDAG(
+                message=f"Cannot remove {name}, as its children would then take "
+                f"{parent_name} as an input twice"
+            )
+        # The parent's children keep their order, with the removed node's
+        # children taking its place.
+        spliced_children = []
+        for child_name in parent_children:
+            if child_name == name:
+                spliced_children.extend(children)
+            else:
+                spliced_children.append(child_name)
+        new_nodes[parent_index] = self._with_children(parent, tuple(spliced_children))
+        for child_name in children:
+            child_index = self._node_index[child_name]
+            child = nodes[child_index]
+            child_inputs = tuple(
+                parent_name if input_name == name else input_name
+                for input_name in child.input_nodes
+            )
+            new_nodes[child_index] = self._dag_node(child.naked_node, child_inputs)
+        del new_nodes[index]
+        return self._from_ordered_nodes(tuple(new_nodes))
+
+    def rewire(
+        self: EditableDAGT, name: str, inputs: Tuple[str, ...]
+    ) -> Union[EditableDAGT, InvalidDAG]:
+        """
+        Sets the inputs (i.e. the argument mapping) of the node called `name`,
+        updating the children of any parents added or removed.
+        """
+        node_index = self._node_index
+        index = node_index.get(name)
+        if index is None:
+            return InvalidDAG(message=f"Node {name} not found in DAG")
+        nodes = self._ordered_nodes()
+        node = nodes[index]
+        if node.input_nodes == (INPUT_NAME,):
+            return InvalidDAG(message=f"Cannot rewire head {name}")
+        if not inputs or len(set(inputs)) != len(inputs):
+            return InvalidDAG(
+                message=f"Node {name} must have unique, non-empty inputs: {inputs=}"
+            )
+        missing = [n for n in inputs if n not in node_index]
+        if missing:
+            return InvalidDAG(message=f"Nodes {missing} not found in DAG")
+        # Inputs must come earlier, otherwise the graph would no longer be
+        # sorted (or could contain a cycle).
+        if any(node_index[n] >= index for n in inputs):
+            return InvalidDAG(
+                message=f"Inputs of {name} must all come before it: {inputs=}"
+            )
+
+        new_nodes = list(nodes)
+        old_inputs = set(node.input_nodes)
+        for parent_name in old_inputs.difference(inputs):
+            parent = nodes[node_index[parent_name]]
+            parent_children = tuple(n for n in parent.naked_node.children if n != name)
+            if not parent_children:
+                return InvalidDAG(
+                    message=f"Removing {parent_name} from the inputs of {name} "
+                    "would leave it as a second tail"
+                )
+            new_nodes[node_index[parent_name]] = self._with_children(
+                parent, parent_children
+            )
+        for parent_name in inputs:
+            if parent_name not in old_inputs:
+                parent = nodes[node_index[parent_name]]
+                new_nodes[node_index[parent_name]] = self._with_children(
+                    parent, (*parent.naked_node.children, name)
+                )
+        new_nodes[index] = self._dag_node(node.naked_node, inputs)
+        dag = self._from_ordered_nodes(tuple(new_nodes))
+        dag.__dict__["_node_index"] = node_index
+        return dag
+
+    @classmethod
+    def _with_children(cls, dag_node: Any, children: Tuple[str, ...]) -> Any:
+        # Copying keeps any other fields of the node as they are.
+        naked_node = dag_node.naked_node.model_copy(update={"children": children})
+        return cls._dag_node(naked_node, dag_node.input_nodes)
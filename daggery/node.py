@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import ClassVar, Tuple
 
 from pydantic import BaseModel
 
@@ -8,6 +8,11 @@ class Node(BaseModel, ABC, frozen=True):
     name: str
     children: Tuple[str, ...] = ()
 
+    # In an `AsyncFunctionDAG`, nodes are evaluated on a thread pool so as not
+    # to block the event loop. Trivially cheap nodes can set this to instead be
+    # evaluated on the event loop directly, saving the trip to a thread.
+    run_inline: ClassVar[bool] = False
+
     @abstractmethod
     def evaluate(self, *args):
         """Abstract method that should never be called."""
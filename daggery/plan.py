@@ -0,0 +1,306 @@
+import logging
+from operator import itemgetter
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Tuple
+
+from .codegen import LogNode, compose_steps
+
+# The name under which a DAG's input value is made available to its head.
+INPUT_NAME = "__INPUT__"
+
+
+class PlanStep(NamedTuple):
+    # The DAG node this step evaluates, kept for logging.
+    node: Any
+    # Evaluates the node, usually the bound `evaluate` method of the underlying
+    # node.
+    evaluate: Callable[..., Any]
+    # The slots holding this node's inputs, in argument order.
+    input_slots: Tuple[int, ...]
+    # The slot this node's output is written to.
+    output_slot: int
+    # Fetches the input values from the slots. For a single input this returns
+    # the value itself, otherwise a tuple of values.
+    get_inputs: Callable[[Sequence[Any]], Any]
+    # Whether this node takes exactly one input.
+    single_input: bool
+    # The slots that are no longer needed once this step has been evaluated,
+    # i.e. those for which this step is the last consumer.
+    release_slots: Tuple[int, ...]
+
+
+class Segment(NamedTuple):
+    # The steps fused into this segment, in order of evaluation. Each step
+    # after the first is the only consumer of the step before it.
+    steps: Tuple[PlanStep, ...]
+    # Evaluates every step in turn, taking the inputs of the first step.
+    evaluate: Callable[..., Any]
+    # The remaining fields are as for a `PlanStep`, where inputs are those of
+    # the first step and the output is that of the last.
+    input_slots: Tuple[int, ...]
+    output_slot: int
+    get_inputs: Callable[[Sequence[Any]], Any]
+    single_input: bool
+    release_slots: Tuple[int, ...]
+
+
+class Batch(NamedTuple):
+    # Steps that are independent of each other, so can be evaluated together.
+    steps: Tuple[PlanStep, ...]
+    # The slots that are no longer needed once the whole batch is evaluated.
+    release_slots: Tuple[int, ...]
+
+
+class Dependencies(NamedTuple):
+    # The indices of the steps reading each step's output.
+    consumers: Tuple[Tuple[int, ...], ...]
+    # The number of steps each step reads the output of.
+    num_dependencies: Tuple[int, ...]
+    # The number of steps reading each slot.
+    slot_uses: Tuple[int, ...]
+
+
+def _naked_evaluate(node: Any) -> Callable[..., Any]:
+    return node.naked_node.evaluate
+
+
+class ExecutionPlan:
+    """
+    A compiled form of a topologically sorted sequence of DAG nodes.
+
+    Every value produced during evaluation (the DAG input, then each node's
+    output) is assigned an integer slot. Node names are resolved to slots once,
+    when the plan is built, so evaluation only has to index into a
+    preallocated list rather than look names up in a dict.
+
+    Linear runs of steps (where each step is the only consumer of the one
+    before it) are also fused into `segments`, each evaluated with a single
+    call. Fused segments log each of their nodes with `log_node`, if given,
+    whenever `logger` is enabled for INFO. The individual `steps` are kept
+    for evaluating nodes in other orders.
+
+    Each step, segment and batch also records which slots it is the last
+    consumer of, so that evaluation can drop intermediate values as soon as
+    they are no longer needed instead of holding every one until the end.
+    """
+
+    __slots__ = (
+        "_dependencies",
+        "_log_node",
+        "_logger",
+        "batches",
+        "num_slots",
+        "segments",
+        "slots_by_name",
+        "steps",
+    )
+
+    def __init__(
+        self,
+        steps: Tuple[PlanStep, ...],
+        slots_by_name: dict[str, int],
+        batch_sizes: Optional[Sequence[int]] = None,
+        logger: Optional[logging.Logger] = None,
+        log_node: Optional[LogNode] = None,
+    ):
+        self.steps = steps
+        self.slots_by_name = slots_by_name
+        self.num_slots = len(slots_by_name)
+        self.segments = self._fuse(steps, logger, log_node)
+        self.batches = self._batch(steps, batch_sizes or ())
+        self._dependencies: Optional[Dependencies] = None
+        self._logger = logger
+        self._log_node = log_node
+
+    @classmethod
+    def from_nodes(
+        cls,
+        nodes: Sequence[Any],
+        batch_sizes: Optional[Sequence[int]] = None,
+        evaluate_of: Callable[[Any], Callable[..., Any]] = _naked_evaluate,
+        inputs: Sequence[str] = (INPUT_NAME,),
+        logger: Optional[logging.Logger] = None,
+        log_node: Optional[LogNode] = None,
+    ) -> "ExecutionPlan":
+        """
+        Builds a plan from DAG nodes (anything with a `naked_node` and
+        `input_nodes`, such as a `DAGNode`) in a valid order of evaluation.
+        If `batch_sizes` is given, the steps are also grouped into `batches`
+        of those sizes, in order. Each step evaluates `evaluate_of(node)`,
+        which is the underlying node's `evaluate` method unless given.
+
+        The plan is given the values named by `inputs`, in the first slots.
+        This is just the DAG input unless the nodes are part of a larger DAG.
+        `logger` and `log_node` are for logging fused segments, as above.
+        """
+        slots_by_name = {name: slot for slot, name in enumerate(inputs)}
+        all_input_slots = []
+        for node in nodes:
+            all_input_slots.append(
+                tuple(slots_by_name[name] for name in node.input_nodes)
+            )
+            slots_by_name[node.naked_node.name] = len(slots_by_name)
+
+        all_release_slots = _release_slots([(slots,) for slots in all_input_slots])
+        steps = []
+        for index, node in enumerate(nodes):
+            input_slots = all_input_slots[index]
+            steps.append(
+                PlanStep(
+                    node=node,
+                    evaluate=evaluate_of(node),
+                    input_slots=input_slots,
+                    # The first slots are reserved for the inputs.
+                    output_slot=index + len(inputs),
+                    get_inputs=itemgetter(*input_slots),
+                    single_input=len(input_slots) == 1,
+                    release_slots=all_release_slots[index],
+                )
+            )
+        return cls(tuple(steps), slots_by_name, batch_sizes, logger, log_node)
+
+    @staticmethod
+    def _fuse(
+        steps: Tuple[PlanStep, ...],
+        logger: Optional[logging.Logger],
+        log_node: Optional[LogNode],
+    ) -> Tuple[Segment, ...]:
+        consumers: dict[int, int] = {}
+        for step in steps:
+            for slot in step.input_slots:
+                consumers[slot] = consumers.get(slot, 0) + 1
+
+        # A step can be fused onto the end of the run producing its only input
+        # if it is that input's only consumer. Since it depends on nothing
+        # else, it can be evaluated straight after, wherever it is ordered.
+        runs: list[list[PlanStep]] = []
+        runs_by_output_slot: dict[int, list[PlanStep]] = {}
+        for step in steps:
+            run = None
+            if step.single_input and consumers[step.input_slots[0]] == 1:
+                run = runs_by_output_slot.get(step.input_slots[0])
+            if run is None:
+                run = []
+                runs.append(run)
+            run.append(step)
+            runs_by_output_slot[step.output_slot] = run
+
+        # Only the first step of a segment reads slots written outside of it,
+        # so the slots it releases are worked out in terms of the segments.
+        all_release_slots = _release_slots([(run[0].input_slots,) for run in runs])
+        segments = []
+        for run, release_slots in zip(runs, all_release_slots):
+            first, last = run[0], run[-1]
+            if len(run) == 1:
+                evaluate = first.evaluate
+            else:
+                evaluate = compose_steps(run, logger, log_node)
+            segments.append(
+                Segment(
+                    steps=tuple(run),
+                    evaluate=evaluate,
+                    input_slots=first.input_slots,
+                    output_slot=last.output_slot,
+                    get_inputs=first.get_inputs,
+                    single_input=first.single_input,
+                    release_slots=release_slots,
+                )
+            )
+        return tuple(segments)
+
+    @staticmethod
+    def _batch(
+        steps: Tuple[PlanStep, ...], batch_sizes: Sequence[int]
+    ) -> Tuple[Batch, ...]:
+        groups = []
+        start = 0
+        for size in batch_sizes:
+            groups.append(steps[start : start + size])
+            start += size
+        all_release_slots = _release_slots(
+            [[step.input_slots for step in group] for group in groups]
+        )
+        return tuple(
+            Batch(steps=group, release_slots=release_slots)
+            for group, release_slots in zip(groups, all_release_slots)
+        )
+
+    @property
+    def dependencies(self) -> Dependencies:
+        """
+        How the steps depend on each other, for evaluating each step as soon
+        as its inputs are ready rather than in a fixed order. This is worked
+        out on first use.
+        """
+        if self._dependencies is None:
+            step_indices = {step.output_slot: i for i, step in enumerate(self.steps)}
+            consumers: list[list[int]] = [[] for _ in self.steps]
+            slot_uses = [0] * self.num_slots
+            for index, step in enumerate(self.steps):
+                for slot in step.input_slots:
+                    slot_uses[slot] += 1
+                    if slot in step_indices:
+                        consumers[step_indices[slot]].append(index)
+            num_dependencies = [0] * len(self.steps)
+            for step_consumers in consumers:
+                for index in step_consumers:
+                    num_dependencies[index] += 1
+            self._dependencies = Dependencies(
+                consumers=tuple(map(tuple, consumers)),
+                num_dependencies=tuple(num_dependencies),
+                slot_uses=tuple(slot_uses),
+            )
+        return self._dependencies
+
+    def new_slots(self, value: Any) -> list[Any]:
+        slots: list[Any] = [None] * self.num_slots
+        slots[0] = value
+        return slots
+
+    def run(self, slots: list[Any]) -> Any:
+        """
+        Evaluates the segments in order, given `slots` holding the plan's
+        inputs, and returns the output of the last. The segment holding the
+        tail is always last, since every other node has to reach the tail
+        through that segment's first node.
+
+        Once a slot's last consumer has been evaluated, the slot is cleared so
+        that large intermediate values can be freed as early as possible.
+        Nodes are logged as described above.
+        """
+        logger, log_node = self._logger, self._log_node
+        # Checking this once per run avoids formatting log lines (with
+        # potentially large values) that would then be discarded. Fused
+        # segments log their own nodes.
+        if logger is None or not logger.isEnabledFor(logging.INFO):
+            log_node = None
+        for segment in self.segments:
+            steps, evaluate, _, output_slot, get_inputs, single_input, release = segment
+            inputs = get_inputs(slots)
+            if single_input:
+                output_value = evaluate(inputs)
+                if log_node is not None and len(steps) == 1:
+                    log_node(steps[0].node, (inputs,), output_value)
+            else:
+                output_value = evaluate(*inputs)
+                if log_node is not None and len(steps) == 1:
+                    log_node(steps[0].node, inputs, output_value)
+            slots[output_slot] = output_value
+            for slot in release:
+                slots[slot] = None
+        return output_value
+
+
+def _release_slots(
+    groups: Sequence[Sequence[Tuple[int, ...]]],
+) -> list[Tuple[int, ...]]:
+    # Given the input slots read by each group of steps, in order of
+    # evaluation, finds the slots each group is the last to read.
+    last_groups: dict[int, int] = {}
+    for index, group in enumerate(groups):
+        for input_slots in group:
+            for slot in input_slots:
+                last_groups[slot] = index
+    release_slots: list[list[int]] = [[] for _ in groups]
+    for slot, index in last_groups.items():
+        release_slots[index].append(slot)
+    return [tuple(sorted(slots)) for slots in release_slots]
@@ -1,9 +1,12 @@
 from collections import defaultdict
-from typing import Tuple, Union
+from functools import cached_property
+from typing import Any, Mapping, Optional, Tuple, Union
 
 from pydantic import BaseModel, model_validator
 
 from .description import DAGDescription
+from .utils.construction import unvalidated_construct
+from .utils.fingerprint import structural_fingerprint
 from .utils.logging import logger_factory
 
 logger = logger_factory(__name__)
@@ -17,7 +20,7 @@ class InvalidDAG(BaseModel):
     message: str
 
 
-class PrevalidatedNode(BaseModel):
+class PrevalidatedNode(BaseModel, frozen=True):
     # A descriptive name for this specific node. It must be unique.
     name: str
     # The classname of the underlying node to evaluate.
@@ -44,7 +47,7 @@ class PrevalidatedNode(BaseModel):
         return self
 
 
-class PrevalidatedDAG(BaseModel):
+class PrevalidatedDAG(BaseModel, frozen=True):
     """
     This represents an pre-validated DAG. It guarantees the following on
     construction:
@@ -64,6 +67,30 @@ class PrevalidatedDAG(BaseModel):
             raise ValueError("PrevalidatedDAG must contain at least one node")
         return self
 
+    def fingerprint(self) -> str:
+        """
+        Returns a hex digest identifying this graph, independent of the order
+        of its nodes and of their children. It matches the fingerprint of the
+        `DAGDescription` this was built from, if any, and is computed once per
+        instance.
+        """
+        return self._fingerprint
+
+    @cached_property
+    def _fingerprint(self) -> str:
+        return structural_fingerprint(
+            (node.name, node.node_class, node.children, node.input_nodes)
+            for node in self.nodes
+        )
+
+    def model_copy(
+        self, *, update: Optional[Mapping[str, Any]] = None, deep: bool = False
+    ) -> "PrevalidatedDAG":
+        copy = super().model_copy(update=update, deep=deep)
+        # The fingerprint of the original does not carry over to an update.
+        copy.__dict__.pop("_fingerprint", None)
+        return copy
+
     @classmethod
     def from_string(cls, dag_description: str) -> Union["PrevalidatedDAG", EmptyDAG]:
         dag_description = dag_description.strip()
@@ -107,40 +134,49 @@ class PrevalidatedDAG(BaseModel):
     def from_dag_description(
         cls, dag_description: DAGDescription
     ) -> Union["PrevalidatedDAG", InvalidDAG]:
+        # Validation is a single pass over the operations, touching each
+        # operation and each edge a bounded number of times. Every lookup below
+        # goes through a dict or set keyed by name, never a scan of prior nodes,
+        # so validation stays linear in the size of the graph.
         argument_mappings = {
-            mapping.op_name: {"inputs": mapping.inputs}
+            mapping.op_name: mapping.inputs
             for mapping in dag_description.argument_mappings
         }
         nodes: list[PrevalidatedNode] = []
         seen_names: set[str] = set()
         parents_of_nodes: dict[str, list[str]] = defaultdict(list)
         for op in dag_description.operations.ops:
-            mapping_available = op.name in argument_mappings.keys()
-            op_node_mappings: dict = {}
-            if mapping_available:
+            inputs: Tuple[str, ...]
+            if op.name in argument_mappings:
                 # Non-root case, assumed to have >1 inputs.
-                op_node_mappings = argument_mappings[op.name]
+                inputs = argument_mappings[op.name]
+            elif not nodes:
+                # This must be the root.
+                inputs = ()
+            elif op.name not in parents_of_nodes:
+                return InvalidDAG(
+                    message=(
+                        f"Input has >1 root node: {op.name} has no "
+                        f"parents in {dag_description}"
+                    )
+                )
             else:
-                if parents_of_nodes == {}:
-                    # This must be the root.
-                    op_node_mappings = {"inputs": ()}
-                else:
-                    # Non-root case with no mapping - assumed to be unambiguous,
-                    # meaning exactly one input.
-                    if op.name not in parents_of_nodes.keys():
-                        return InvalidDAG(
-                            message=(
-                                f"Input has >1 root node: {op.name} has no "
-                                f"parents in {dag_description}"
-                            )
-                        )
-                    node_input = parents_of_nodes[op.name][0]
-                    op_node_mappings = {"inputs": (node_input,)}
-            node = PrevalidatedNode(
+                # Non-root case with no mapping - assumed to be unambiguous,
+                # meaning exactly one input.
+                inputs = (parents_of_nodes[op.name][0],)
+            input_names = set(inputs)
+            if len(input_names) != len(inputs):
+                return InvalidDAG(
+                    message=f"Input has duplicate inputs: {op.name} has {inputs=}"
+                )
+            # The operation has already validated its name, op_name and children,
+            # and the inputs were checked above, so the node is built directly.
+            node = unvalidated_construct(
+                PrevalidatedNode,
                 name=op.name,
                 node_class=op.op_name,
                 children=op.children,
-                input_nodes=op_node_mappings["inputs"],
+                input_nodes=inputs,
             )
             seen_names.add(node.name)
             for child in node.children:
@@ -153,24 +189,23 @@ class PrevalidatedDAG(BaseModel):
                 return InvalidDAG(
                     message=f"Input is not topologically sorted: {node} references {seen_names}"
                 )
-            # Check that mappings align with the relationships.
-            parents = [n for n in nodes if n.name in op_node_mappings["inputs"]]
-            correct_relationships = all(
-                node.name in parent.children for parent in parents
-            )
-            correct_inputs = set(parents_of_nodes[node.name]) == set(
-                op_node_mappings["inputs"]
-            )
-            if not correct_relationships or not correct_inputs:
+            # Check that mappings align with the relationships. A node's parents
+            # are exactly the previously seen nodes naming it as a child, so
+            # comparing them against the mapped inputs also guarantees every
+            # input lists this node as one of its children.
+            parent_names = parents_of_nodes.get(node.name, [])
+            if set(parent_names) != input_names:
+                parents = [n for n in nodes if n.name in parent_names]
                 return InvalidDAG(
                     message=(
                         f"Input has invalid mappings: {node} has {parents=} "
-                        f"but has these mappings: {op_node_mappings}"
+                        f"but has these mappings: {{'inputs': {inputs}}}"
                     )
                 )
             nodes.append(node)
         # Ensure there is one tail.
-        tails = list(filter(lambda n: n.children == (), nodes))
+        tails = [n for n in nodes if n.children == ()]
         if len(tails) != 1:
             return InvalidDAG(message=f"Input has {len(tails)} tails: {tails}")
-        return cls(nodes=tuple(nodes))
+        # An OperationSequence cannot be empty, so neither can this DAG.
+        return unvalidated_construct(cls, nodes=tuple(nodes))
@@ -0,0 +1,421 @@
+import os
+import threading
+from concurrent.futures import Future
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from typing_extensions import Self
+
+from .dag import DAGNode, logger
+from .description import DAGDescription
+from .node import Node
+from .plan import ExecutionPlan
+from .prevalidate import InvalidDAG
+from .threaded_dag import ThreadedFunctionDAG
+
+if TYPE_CHECKING:
+    # Only imported for annotations - `multiprocessing` is loaded on first use,
+    # keeping `import daggery` cheap.
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.context import BaseContext
+
+    from .transport import SharedMemoryTransport
+
+_pool_lock = threading.Lock()
+
+
+class Block(NamedTuple):
+    # The name of the block, as given to its operations.
+    name: str
+    # The block's nodes, in order of evaluation. Only the output of the last
+    # is read from outside of the block.
+    nodes: Tuple[DAGNode, ...]
+    # The names of the values the block reads from outside of it, in the order
+    # they are sent to a worker.
+    inputs: Tuple[str, ...]
+
+
+# The plans of the blocks evaluated by this process, if it is a worker, by name.
+_worker_plans: dict[str, ExecutionPlan] = {}
+# How block inputs and outputs are sent, if not simply pickled.
+_worker_transport: list[Optional["SharedMemoryTransport"]] = [None]
+
+
+def _start_worker(
+    blocks: Tuple[Block, ...], transport: Optional["SharedMemoryTransport"]
+) -> None:
+    # Runs once in each worker process, as it starts.
+    for block in blocks:
+        _worker_plans[block.name] = ExecutionPlan.from_nodes(
+            block.nodes, inputs=block.inputs
+        )
+    _worker_transport[0] = transport
+
+
+def _evaluate_block(name: str, inputs: Tuple[Any, ...]) -> Any:
+    transport = _worker_transport[0]
+    if transport is None:
+        return _evaluate_plan(_worker_plans[name], inputs)
+    inputs = tuple(transport.open(value, unlink=False) for value in inputs)
+    return transport.export(_evaluate_plan(_worker_plans[name], inputs))
+
+
+def _evaluate_plan(plan: ExecutionPlan, inputs: Tuple[Any, ...]) -> Any:
+    slots: list[Any] = [None] * plan.num_slots
+    slots[: len(inputs)] = inputs
+    return plan.run(slots)
+
+
+def _noop() -> None:
+    pass
+
+
+def _find_blocks(
+    nodes: Tuple[DAGNode, ...], block_of: Mapping[str, str]
+) -> Tuple[Tuple[Block, ...], Tuple[InvalidDAG, ...]]:
+    # Returns the valid blocks among the nodes assigned to them by `block_of`,
+    # and why each of the others is invalid.
+    indices: dict[str, list[int]] = {}
+    for index, node in enumerate(nodes):
+        block_name = block_of.get(node.naked_node.name)
+        if block_name is not None:
+            indices.setdefault(block_name, []).append(index)
+
+    blocks = []
+    invalid = []
+    for block_name, block_indices in indices.items():
+        first, last = block_indices[0], block_indices[-1]
+        if last - first + 1 != len(block_indices):
+            invalid.append(
+                InvalidDAG(
+                    message=f"Nodes of block {block_name} are not contiguous in "
+                    "topological order"
+                )
+            )
+            continue
+        block_nodes = nodes[first : last + 1]
+        names = {node.naked_node.name for node in block_nodes}
+        leaked = next(
+            (
+                node.naked_node.name
+                for node in block_nodes[:-1]
+                if not names.issuperset(node.naked_node.children)
+            ),
+            None,
+        )
+        if leaked is not None:
+            invalid.append(
+                InvalidDAG(
+                    message=f"Node {leaked} of block {block_name} has children "
+                    "outside of the block, but is not its last node"
+                )
+            )
+            continue
+        inputs = dict.fromkeys(
+            name
+            for node in block_nodes
+            for name in node.input_nodes
+            if name not in names
+        )
+        blocks.append(Block(block_name, block_nodes, tuple(inputs)))
+    return tuple(blocks), tuple(invalid)
+
+
+class ProcessFunctionDAG(ThreadedFunctionDAG, frozen=True):
+    """
+    A `ThreadedFunctionDAG` that evaluates blocks of nodes on a pool of worker
+    processes, for nodes that are CPU-bound in Python code (and so never
+    release the GIL).
+
+    Blocks are assigned by the `block` of each operation in a
+    `DAGDescription`. The nodes of a block must be contiguous in topological
+    order, and only the last may have children outside of the block. Each
+    worker builds every block once, when it starts, so an evaluation only
+    sends a block's inputs to a worker and gets its output back - these must
+    be picklable, as must the nodes themselves. Independent blocks are
+    evaluated in parallel, and every other node is evaluated in this process
+    as by a `ThreadedFunctionDAG`. DAGs built from strings, or from
+    descriptions without blocks, have no blocks. DAGs loaded with
+    `stream.load` keep their blocks, but `serialise.dumps` does not store
+    them, so refuses ProcessFunctionDAGs.
+
+    The worker processes are started on first use (or by `start`), and are
+    kept until `close` is called or the DAG is used as a context manager:
+
+        with ProcessFunctionDAG.throwable_from_dag_description(...) as dag:
+            dag.evaluate(value)
+
+    Block inputs and outputs are pickled, unless a `SharedMemoryTransport`
+    is given with `with_transport` to send large buffers (e.g. NumPy arrays)
+    through shared memory instead.
+
+    When logging, a block is logged as its last node, taking the block's
+    inputs. Nodes in worker processes are not logged.
+    """
+
+    # The workers (and their pool) belong to this instance, so are not pickled.
+    _derived: ClassVar[Tuple[str, ...]] = ThreadedFunctionDAG._derived + (
+        "_pool_executor",
+    )
+
+    @classmethod
+    def from_dag_description(
+        cls,
+        dag_description: DAGDescription,
+        custom_op_node_map: dict[str, type[Node]],
+    ) -> Union[Self, InvalidDAG]:
+        dag = super().from_dag_description(dag_description, custom_op_node_map)
+        if isinstance(dag, InvalidDAG):
+            return dag
+        assert isinstance(dag, ProcessFunctionDAG)
+        return dag.with_blocks(
+            {
+                op.name: op.block
+                for op in dag_description.operations.ops
+                if op.block is not None
+            }
+        )
+
+    def with_blocks(self, block_of: Mapping[str, str]) -> Union[Self, InvalidDAG]:
+        """
+        Returns a copy of this DAG with its nodes assigned to blocks by name,
+        as by the `block` of each operation in a `DAGDescription`, or an
+        `InvalidDAG` if any block is invalid. Nodes not in `block_of` are
+        evaluated in this process. The copy has its own workers, shares its
+        nodes with this DAG, and compares equal to it.
+        """
+        blocks, invalid = _find_blocks(self.nodes, block_of)
+        if invalid:
+            return invalid[0]
+        dag = self._from_ordered_nodes(self.nodes)
+        dag.__dict__["blocks"] = blocks
+        return dag
+
+    @cached_property
+    def blocks(self) -> Tuple[Block, ...]:
+        """
+        The blocks evaluated by worker processes, in topological order.
+        """
+        return ()
+
+    @cached_property
+    def max_workers(self) -> Optional[int]:
+        """
+        The number of worker processes. Unless set with `with_workers`, this is
+        None, meaning one per CPU.
+        """
+        return None
+
+    @cached_property
+    def mp_context(self) -> Optional["BaseContext"]:
+        """
+        The `multiprocessing` context the workers are started with. Unless set
+        with `with_workers`, this is None, meaning the default context.
+        """
+        return None
+
+    def with_workers(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context: Optional["BaseContext"] = None,
+    ) -> Self:
+        """
+        Returns a copy of this DAG evaluating its blocks on `max_workers`
+        processes, started with `mp_context`. The copy has its own workers,
+        shares its nodes with this DAG, and compares equal to it.
+        """
+        dag = self._from_ordered_nodes(self.nodes)
+        dag.__dict__["max_workers"] = max_workers
+        dag.__dict__["mp_context"] = mp_context
+        return dag
+
+    @cached_property
+    def transport(self) -> Optional["SharedMemoryTransport"]:
+        """
+        Sends block inputs and outputs between processes. Unless set with
+        `with_transport`, this is None, meaning they are pickled.
+        """
+        return None
+
+    def with_transport(self, transport: Optional["SharedMemoryTransport"]) -> Self:
+        """
+        Returns a copy of this DAG sending block inputs and outputs with
+        `transport`. The copy has its own workers, shares its nodes with this
+        DAG, and compares equal to it.
+        """
+        dag = self._from_ordered_nodes(self.nodes)
+        dag.__dict__["transport"] = transport
+        return dag
+
+    @cached_property
+    def plan(self) -> ExecutionPlan:
+        # Each block is a single step, evaluating the whole block on a worker.
+        # It takes the inputs of the block, and stands in for its last node.
+        last_nodes = {block.nodes[-1].naked_node.name: block for block in self.blocks}
+        in_blocks = {
+            node.naked_node.name for block in self.blocks for node in block.nodes
+        }
+        nodes = []
+        for node in self.nodes:
+            name = node.naked_node.name
+            if name in last_nodes:
+                nodes.append(DAGNode.trusted(node.naked_node, last_nodes[name].inputs))
+            elif name not in in_blocks:
+                nodes.append(node)
+
+        def evaluate_of(node: DAGNode) -> Callable[..., Any]:
+            block = last_nodes.get(node.naked_node.name)
+            if block is None:
+                return node.naked_node.evaluate
+            return self._evaluate_block_of(block.name)
+
+        return ExecutionPlan.from_nodes(
+            nodes,
+            evaluate_of=evaluate_of,
+            logger=logger,
+            log_node=self._pretty_log_node,
+        )
+
+    @cached_property
+    def _submitted_steps(self) -> dict[int, Callable[..., Future]]:
+        # Blocks are sent to the workers without waiting for their outputs, so
+        # blocks in flight do not each hold a thread of the executor.
+        last_nodes = {block.nodes[-1].naked_node.name: block for block in self.blocks}
+        submitted = {}
+        for index, step in enumerate(self.plan.steps):
+            block = last_nodes.get(step.node.naked_node.name)
+            if block is not None:
+                submitted[index] = self._submit_block_of(block.name)
+        return submitted
+
+    def _evaluate_block_of(self, name: str) -> Callable[..., Any]:
+        submit_block = self._submit_block_of(name)
+
+        def evaluate_block(*inputs: Any) -> Any:
+            return submit_block(*inputs).result()
+
+        return evaluate_block
+
+    def _submit_block_of(self, name: str) -> Callable[..., Future]:
+        def submit_block(*inputs: Any) -> Future:
+            transport = self.transport
+            if transport is None:
+                return self._pool().submit(_evaluate_block, name, inputs)
+            sent = tuple(transport.acquire(value) for value in inputs)
+            try:
+                future = self._pool().submit(_evaluate_block, name, sent)
+            except BaseException:
+                for value in inputs:
+                    transport.release(value)
+                raise
+            output: Future = Future()
+
+            def receive(future: Future) -> None:
+                for value in inputs:
+                    transport.release(value)
+                try:
+                    output.set_result(transport.open(future.result(), unlink=True))
+                except BaseException as e:
+                    output.set_exception(e)
+
+            future.add_done_callback(receive)
+            return output
+
+        return submit_block
+
+    def evaluate(self, value: Any) -> Any:
+        if self.blocks:
+            # Workers are started from the calling thread, not from a thread of
+            # the executor.
+            self._pool()
+        return super().evaluate(value)
+
+    def evaluate_many(
+        self, inputs: Iterable[Any], max_concurrency: int = 1, ordered: bool = True
+    ) -> Iterator[Any]:
+        if self.blocks:
+            # As for `evaluate`, as the evaluations may be run by the executor.
+            self._pool()
+        yield from super().evaluate_many(inputs, max_concurrency, ordered)
+
+    def start(self) -> None:
+        """
+        Starts the worker processes, so that the first evaluation does not
+        wait for them to start and build the blocks.
+        """
+        if not self.blocks:
+            return
+        pool = self._pool()
+        for future in [pool.submit(_noop) for _ in range(self._num_workers())]:
+            future.result()
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes, once they finish any blocks already
+        sent to them. Evaluating the DAG again starts new workers.
+        """
+        with _pool_lock:
+            pool = self.__dict__.pop("_pool_executor", None)
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _pool(self) -> "ProcessPoolExecutor":
+        pool = self.__dict__.get("_pool_executor")
+        if pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import resource_tracker
+
+            with _pool_lock:
+                pool = self.__dict__.get("_pool_executor")
+                if pool is None:
+                    if self.transport is not None:
+                        # Workers share this process's tracker of shared
+                        # memory, which has to be running before they start.
+                        resource_tracker.ensure_running()
+                    pool = self.__dict__["_pool_executor"] = ProcessPoolExecutor(
+                        self._num_workers(),
+                        mp_context=self.mp_context,
+                        initializer=_start_worker,
+                        initargs=(self.blocks, self.transport),
+                    )
+        return pool
+
+    def _num_workers(self) -> int:
+        return self.max_workers or os.cpu_count() or 1
+
+    def _from_ordered_nodes(self, nodes: Tuple[DAGNode, ...]) -> Self:
+        # Edited DAGs keep the workers' settings, and the blocks of the
+        # original that are still valid. Each gets its own workers.
+        dag = super()._from_ordered_nodes(nodes)
+        assert isinstance(dag, ProcessFunctionDAG)
+        for name in ("max_workers", "mp_context", "transport"):
+            if name in self.__dict__:
+                dag.__dict__[name] = self.__dict__[name]
+        block_of = {
+            node.naked_node.name: block.name
+            for block in self.blocks
+            for node in block.nodes
+        }
+        blocks, invalid = _find_blocks(nodes, block_of)
+        for reason in invalid:
+            logger.warning(f"{reason.message}, so it is evaluated in this process")
+        dag.__dict__["blocks"] = blocks
+        return dag
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generic, Iterator, Optional, Tuple, TypeVar, Union
+
+from . import stream
+from .async_dag import AsyncFunctionDAG
+from .dag import FunctionDAG
+from .prevalidate import InvalidDAG
+from .utils.logging import logger_factory
+
+logger = logger_factory(__name__)
+
+DAG = TypeVar("DAG", FunctionDAG, AsyncFunctionDAG)
+
+# Identifies a version of a file. The inode changes when a file is replaced
+# atomically, even if the new file has the same size and (coarse) mtime.
+_Stamp = Tuple[int, int, int]
+
+
+class DAGRegistry(Generic[DAG]):
+    """
+    A catalogue of named DAGs, built from the `DAGDescription` JSON files in a
+    directory. Each DAG is named after its file, without the suffix.
+
+    DAGs are built once, when the registry is created, and rebuilt only when
+    their file changes - i.e. its mtime, size or inode. Changes are picked up
+    by `refresh`, which lookups also call at most once every `poll_interval`
+    seconds (if given). A rebuilt DAG replaces the old one atomically: callers
+    already evaluating the old instance keep using it, and later lookups get
+    the new one. If a changed file no longer describes a valid DAG, the last
+    valid DAG is kept, and the error is logged and kept in `errors`.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        dag_class: type[DAG],
+        custom_op_node_map: dict,
+        poll_interval: Optional[float] = None,
+        suffix: str = ".json",
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if poll_interval is not None and poll_interval <= 0:
+            raise ValueError("A DAGRegistry poll_interval must be positive")
+        self.directory = Path(directory)
+        self.dag_class: type[DAG] = dag_class
+        self.custom_op_node_map = custom_op_node_map
+        self.poll_interval = poll_interval
+        self.suffix = suffix
+        self._timer = timer
+        # These are replaced rather than mutated, so lookups never need
+        # to take the lock.
+        self._dags: dict[str, DAG] = {}
+        self._errors: dict[str, InvalidDAG] = {}
+        self._stamps: dict[str, _Stamp] = {}
+        self._refresh_lock = threading.Lock()
+        self._next_poll = float("inf")
+        self.refresh()
+
+    def __getitem__(self, name: str) -> DAG:
+        self._poll()
+        return self._dags[name]
+
+    def get(self, name: str) -> Optional[DAG]:
+        self._poll()
+        return self._dags.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        self._poll()
+        return name in self._dags
+
+    def __iter__(self) -> Iterator[str]:
+        self._poll()
+        return iter(self._dags)
+
+    def __len__(self) -> int:
+        self._poll()
+        return len(self._dags)
+
+    @property
+    def errors(self) -> dict[str, InvalidDAG]:
+        """The errors of files that failed to build on the last attempt."""
+        return dict(self._errors)
+
+    def refresh(self) -> dict[str, Union[DAG, InvalidDAG]]:
+        """
+        Rebuilds the DAGs of new and changed files, and drops those of deleted
+        files. Returns the result of each build attempted.
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _poll(self) -> None:
+        if self._timer() < self._next_poll:
+            return
+        # Only one caller refreshes - the others carry on with the current DAGs
+        # rather than waiting on the rebuild.
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def _refresh(self) -> dict[str, Union[DAG, InvalidDAG]]:
+        stamps: dict[str, _Stamp] = {}
+        paths: dict[str, Path] = {}
+        for path in self.directory.iterdir():
+            if path.suffix != self.suffix:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Deleted since the directory was listed.
+                continue
+            stamps[path.stem] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            paths[path.stem] = path
+
+        results: dict[str, Union[DAG, InvalidDAG]] = {}
+        for name, stamp in stamps.items():
+            if self._stamps.get(name) != stamp:
+                results[name] = self._build(paths[name])
+
+        dags = {name: dag for name, dag in self._dags.items() if name in stamps}
+        errors = {name: e for name, e in self._errors.items() if name in stamps}
+        for name, result in results.items():
+            if isinstance(result, InvalidDAG):
+                logger.error(f"Failed to build DAG {name}: {result.message}")
+                errors[name] = result
+            else:
+                dags[name] = result
+                errors.pop(name, None)
+        for name in self._dags.keys() - stamps.keys():
+            logger.info(f"Removed DAG {name}, as its file was deleted")
+
+        self._dags, self._errors, self._stamps = dags, errors, stamps
+        if self.poll_interval is not None:
+            self._next_poll = self._timer() + self.poll_interval
+        return results
+
+    def _build(self, path: Path) -> Union[DAG, InvalidDAG]:
+        try:
+            return stream.load(self.dag_class, path, self.custom_op_node_map)
+        except OSError as e:
+            return InvalidDAG(message=f"Failed to read {path}: {e}")
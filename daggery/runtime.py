@@ -0,0 +1,129 @@
+from functools import partial
+from typing import Any, ClassVar, Tuple, Union
+
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+_new = object.__new__
+_setattr = object.__setattr__
+
+
+class RuntimeNode:
+    """
+    A node of a built DAG, along with the names of its inputs in argument
+    order. These are what a DAG evaluates, and carry no behaviour beyond
+    that, so they are plain immutable objects with `__slots__` rather than
+    pydantic models. Validation happens when the DAG itself is built.
+
+    Subclasses set `node_class` to the kind (or kinds) of node they hold.
+    """
+
+    # Weak references allow instances to be interned (see `dag_node_factory`).
+    __slots__ = ("naked_node", "input_nodes", "__weakref__")
+
+    node_class: ClassVar[Union[type, Tuple[type, ...]]] = object
+
+    naked_node: Any
+    input_nodes: Tuple[str, ...]
+
+    def __init__(self, naked_node: Any, input_nodes: Tuple[str, ...]):
+        if not isinstance(naked_node, self.node_class):
+            node_classes = (
+                self.node_class
+                if isinstance(self.node_class, tuple)
+                else (self.node_class,)
+            )
+            raise TypeError(
+                f"The naked_node of a {type(self).__name__} must be an instance "
+                f"of {' or '.join(c.__name__ for c in node_classes)}, "
+                f"not {naked_node!r}"
+            )
+        input_nodes = tuple(input_nodes)
+        if not all(isinstance(name, str) for name in input_nodes):
+            raise TypeError(f"Input node names must be strings: {input_nodes}")
+        _setattr(self, "naked_node", naked_node)
+        _setattr(self, "input_nodes", input_nodes)
+
+    @classmethod
+    def trusted(cls, naked_node: Any, input_nodes: Tuple[str, ...]) -> Any:
+        """Builds an instance from values that are already known to be valid."""
+        instance = _new(cls)
+        _setattr(instance, "naked_node", naked_node)
+        _setattr(instance, "input_nodes", input_nodes)
+        return instance
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        assert isinstance(other, RuntimeNode)
+        return (
+            self.naked_node == other.naked_node
+            and self.input_nodes == other.input_nodes
+        )
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.naked_node, self.input_nodes))
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(naked_node={self.naked_node!r}, "
+            f"input_nodes={self.input_nodes!r})"
+        )
+
+    def __reduce__(self) -> Any:
+        return (type(self).trusted, (self.naked_node, self.input_nodes))
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source_type: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        # DAGs only ever hold instances built by the DAG itself. They are
+        # dumped as the pydantic models they used to be, and described by
+        # `fields_schema` accordingly.
+        node_classes = (
+            cls.node_class if isinstance(cls.node_class, tuple) else (cls.node_class,)
+        )
+        fields_schema = core_schema.typed_dict_schema(
+            {
+                "naked_node": core_schema.typed_dict_field(
+                    core_schema.union_schema(
+                        [handler.generate_schema(c) for c in node_classes]
+                    )
+                ),
+                "input_nodes": core_schema.typed_dict_field(
+                    core_schema.tuple_schema(
+                        [core_schema.str_schema()], variadic_item_index=0
+                    )
+                ),
+            },
+            cls=cls,
+        )
+        return core_schema.no_info_plain_validator_function(
+            partial(_check_instance, cls),
+            json_schema_input_schema=fields_schema,
+            serialization=core_schema.plain_serializer_function_ser_schema(_dump_node),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        # Both validation and serialization schemas describe the dumped fields.
+        return handler(schema["json_schema_input_schema"])
+
+
+def _dump_node(node: RuntimeNode) -> dict[str, Any]:
+    return {"naked_node": node.naked_node, "input_nodes": node.input_nodes}
+
+
+def _check_instance(cls: type, value: Any) -> Any:
+    if not isinstance(value, cls):
+        raise ValueError(f"Input should be an instance of {cls.__name__}")
+    return value
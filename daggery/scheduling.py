@@ -0,0 +1,341 @@
+import asyncio
+import heapq
+from abc import ABC, abstractmethod
+from typing import Any, Coroutine, Mapping, Optional, Tuple
+
+from .codegen import LogNode
+from .plan import ExecutionPlan, PlanStep
+
+
+class ConcurrencyLimits:
+    """
+    Caps the number of nodes evaluated at once: across all nodes with
+    `max_in_flight`, and for nodes of particular classes with `per_class`.
+    Nodes whose class has no limit are only subject to `max_in_flight`.
+
+    Limits are enforced by the schedulers given them, across every evaluation
+    (and every DAG) using those schedulers, so a single instance can protect
+    a downstream service called from several DAGs. Like any asyncio
+    primitive, an instance must only be used from one event loop.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        per_class: Optional[Mapping[type, int]] = None,
+    ):
+        per_class = dict(per_class or {})
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("A ConcurrencyLimits max_in_flight must be >= 1")
+        for node_class, limit in per_class.items():
+            if limit < 1:
+                raise ValueError(
+                    f"The concurrency limit of {node_class.__name__} must be >= 1"
+                )
+        self.max_in_flight = max_in_flight
+        self.per_class = per_class
+        self._all = None if max_in_flight is None else asyncio.Semaphore(max_in_flight)
+        self._by_class = {
+            node_class: asyncio.Semaphore(limit)
+            for node_class, limit in per_class.items()
+        }
+
+    @classmethod
+    def by_op_name(
+        cls,
+        per_op_name: Mapping[str, int],
+        custom_op_node_map: Mapping[str, type],
+        max_in_flight: Optional[int] = None,
+    ) -> "ConcurrencyLimits":
+        """Limits nodes by their op name in `custom_op_node_map`."""
+        missing = per_op_name.keys() - custom_op_node_map.keys()
+        if missing:
+            raise ValueError(
+                f"Op names are not in the custom_op_node_map: {sorted(missing)}"
+            )
+        per_class = {
+            custom_op_node_map[op_name]: limit for op_name, limit in per_op_name.items()
+        }
+        return cls(max_in_flight, per_class)
+
+    async def evaluate(self, step: PlanStep, arguments: Tuple[Any, ...]) -> Any:
+        """Evaluates `step` once there is room for it within every limit."""
+        node_limit = self._by_class.get(type(step.node.naked_node))
+        # The node's own limit is taken first, so that nodes waiting on it
+        # don't also take up room in the overall limit.
+        if node_limit is not None:
+            async with node_limit:
+                return await self._evaluate(step, arguments)
+        return await self._evaluate(step, arguments)
+
+    async def _evaluate(self, step: PlanStep, arguments: Tuple[Any, ...]) -> Any:
+        if self._all is None:
+            return await step.evaluate(*arguments)
+        async with self._all:
+            return await step.evaluate(*arguments)
+
+
+class Scheduler(ABC):
+    """
+    Decides when each node of an `AsyncFunctionDAG` is evaluated. A scheduler
+    evaluates the DAG's execution plan for a single input, passing each node,
+    its inputs and its output to `log_node` (if given) once it is evaluated.
+    Any `limits` given are enforced on top of the scheduler's own policy.
+
+    Unless documented otherwise, schedulers hold no state between evaluations,
+    so one scheduler can be shared by any number of DAGs and concurrent
+    evaluations.
+    """
+
+    def __init__(self, limits: Optional[ConcurrencyLimits] = None):
+        self.limits = limits
+
+    @abstractmethod
+    async def evaluate(
+        self, plan: ExecutionPlan, value: Any, log_node: Optional[LogNode]
+    ) -> Any:
+        """Evaluates `plan` with `value` as the DAG's input."""
+
+    def _evaluate_step(
+        self, step: PlanStep, arguments: Tuple[Any, ...]
+    ) -> Coroutine[Any, Any, Any]:
+        if self.limits is None:
+            return step.evaluate(*arguments)
+        return self.limits.evaluate(step, arguments)
+
+
+class BatchScheduler(Scheduler):
+    """
+    Evaluates the DAG's batches in turn, evaluating the nodes of each batch
+    concurrently. Each batch waits for the whole of the batch before it, so
+    this is simple and cheap, but one slow node holds up every later batch.
+    This is the default.
+    """
+
+    async def evaluate(
+        self, plan: ExecutionPlan, value: Any, log_node: Optional[LogNode]
+    ) -> Any:
+        slots = plan.new_slots(value)
+        for steps, release_slots in plan.batches:
+            await self._evaluate_batch(steps, slots, log_node)
+            # Once a slot's last consumer has been evaluated, the slot is
+            # cleared so that large intermediate values can be freed early.
+            for slot in release_slots:
+                slots[slot] = None
+        return slots[plan.steps[-1].output_slot]
+
+    async def _evaluate_batch(
+        self, steps: Tuple[PlanStep, ...], slots: list[Any], log_node: Optional[LogNode]
+    ) -> None:
+        # Kept separate from `evaluate` so that nothing here holds on to a
+        # batch's inputs or outputs once it has been evaluated.
+        batch_inputs = [
+            (step.get_inputs(slots),) if step.single_input else step.get_inputs(slots)
+            for step in steps
+        ]
+        tasks = [
+            self._evaluate_step(step, inputs)
+            for step, inputs in zip(steps, batch_inputs)
+        ]
+        output_values = await asyncio.gather(*tasks)
+        for step, inputs, output_value in zip(steps, batch_inputs, output_values):
+            if log_node is not None:
+                log_node(step.node, inputs, output_value)
+            slots[step.output_slot] = output_value
+
+
+class ReadyScheduler(Scheduler):
+    """
+    Starts each node as soon as all of its inputs are ready, regardless of
+    batches. The number of unfinished inputs of each node is counted down as
+    nodes finish, so a slow node only holds up the nodes depending on it.
+
+    If a node raises, the nodes still running are cancelled and the exception
+    is raised from `evaluate`.
+    """
+
+    async def evaluate(
+        self, plan: ExecutionPlan, value: Any, log_node: Optional[LogNode]
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        steps = plan.steps
+        consumers, num_dependencies, slot_uses = plan.dependencies
+        slots = plan.new_slots(value)
+        waiting_on = list(num_dependencies)
+        uses_left = list(slot_uses)
+        tail = len(steps) - 1
+        running: dict[asyncio.Task, Tuple[int, Tuple[Any, ...]]] = {}
+        finished = loop.create_future()
+
+        def start(index: int) -> None:
+            step = steps[index]
+            inputs = step.get_inputs(slots)
+            arguments = (inputs,) if step.single_input else inputs
+            # The task holds on to its inputs, so slots can be cleared as soon
+            # as their last consumer starts.
+            for slot in step.input_slots:
+                uses_left[slot] -= 1
+                if not uses_left[slot]:
+                    slots[slot] = None
+            task = loop.create_task(self._evaluate_step(step, arguments))
+            running[task] = (index, arguments)
+            task.add_done_callback(on_done)
+
+        def on_done(task: asyncio.Task) -> None:
+            index, arguments = running.pop(task)
+            if task.cancelled():
+                # Unless cancelled by this evaluation, a node was cancelled
+                # from elsewhere, so the evaluation is too.
+                finished.cancel()
+                return
+            error = task.exception()
+            if finished.done():
+                # Evaluation has already failed (or been cancelled).
+                return
+            if error is not None:
+                finished.set_exception(error)
+                return
+            output_value = task.result()
+            step = steps[index]
+            if log_node is not None:
+                log_node(step.node, arguments, output_value)
+            if index == tail:
+                finished.set_result(output_value)
+                return
+            slots[step.output_slot] = output_value
+            for consumer in consumers[index]:
+                waiting_on[consumer] -= 1
+                if not waiting_on[consumer]:
+                    start(consumer)
+
+        # The head is the only node with no dependencies.
+        start(0)
+        try:
+            return await finished
+        finally:
+            for task in list(running):
+                task.cancel()
+
+
+class CriticalPathScheduler(Scheduler):
+    """
+    Like `ReadyScheduler`, but evaluates at most `max_concurrency` nodes at a
+    time. When more nodes are ready than that, those with the longest path
+    (by cost) still ahead of them start first, as the DAG can finish no
+    sooner than they do.
+
+    The cost of a node is its expected evaluation time, keyed by node name in
+    `costs`. Nodes without a cost are assumed to take the mean of the known
+    costs (or 1, if none are known). With `learn` set, each node's measured
+    evaluation time is blended into its cost after every evaluation, so costs
+    need not be supplied at all (measurements include any time spent waiting
+    on `limits`). This state is shared by every DAG and
+    evaluation using the scheduler, so share a learning scheduler only
+    between DAGs with similar nodes of the same names.
+    """
+
+    # How much of each new measurement is blended into a learned cost.
+    smoothing = 0.2
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        costs: Optional[Mapping[str, float]] = None,
+        learn: bool = True,
+        limits: Optional[ConcurrencyLimits] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("A CriticalPathScheduler max_concurrency must be >= 1")
+        super().__init__(limits)
+        self.max_concurrency = max_concurrency
+        self.costs: dict[str, float] = dict(costs or {})
+        self.learn = learn
+
+    def priorities(self, plan: ExecutionPlan) -> list[float]:
+        """
+        The priority of each step of `plan` - the total cost of the costliest
+        path from the step to the tail, including the step itself.
+        """
+        costs = self.costs
+        default = sum(costs.values()) / len(costs) if costs else 1.0
+        consumers = plan.dependencies.consumers
+        priorities = [0.0] * len(plan.steps)
+        for index in range(len(plan.steps) - 1, -1, -1):
+            name = plan.steps[index].node.naked_node.name
+            remaining = max((priorities[c] for c in consumers[index]), default=0.0)
+            priorities[index] = costs.get(name, default) + remaining
+        return priorities
+
+    async def evaluate(
+        self, plan: ExecutionPlan, value: Any, log_node: Optional[LogNode]
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        steps = plan.steps
+        consumers, num_dependencies, slot_uses = plan.dependencies
+        priorities = self.priorities(plan)
+        slots = plan.new_slots(value)
+        waiting_on = list(num_dependencies)
+        uses_left = list(slot_uses)
+        tail = len(steps) - 1
+        # Ready steps, by descending priority and then in order.
+        ready: list[Tuple[float, int]] = []
+        running: dict[asyncio.Task, Tuple[int, Tuple[Any, ...], float]] = {}
+        finished = loop.create_future()
+
+        def start_ready() -> None:
+            while ready and len(running) < self.max_concurrency:
+                _, index = heapq.heappop(ready)
+                step = steps[index]
+                inputs = step.get_inputs(slots)
+                arguments = (inputs,) if step.single_input else inputs
+                for slot in step.input_slots:
+                    uses_left[slot] -= 1
+                    if not uses_left[slot]:
+                        slots[slot] = None
+                task = loop.create_task(self._evaluate_step(step, arguments))
+                running[task] = (index, arguments, loop.time())
+                task.add_done_callback(on_done)
+
+        def on_done(task: asyncio.Task) -> None:
+            index, arguments, started = running.pop(task)
+            if task.cancelled():
+                # Unless cancelled by this evaluation, a node was cancelled
+                # from elsewhere, so the evaluation is too.
+                finished.cancel()
+                return
+            error = task.exception()
+            if finished.done():
+                return
+            if error is not None:
+                finished.set_exception(error)
+                return
+            output_value = task.result()
+            step = steps[index]
+            if self.learn:
+                self._learn(step.node.naked_node.name, loop.time() - started)
+            if log_node is not None:
+                log_node(step.node, arguments, output_value)
+            if index == tail:
+                finished.set_result(output_value)
+                return
+            slots[step.output_slot] = output_value
+            for consumer in consumers[index]:
+                waiting_on[consumer] -= 1
+                if not waiting_on[consumer]:
+                    heapq.heappush(ready, (-priorities[consumer], consumer))
+            start_ready()
+
+        ready.append((-priorities[0], 0))
+        start_ready()
+        try:
+            return await finished
+        finally:
+            for task in list(running):
+                task.cancel()
+
+    def _learn(self, name: str, duration: float) -> None:
+        cost = self.costs.get(name)
+        if cost is None:
+            self.costs[name] = duration
+        else:
+            self.costs[name] = cost + self.smoothing * (duration - cost)
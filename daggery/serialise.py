@@ -0,0 +1,189 @@
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from typing import Any, Union
+
+from .async_dag import AsyncFunctionDAG
+from .dag import FunctionDAG
+from .plan import INPUT_NAME
+from .prevalidate import InvalidDAG, PrevalidatedDAG, PrevalidatedNode
+from .process_dag import ProcessFunctionDAG
+from .threaded_dag import ThreadedFunctionDAG
+from .utils.construction import unvalidated_construct
+
+# Layout of an artifact (all integers are little-endian and unsigned):
+#
+# * A header: magic bytes, format version, DAG kind, padding, a CRC32 of
+#   everything after the header, the size of the string table in bytes, and
+#   the number of nodes and of integers in the node table.
+# * A string table: every node name and op name, once each, encoded as UTF-8
+#   and separated by NUL characters.
+# * A node table of u32s, with a record per node in topological order: the
+#   indices of its name and op name in the string table, the number of children
+#   and inputs, then the index of each child and each input.
+#
+# Both tables are decoded with a single call each, so loading is dominated by
+# building the nodes themselves rather than by parsing.
+MAGIC = b"DAGY"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHBxIIII")
+
+# Subclasses come before the classes they derive from.
+_KINDS: dict[type, int] = {ThreadedFunctionDAG: 2, FunctionDAG: 0, AsyncFunctionDAG: 1}
+_CLASSES: dict[int, Any] = {kind: cls for cls, kind in _KINDS.items()}
+
+DAG = Union[FunctionDAG, AsyncFunctionDAG]
+
+
+def dumps(dag: DAG, custom_op_node_map: dict[str, Any]) -> bytes:
+    """
+    Serialises a DAG to bytes. Node classes are stored by their key in
+    `custom_op_node_map`, which must contain every class used in the DAG.
+    """
+    kind = next((k for cls, k in _KINDS.items() if isinstance(dag, cls)), None)
+    # Blocks are not part of the format, so would be silently dropped.
+    if kind is None or isinstance(dag, ProcessFunctionDAG):
+        raise ValueError(f"Cannot serialise {type(dag).__name__}")
+    op_names = {
+        node_class: op_name for op_name, node_class in custom_op_node_map.items()
+    }
+
+    strings: dict[str, int] = {}
+
+    def index_of(string: str) -> int:
+        if "\0" in string:
+            raise ValueError(f"Cannot serialise a name containing NUL: {string!r}")
+        return strings.setdefault(string, len(strings))
+
+    dag_nodes: list[Any]
+    if isinstance(dag, AsyncFunctionDAG):
+        dag_nodes = [node for batch in dag.nodes for node in batch]
+    else:
+        dag_nodes = list(dag.nodes)
+
+    integers: list[int] = []
+    for dag_node in dag_nodes:
+        naked_node = dag_node.naked_node
+        op_name = op_names.get(type(naked_node))
+        if op_name is None:
+            raise ValueError(
+                f"Node class {type(naked_node).__name__} of {naked_node.name} "
+                "is not in the custom_op_node_map"
+            )
+        # The head's input is implicit, as in a `PrevalidatedDAG`.
+        input_nodes = [n for n in dag_node.input_nodes if n != INPUT_NAME]
+        integers += (
+            index_of(naked_node.name),
+            index_of(op_name),
+            len(naked_node.children),
+            len(input_nodes),
+        )
+        integers += map(index_of, naked_node.children)
+        integers += map(index_of, input_nodes)
+
+    string_table = "\0".join(strings).encode()
+    payload = string_table + struct.pack(f"<{len(integers)}I", *integers)
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        kind,
+        zlib.crc32(payload),
+        len(string_table),
+        len(dag_nodes),
+        len(integers),
+    )
+    return header + payload
+
+
+def dump(
+    dag: DAG, path: Union[str, os.PathLike], custom_op_node_map: dict[str, Any]
+) -> None:
+    """
+    Writes a DAG to `path`. The file is replaced atomically, so processes
+    loading it concurrently never see a partially written artifact.
+    """
+    data = dumps(dag, custom_op_node_map)
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        file.write(data)
+    os.replace(file.name, path)
+
+
+def loads(
+    data: Union[bytes, bytearray, memoryview, mmap.mmap],
+    custom_op_node_map: dict[str, Any],
+) -> Union[DAG, InvalidDAG]:
+    """
+    Builds a DAG from the output of `dumps`. Since the artifact was written
+    from a valid DAG (and is checksummed), the graph is not validated again
+    and the DAG is built with trusted construction.
+    """
+    view = memoryview(data)
+    try:
+        return _loads(view, custom_op_node_map)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        return InvalidDAG(message=f"Malformed DAG artifact: {e}")
+    finally:
+        view.release()
+
+
+def load(
+    path: Union[str, os.PathLike], custom_op_node_map: dict[str, Any]
+) -> Union[DAG, InvalidDAG]:
+    """
+    Loads a DAG written by `dump`. The file is memory-mapped rather than read,
+    so processes loading the same artifact share its pages in the OS cache.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < _HEADER.size:
+            return InvalidDAG(message=f"DAG artifact {path} is truncated")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return loads(mapped, custom_op_node_map)
+
+
+def _loads(
+    view: memoryview, custom_op_node_map: dict[str, Any]
+) -> Union[DAG, InvalidDAG]:
+    magic, version, kind, checksum, string_table_size, num_nodes, num_integers = (
+        _HEADER.unpack_from(view)
+    )
+    if magic != MAGIC:
+        return InvalidDAG(message="Not a DAG artifact")
+    if version != VERSION:
+        return InvalidDAG(message=f"Unsupported DAG artifact version: {version}")
+    if kind not in _CLASSES:
+        return InvalidDAG(message=f"Unknown DAG kind in artifact: {kind}")
+    if zlib.crc32(view[_HEADER.size :]) != checksum:
+        return InvalidDAG(message="DAG artifact checksum does not match")
+    if num_nodes == 0:
+        return InvalidDAG(message="DAG artifact contains no nodes")
+
+    offset = _HEADER.size + string_table_size
+    strings = str(view[_HEADER.size : offset], "utf-8").split("\0")
+    integers = struct.unpack_from(f"<{num_integers}I", view, offset)
+    lookup = strings.__getitem__
+
+    nodes = []
+    i = 0
+    for _ in range(num_nodes):
+        name, op_name, num_children, num_inputs = integers[i : i + 4]
+        children_end = i + 4 + num_children
+        inputs_end = children_end + num_inputs
+        nodes.append(
+            unvalidated_construct(
+                PrevalidatedNode,
+                name=strings[name],
+                node_class=strings[op_name],
+                children=tuple(map(lookup, integers[i + 4 : children_end])),
+                input_nodes=tuple(map(lookup, integers[children_end:inputs_end])),
+            )
+        )
+        i = inputs_end
+
+    prevalidated_dag = unvalidated_construct(PrevalidatedDAG, nodes=tuple(nodes))
+    return _CLASSES[kind].from_prevalidated_dag(
+        prevalidated_dag, custom_op_node_map, trusted=True
+    )
@@ -0,0 +1,327 @@
+import json
+import os
+import re
+from collections import defaultdict
+from typing import Any, Iterator, Optional, TextIO, Tuple, TypeVar, Union
+
+from .async_dag import AsyncFunctionDAG
+from .dag import FunctionDAG
+from .description import ArgumentMapping, Operation
+from .prevalidate import InvalidDAG, PrevalidatedDAG, PrevalidatedNode
+from .process_dag import ProcessFunctionDAG
+from .utils.construction import unvalidated_construct
+
+DAG = TypeVar("DAG", FunctionDAG, AsyncFunctionDAG)
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+
+
+def load(
+    dag_class: type[DAG],
+    source: Union[str, os.PathLike, TextIO],
+    custom_op_node_map: dict[str, Any],
+    chunk_size: int = CHUNK_SIZE,
+) -> Union[DAG, InvalidDAG]:
+    """
+    Builds a DAG of `dag_class` from a JSON file laid out like a
+    `DAGDescription`, reading it incrementally (see `load_prevalidated`).
+    """
+    validator = StreamingValidator()
+    prevalidated_dag = _validate(source, chunk_size, validator)
+    if isinstance(prevalidated_dag, InvalidDAG):
+        return prevalidated_dag
+    dag = dag_class.from_prevalidated_dag(
+        prevalidated_dag, custom_op_node_map, trusted=True
+    )
+    # Blocks are only evaluated by a `ProcessFunctionDAG`, as for
+    # `from_dag_description`.
+    if isinstance(dag, ProcessFunctionDAG) and validator.blocks:
+        return dag.with_blocks(validator.blocks)
+    return dag
+
+
+def load_prevalidated(
+    source: Union[str, os.PathLike, TextIO], chunk_size: int = CHUNK_SIZE
+) -> Union[PrevalidatedDAG, InvalidDAG]:
+    """
+    Validates a JSON file laid out like a `DAGDescription` (e.g. the output of
+    its `model_dump_json`), given as a path or an open text file.
+
+    The file is read `chunk_size` characters at a time, and each operation and
+    argument mapping is validated as soon as it is parsed, so only the nodes
+    themselves are held in memory - never the whole document. Since operations
+    must be topologically sorted, an invalid graph is rejected as soon as the
+    offending operation is read. Argument mappings may come before or after
+    the operations.
+    """
+    return _validate(source, chunk_size, StreamingValidator())
+
+
+def _validate(
+    source: Union[str, os.PathLike, TextIO],
+    chunk_size: int,
+    validator: "StreamingValidator",
+) -> Union[PrevalidatedDAG, InvalidDAG]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as file:
+            return _validate(file, chunk_size, validator)
+    reader = _JSONReader(source, chunk_size)
+    try:
+        for key in reader.members():
+            if key == "operations":
+                for operations_key in reader.members():
+                    if operations_key != "ops":
+                        reader.value()
+                        continue
+                    for item in reader.elements():
+                        op = Operation.model_validate(item)
+                        if invalid := validator.add_operation(op):
+                            return invalid
+            elif key == "argument_mappings":
+                for item in reader.elements():
+                    mapping = ArgumentMapping.model_validate(item)
+                    if invalid := validator.add_argument_mapping(mapping):
+                        return invalid
+            else:
+                # Unknown fields are ignored, as by `DAGDescription`.
+                reader.value()
+        reader.end()
+    except ValueError as e:
+        # Also covers JSON decoding errors and pydantic validation errors.
+        return InvalidDAG(message=f"Malformed DAG description: {e}")
+    return validator.finish()
+
+
+class StreamingValidator:
+    """
+    Validates a graph one operation (or argument mapping) at a time, making
+    the same guarantees as `PrevalidatedDAG.from_dag_description`.
+
+    Because operations are topologically sorted, every parent of an operation
+    has been seen by the time the operation arrives, so each check happens
+    straight away. The exception is an operation with several parents whose
+    argument mapping has not arrived yet - its node is built once it does.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: list[Union[PrevalidatedNode, Operation]] = []
+        self._seen_names: set[str] = set()
+        self._parents_of_nodes: dict[str, list[str]] = defaultdict(list)
+        self._mapped_names: set[str] = set()
+        # Mappings of operations that have not arrived yet.
+        self._pending_mappings: dict[str, Tuple[str, ...]] = {}
+        # Indices of operations (with >1 parent) still waiting on a mapping.
+        self._unmapped: dict[str, int] = {}
+        self._tails: list[str] = []
+        # The block of each operation given one, by name.
+        self.blocks: dict[str, str] = {}
+
+    def add_operation(self, op: Operation) -> Optional[InvalidDAG]:
+        name = op.name
+        if name in self._seen_names:
+            return InvalidDAG(message=f"Input has duplicate operations: {name}")
+        parent_names = self._parents_of_nodes.get(name, [])
+        if self._nodes and not parent_names:
+            return InvalidDAG(message=f"Input has >1 root node: {name} has no parents")
+        self._seen_names.add(name)
+        # A child that has already been seen indicates a cycle, and that the
+        # input is not topologically sorted.
+        if not self._seen_names.isdisjoint(op.children):
+            return InvalidDAG(
+                message=f"Input is not topologically sorted: {op} references "
+                "an earlier operation"
+            )
+        for child in op.children:
+            self._parents_of_nodes[child].append(name)
+        if not op.children:
+            self._tails.append(name)
+        if op.block is not None:
+            self.blocks[name] = op.block
+
+        inputs = self._pending_mappings.pop(name, None)
+        if inputs is not None:
+            if invalid := self._check_inputs(name, inputs):
+                return invalid
+        elif len(parent_names) > 1:
+            self._unmapped[name] = len(self._nodes)
+            self._nodes.append(op)
+            return None
+        else:
+            # With at most one parent, a mapping (if any arrives later) can only
+            # name that parent, so the inputs are already known.
+            inputs = tuple(parent_names)
+        self._nodes.append(self._node(op, inputs))
+        return None
+
+    def add_argument_mapping(self, mapping: ArgumentMapping) -> Optional[InvalidDAG]:
+        name = mapping.op_name
+        if name in self._mapped_names:
+            return InvalidDAG(message=f"Input has duplicate mappings for {name}")
+        self._mapped_names.add(name)
+        if name not in self._seen_names:
+            self._pending_mappings[name] = mapping.inputs
+            return None
+        if invalid := self._check_inputs(name, mapping.inputs):
+            return invalid
+        index = self._unmapped.pop(name, None)
+        if index is not None:
+            op = self._nodes[index]
+            assert isinstance(op, Operation)
+            self._nodes[index] = self._node(op, mapping.inputs)
+        return None
+
+    def finish(self) -> Union[PrevalidatedDAG, InvalidDAG]:
+        if not self._nodes:
+            return InvalidDAG(message="Input contains no operations")
+        if self._pending_mappings:
+            return InvalidDAG(
+                message="ArgumentMappings must all reference ops in operations: "
+                f"{sorted(self._pending_mappings)}"
+            )
+        if self._unmapped:
+            name = next(iter(self._unmapped))
+            return InvalidDAG(
+                message=f"Input has invalid mappings: {name} has parents "
+                f"{self._parents_of_nodes[name]} but no argument mapping"
+            )
+        missing = self._parents_of_nodes.keys() - self._seen_names
+        if missing:
+            return InvalidDAG(
+                message=f"Input references missing operations: {sorted(missing)}"
+            )
+        if len(self._tails) != 1:
+            return InvalidDAG(
+                message=f"Input has {len(self._tails)} tails: {self._tails}"
+            )
+        return unvalidated_construct(PrevalidatedDAG, nodes=tuple(self._nodes))
+
+    def _check_inputs(self, name: str, inputs: Tuple[str, ...]) -> Optional[InvalidDAG]:
+        if len(set(inputs)) != len(inputs):
+            return InvalidDAG(
+                message=f"Input has duplicate inputs: {name} has {inputs=}"
+            )
+        parent_names = self._parents_of_nodes.get(name, [])
+        if set(parent_names) != set(inputs):
+            return InvalidDAG(
+                message=f"Input has invalid mappings: {name} has parents "
+                f"{parent_names} but has these mappings: {{'inputs': {inputs}}}"
+            )
+        return None
+
+    @staticmethod
+    def _node(op: Operation, inputs: Tuple[str, ...]) -> PrevalidatedNode:
+        # The operation has validated its fields, and the inputs were checked
+        # against its parents, so the node is built directly.
+        return unvalidated_construct(
+            PrevalidatedNode,
+            name=op.name,
+            node_class=op.op_name,
+            children=op.children,
+            input_nodes=inputs,
+        )
+
+
+class _JSONReader:
+    """
+    Pulls JSON out of a text file a chunk at a time. Objects and arrays can be
+    walked member by member, with anything below that decoded in one go by
+    `json`. Only the unconsumed end of the current chunk is ever buffered.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+
+    def members(self) -> Iterator[str]:
+        """
+        Yields each key of an object. The caller must consume the key's value
+        before the next key is read.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key, got {key!r}")
+            self._expect(":")
+            yield key
+            if self._separator("}"):
+                return
+
+    def elements(self) -> Iterator[Any]:
+        """Yields each element of an array, decoded."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self.value()
+            if self._separator("]"):
+                return
+
+    def value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                # The value may just run past the end of the buffer.
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the file.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def end(self) -> None:
+        if self._peek():
+            raise ValueError("Unexpected data after the end of the document")
+
+    def _separator(self, closing: str) -> bool:
+        character = self._peek()
+        self._position += 1
+        if character == closing:
+            return True
+        if character != ",":
+            raise ValueError(f"Expected ',' or {closing!r}, got {character!r}")
+        return False
+
+    def _expect(self, character: str) -> None:
+        found = self._peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r}, got {found!r}")
+        self._position += 1
+
+    def _peek(self) -> str:
+        # Skips whitespace, returning the next character (or "" at the end).
+        # Compact JSON has no whitespace to skip, so that case is checked first.
+        if self._position < len(self._buffer):
+            character = self._buffer[self._position]
+            if character not in _WHITESPACE:
+                return character
+        while True:
+            match = _NON_WHITESPACE.search(self._buffer, self._position)
+            if match:
+                self._position = match.start()
+                return self._buffer[self._position]
+            self._position = len(self._buffer)
+            if not self._fill():
+                return ""
+
+    def _fill(self) -> bool:
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
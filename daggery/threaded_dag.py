@@ -0,0 +1,294 @@
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from functools import cached_property, partial
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Deque,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from typing_extensions import Self
+
+from .dag import DAGNode, FunctionDAG, logger
+from .utils.construction import trusted_construct
+
+_default_executor: Optional[ThreadPoolExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def default_executor() -> ThreadPoolExecutor:
+    """
+    The thread pool shared by every `ThreadedFunctionDAG` not given its own,
+    with a worker per CPU. It is created on first use.
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(
+                os.cpu_count() or 1, thread_name_prefix="daggery"
+            )
+        return _default_executor
+
+
+class ThreadedFunctionDAG(FunctionDAG, frozen=True):
+    """
+    A `FunctionDAG` whose independent nodes are evaluated in parallel on a
+    thread pool. This pays off for nodes that release the GIL (e.g. NumPy,
+    compression or hashing of large buffers, or blocking I/O), and for any
+    nodes on free-threaded builds of CPython.
+
+    Each node is started as soon as all of its inputs are ready, by counting
+    down the unfinished inputs of each node. The thread finishing a node goes
+    on to evaluate one of the nodes it made ready, and queues the others for
+    the pool, so a linear run of nodes stays on one thread. The calling thread
+    takes part too, starting with the head and then taking queued nodes
+    until the DAG is evaluated, so evaluations never wait on a busy pool (and
+    DAGs can be evaluated by the nodes of other DAGs). DAGs without any
+    branches are evaluated as by `FunctionDAG`.
+
+    Thread safety: `evaluate` can be called from any number of threads at
+    once, as every evaluation keeps its own state. Nodes are evaluated
+    concurrently with other nodes, and with themselves across concurrent
+    evaluations, so their `evaluate` methods must be thread-safe - as they are
+    if, like the nodes themselves, they mutate nothing. A node's output may
+    be read concurrently by all of its children, so children must not mutate
+    their inputs. `compile` still generates a sequential function.
+    """
+
+    _derived: ClassVar[Tuple[str, ...]] = FunctionDAG._derived + ("_submitted_steps",)
+
+    def evaluate(self, value: Any) -> Any:
+        plan = self.plan
+        if len(plan.segments) == 1:
+            return super().evaluate(value)
+        log_node = self._pretty_log_node if logger.isEnabledFor(logging.INFO) else None
+        executor = self.executor or default_executor()
+        submitted = self._submitted_steps
+        steps = plan.steps
+        consumers, num_dependencies, slot_uses = plan.dependencies
+        slots = plan.new_slots(value)
+        waiting_on = list(num_dependencies)
+        uses_left = list(slot_uses)
+        tail = len(steps) - 1
+        # Guards the evaluation's state, and wakes the calling thread when
+        # steps are queued or the evaluation finishes.
+        condition = threading.Condition()
+        # Steps that are ready, but not yet taken by any thread.
+        queued: Deque[int] = deque()
+        finished: Future = Future()
+
+        def fail(e: BaseException) -> None:
+            with condition:
+                if not finished.done():
+                    finished.set_exception(e)
+                condition.notify()
+
+        def complete(
+            index: int, arguments: Tuple[Any, ...], output_value: Any
+        ) -> list[int]:
+            # Records the output of the step at `index`, returning the steps
+            # this makes ready.
+            step = steps[index]
+            ready: list[int] = []
+            # The lock orders writes to the slots before the reads of
+            # whichever thread evaluates each consumer. It also keeps the log
+            # lines of each node together.
+            with condition:
+                if finished.done():
+                    return ready
+                if log_node is not None:
+                    log_node(step.node, arguments, output_value)
+                if index == tail:
+                    finished.set_result(output_value)
+                    condition.notify()
+                    return ready
+                slots[step.output_slot] = output_value
+                for slot in step.input_slots:
+                    uses_left[slot] -= 1
+                    if not uses_left[slot]:
+                        slots[slot] = None
+                for consumer in consumers[index]:
+                    waiting_on[consumer] -= 1
+                    if not waiting_on[consumer]:
+                        ready.append(consumer)
+            return ready
+
+        def queue(indices: Sequence[int]) -> None:
+            # Hands steps to the calling thread and the pool, whichever takes
+            # each first.
+            if not indices:
+                return
+            with condition:
+                queued.extend(indices)
+                condition.notify()
+            for _ in indices:
+                executor.submit(run_queued)
+
+        def run(index: Optional[int]) -> None:
+            # Evaluates the step at `index`, then (on this thread) one of the
+            # steps it makes ready, and so on.
+            while index is not None and not finished.done():
+                step = steps[index]
+                inputs = step.get_inputs(slots)
+                arguments = (inputs,) if step.single_input else inputs
+                submit = submitted.get(index)
+                try:
+                    if submit is not None:
+                        # This thread moves on rather than waiting for the
+                        # step, which is completed by `on_done`.
+                        future = submit(*arguments)
+                        future.add_done_callback(partial(on_done, index, arguments))
+                        return
+                    output_value = step.evaluate(*arguments)
+                except BaseException as e:
+                    fail(e)
+                    return
+                ready = complete(index, arguments, output_value)
+                # Nothing is held on to while evaluating the next step.
+                del inputs, arguments, output_value
+                queue(ready[1:])
+                index = ready[0] if ready else None
+
+        def on_done(index: int, arguments: Tuple[Any, ...], future: Future) -> None:
+            # Runs on whichever thread finished the future, so the steps this
+            # makes ready are all queued rather than evaluated here.
+            try:
+                output_value = future.result()
+            except BaseException as e:
+                fail(e)
+                return
+            queue(complete(index, arguments, output_value))
+
+        def run_queued() -> None:
+            # The step may already have been taken by the calling thread.
+            try:
+                index = queued.popleft()
+            except IndexError:
+                return
+            run(index)
+
+        run(0)
+        # Rather than only waiting on the pool, the calling thread takes
+        # queued steps too. The pool's threads may all be busy, or waiting on
+        # this thread, as when it is one of them (e.g. when a DAG is evaluated
+        # by a node of another).
+        while True:
+            with condition:
+                while not queued and not finished.done():
+                    condition.wait()
+                if finished.done():
+                    break
+                index = queued.popleft()
+            run(index)
+        return finished.result()
+
+    def evaluate_many(
+        self, inputs: Iterable[Any], max_concurrency: int = 1, ordered: bool = True
+    ) -> Iterator[Any]:
+        """
+        Evaluates the DAG for each of `inputs` (each in parallel, as for
+        `evaluate`), with up to `max_concurrency` evaluations in flight at
+        once. Outputs are yielded as by `FunctionDAG.evaluate_many`, though
+        with `ordered` unset they are yielded as evaluations finish. If an
+        evaluation raises, evaluations not yet started are cancelled and the
+        exception is raised from here.
+
+        With `max_concurrency` above 1, the evaluations are run by the
+        executor, each taking part in its own evaluation as the calling thread
+        does in `evaluate`.
+        """
+        if max_concurrency < 1:
+            raise ValueError("evaluate_many max_concurrency must be >= 1")
+        remaining = enumerate(inputs)
+        if max_concurrency == 1:
+            for index, value in remaining:
+                output_value = self.evaluate(value)
+                yield output_value if ordered else (index, output_value)
+            return
+
+        executor = self.executor or default_executor()
+        evaluate = self.evaluate
+        if ordered:
+            pending: Deque[Future] = deque(
+                executor.submit(evaluate, value)
+                for _, value in islice(remaining, max_concurrency)
+            )
+            try:
+                while pending:
+                    output_value = pending.popleft().result()
+                    for _, value in islice(remaining, 1):
+                        pending.append(executor.submit(evaluate, value))
+                    yield output_value
+            finally:
+                for future in pending:
+                    future.cancel()
+            return
+
+        running: dict[Future, int] = {
+            executor.submit(evaluate, value): index
+            for index, value in islice(remaining, max_concurrency)
+        }
+        # Finished futures not yet yielded, last first.
+        finished: list[Tuple[int, Future]] = []
+        try:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                finished = sorted(
+                    ((running.pop(future), future) for future in done), reverse=True
+                )
+                for index, value in islice(remaining, len(done)):
+                    running[executor.submit(evaluate, value)] = index
+                while finished:
+                    index, future = finished.pop()
+                    yield index, future.result()
+        finally:
+            for future in running:
+                future.cancel()
+
+    @cached_property
+    def executor(self) -> Optional[Executor]:
+        """
+        Evaluates the DAG's nodes. Unless set with `with_executor`, this is
+        None, meaning the pool returned by `default_executor`.
+        """
+        return None
+
+    def with_executor(self, executor: Optional[Executor]) -> Self:
+        """
+        Returns a copy of this DAG evaluated on `executor`, which should be a
+        `ThreadPoolExecutor` (or otherwise run callables in this process). The
+        copy shares its nodes with this DAG, and compares equal to it.
+        """
+        dag = self._from_ordered_nodes(self.nodes)
+        dag.__dict__["executor"] = executor
+        return dag
+
+    @cached_property
+    def _submitted_steps(self) -> dict[int, Callable[..., Future]]:
+        # The steps evaluated elsewhere (e.g. by another process), by index in
+        # the plan, each mapped to a function taking the step's arguments and
+        # returning a future of its output.
+        return {}
+
+    def _from_ordered_nodes(self, nodes: Tuple[DAGNode, ...]) -> Self:
+        # Edited DAGs keep the executor of the original.
+        dag = trusted_construct(type(self), nodes=nodes)
+        if "executor" in self.__dict__:
+            dag.__dict__["executor"] = self.executor
+        return dag
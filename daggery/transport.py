@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, NamedTuple, Optional, Tuple
+
+# Buffers smaller than this are pickled as usual, as copying them through a
+# pipe is cheaper than setting up shared memory.
+DEFAULT_MIN_SIZE = 1 << 20
+
+
+class SharedBuffer(NamedTuple):
+    # The name of the shared memory segment holding the buffer.
+    name: str
+    # Whether the buffer is a NumPy array, rather than any other buffer.
+    array: bool
+    # The dtype of the array, or the format of the buffer's memoryview.
+    dtype: Any
+    shape: Tuple[int, ...]
+    nbytes: int
+
+
+class _Segment(SharedMemory):
+    # A `SharedMemory` closes its mapping when garbage collected, which fails
+    # if a view of the mapping is still alive. Segments instead leave their
+    # mapping to be closed along with the last view of it (the mapping holds a
+    # file descriptor of its own).
+    def __del__(self) -> None:
+        fd: int = getattr(self, "_fd", -1)
+        if fd >= 0:
+            os.close(fd)
+            self._fd = -1
+
+
+class SharedMemoryTransport:
+    """
+    Sends large buffers between the processes of a `ProcessFunctionDAG`
+    through shared memory, rather than pickling them through a pipe (copying
+    them twice, and holding both copies at once).
+
+    A NumPy array, or any other object supporting the buffer protocol, of at
+    least `min_size` bytes is copied once into a shared memory segment, and
+    only a `SharedBuffer` handle is sent. The receiver maps the segment rather
+    than copying it. Arrays arrive as arrays, and other buffers as read-only
+    memoryviews of the same format and shape. Arrays of Python objects, and
+    buffers that are not contiguous, are pickled.
+
+    Segments are unlinked deterministically: a block input once every block
+    reading it (in flight at once) has finished, and a block output as soon
+    as it is received. Its memory is then freed along with the last view of
+    it, which (for an output) is once the last node reading it has been
+    evaluated, or once the caller drops the DAG's output. Block inputs are
+    mapped read-only, as several workers may read them at once.
+
+    This relies on a segment outliving the processes mapping it until it is
+    unlinked, so is not supported on Windows.
+    """
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE):
+        if os.name == "nt":
+            raise NotImplementedError(
+                "SharedMemoryTransport is not supported on Windows"
+            )
+        if min_size < 1:
+            raise ValueError(
+                "A SharedMemoryTransport must have a min_size of at least 1"
+            )
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        # The segments of values sent to workers, by id of the value, along
+        # with their handles and the number of blocks reading them.
+        self._sent: dict[int, list[Any]] = {}
+
+    def __reduce__(self) -> Any:
+        # Each worker gets a transport of its own.
+        return (type(self), (self.min_size,))
+
+    def export(self, value: Any) -> Any:
+        """
+        Copies `value` into a new segment and returns its handle, if it is a
+        large enough buffer. Otherwise `value` is returned as is. The segment
+        must be unlinked by its receiver.
+        """
+        shared = self._share(value)
+        if shared is None:
+            return value
+        handle, segment = shared
+        segment.close()
+        return handle
+
+    def open(self, value: Any, unlink: bool) -> Any:
+        """
+        Returns a view of the buffer in the segment handled by `value`,
+        unlinking the segment if `unlink` is set. Anything other than a
+        `SharedBuffer` is returned as is.
+        """
+        if type(value) is not SharedBuffer:
+            return value
+        segment = _Segment(value.name)
+        if unlink:
+            segment.unlink()
+        if value.array:
+            import numpy as np
+
+            array = np.ndarray(value.shape, value.dtype, buffer=segment.buf)
+            if not unlink:
+                array.flags.writeable = False
+            return array
+        buffer = segment.buf
+        assert buffer is not None
+        return buffer[: value.nbytes].cast(value.dtype, value.shape).toreadonly()
+
+    def acquire(self, value: Any) -> Any:
+        """
+        Returns what to send to a worker in place of `value`: the handle of a
+        segment holding it (shared with any blocks already sent it), or
+        `value` itself. Each call must be matched by a call to `release` once
+        the worker is done with it.
+        """
+        with self._lock:
+            sent = self._sent.get(id(value))
+            if sent is None:
+                shared = self._share(value)
+                if shared is None:
+                    return value
+                handle, segment = shared
+                # Unlinking the segment later does not need it mapped here.
+                segment.close()
+                sent = self._sent[id(value)] = [handle, segment, 0]
+            sent[2] += 1
+            return sent[0]
+
+    def release(self, value: Any) -> None:
+        """
+        Unlinks the segment holding `value` once no block is reading it.
+        """
+        with self._lock:
+            sent = self._sent.get(id(value))
+            if sent is None:
+                return
+            sent[2] -= 1
+            if sent[2]:
+                return
+            del self._sent[id(value)]
+        sent[1].unlink()
+
+    def _share(self, value: Any) -> Optional[Tuple[SharedBuffer, _Segment]]:
+        # Returns the handle and (mapped) segment holding a copy of `value`,
+        # or None if it should be pickled instead.
+        np = sys.modules.get("numpy")
+        if np is not None and isinstance(value, np.ndarray):
+            if value.nbytes < self.min_size or value.dtype.hasobject:
+                return None
+            segment = _Segment(create=True, size=value.nbytes)
+            np.ndarray(value.shape, value.dtype, buffer=segment.buf)[...] = value
+            handle = SharedBuffer(
+                segment.name, True, value.dtype, value.shape, value.nbytes
+            )
+            return handle, segment
+        try:
+            view = memoryview(value)
+        except TypeError:
+            return None
+        if view.nbytes < self.min_size or not view.c_contiguous:
+            return None
+        view_format: Any = view.format
+        shape = view.shape or ()
+        try:
+            data = view.cast("B")
+            # The receiver casts the bytes back to the original format, which
+            # only works for native, single character formats.
+            data.cast(view_format, shape)
+        except (TypeError, ValueError):
+            return None
+        segment = _Segment(create=True, size=view.nbytes)
+        buffer = segment.buf
+        assert buffer is not None
+        buffer[: view.nbytes] = data
+        handle = SharedBuffer(segment.name, False, view_format, shape, view.nbytes)
+        return handle, segment
@@ -0,0 +1,155 @@
+from functools import lru_cache
+from typing import Any, Callable, Tuple, TypeVar
+from weakref import WeakValueDictionary
+
+from pydantic import BaseModel
+
+from ..runtime import RuntimeNode
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+RuntimeNodeT = TypeVar("RuntimeNodeT", bound=RuntimeNode)
+
+_new = object.__new__
+_setattr = object.__setattr__
+
+# Interned nodes, keyed on their class, name and children, and interned DAG
+# nodes, keyed on their class, (the id of) their node and their inputs. Entries
+# disappear once no DAG holds the node any more.
+_interned_nodes: "WeakValueDictionary[Tuple[Any, ...], Any]" = WeakValueDictionary()
+
+
+@lru_cache(maxsize=1024)
+def supports_trusted_construction(
+    model_class: type[BaseModel], field_names: Tuple[str, ...]
+) -> bool:
+    """
+    Whether instances of `model_class` can be built from values for exactly
+    `field_names` without running pydantic validation.
+
+    This is only the case when validation could not have done anything beyond
+    checking the types of those values: the class declares no validators or
+    post-init hooks, does not override `__init__`, has no private attributes
+    or extra fields to initialise, and every field is provided.
+    """
+    decorators = model_class.__pydantic_decorators__
+    has_validators = bool(
+        decorators.validators
+        or decorators.field_validators
+        or decorators.root_validators
+        or decorators.model_validators
+    )
+    has_hooks = (
+        model_class.__init__ is not BaseModel.__init__
+        or model_class.__pydantic_post_init__ is not None
+        or bool(model_class.__private_attributes__)
+        or model_class.model_config.get("extra") == "allow"
+    )
+    all_fields_given = set(model_class.model_fields) == set(field_names)
+    return not has_validators and not has_hooks and all_fields_given
+
+
+def trusted_construct(model_class: type[ModelT], **values: Any) -> ModelT:
+    """
+    Instantiates a model from values that are already known to be valid (e.g.
+    they were checked by `PrevalidatedDAG`), skipping pydantic validation for
+    classes that support it and falling back to validation otherwise.
+    """
+    if not supports_trusted_construction(model_class, tuple(values)):
+        return model_class(**values)
+    return unvalidated_construct(model_class, **values)
+
+
+def unvalidated_construct(model_class: type[ModelT], **values: Any) -> ModelT:
+    """
+    Instantiates a model without running any of its validators. Unlike
+    `trusted_construct`, this does not check the class supports it - it is for
+    callers that have performed the class's own validation themselves.
+
+    This is cheaper than both validation and `model_construct`, since it only
+    sets the attributes pydantic itself would have set.
+    """
+    # `object.__new__` still refuses to instantiate abstract classes.
+    instance = _new(model_class)
+    _setattr(instance, "__dict__", values)
+    _setattr(instance, "__pydantic_fields_set__", set(values))
+    _setattr(instance, "__pydantic_extra__", None)
+    _setattr(instance, "__pydantic_private__", None)
+    return instance
+
+
+def node_factory(
+    node_class: type[ModelT], trusted: bool = False, interned: bool = False
+) -> Callable[[str, Tuple[str, ...]], ModelT]:
+    """
+    Returns a function instantiating `node_class` from a name and children.
+    When `trusted` is set, these are assumed to have been validated already,
+    and pydantic validation is skipped for classes that support it.
+
+    The check is made once here rather than per node, since DAG construction
+    typically instantiates many nodes of the same few classes.
+
+    When `interned` is set (and the class is frozen), a node with the same
+    class, name and children as one still alive is reused rather than built
+    again. Frozen nodes are interchangeable, so DAGs built from the same (or
+    overlapping) graphs can share their nodes.
+    """
+    build = _node_factory(node_class, trusted)
+    if not interned or not node_class.model_config.get("frozen", False):
+        return build
+
+    def intern(name: str, children: Tuple[str, ...]) -> ModelT:
+        key = (node_class, name, children)
+        node = _interned_nodes.get(key)
+        if node is None:
+            node = build(name, children)
+            _interned_nodes[key] = node
+        return node
+
+    return intern
+
+
+def dag_node_factory(
+    dag_node_class: type[RuntimeNodeT], trusted: bool = False
+) -> Callable[[Any, Tuple[str, ...]], RuntimeNodeT]:
+    """
+    Returns a function wrapping a node, along with the names of its inputs, in
+    `dag_node_class`. Wrappers are interned like the nodes of `node_factory`,
+    so a DAG built from the same nodes and inputs as another shares those
+    wrappers too. When `trusted` is set, the values are not checked.
+    """
+
+    construct = dag_node_class.trusted if trusted else dag_node_class
+
+    def build(naked_node: Any, input_nodes: Tuple[str, ...]) -> RuntimeNodeT:
+        # The wrapper holds its node, so the node's id cannot be reused while
+        # the entry is alive.
+        key = (dag_node_class, id(naked_node), input_nodes)
+        dag_node = _interned_nodes.get(key)
+        if dag_node is None:
+            dag_node = construct(naked_node, input_nodes)
+            _interned_nodes[key] = dag_node
+        return dag_node
+
+    return build
+
+
+def _node_factory(
+    node_class: type[ModelT], trusted: bool
+) -> Callable[[str, Tuple[str, ...]], ModelT]:
+    if trusted and supports_trusted_construction(node_class, ("name", "children")):
+
+        def construct(name: str, children: Tuple[str, ...]) -> ModelT:
+            # `object.__new__` still refuses to instantiate abstract classes.
+            instance = _new(node_class)
+            _setattr(instance, "__dict__", {"name": name, "children": children})
+            _setattr(instance, "__pydantic_fields_set__", {"name", "children"})
+            _setattr(instance, "__pydantic_extra__", None)
+            _setattr(instance, "__pydantic_private__", None)
+            return instance
+
+        return construct
+
+    def validate(name: str, children: Tuple[str, ...]) -> ModelT:
+        return node_class(name=name, children=children)
+
+    return validate
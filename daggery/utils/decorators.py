@@ -1,8 +1,6 @@
 import time
 from functools import wraps
 
-import requests
-
 
 def logged(logger):
     """
@@ -90,6 +88,10 @@ def http_client(base_url):
     """
 
     def client(ep, pl):
+        # Imported here, as `requests` is slow to import and only needed once
+        # a request is actually made.
+        import requests
+
         return requests.post(base_url + ep, json=pl)
 
     def decorator(method):
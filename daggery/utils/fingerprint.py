@@ -0,0 +1,27 @@
+from hashlib import blake2b
+from typing import Iterable, Tuple
+
+# Record digests are summed modulo this, so that a fingerprint is as wide as
+# each digest.
+_MODULUS = 1 << 256
+
+
+def structural_fingerprint(
+    records: Iterable[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]],
+) -> str:
+    """
+    Computes a fingerprint of a graph from one record per node, each holding
+    the node's name, op name, children and (ordered) inputs.
+
+    Each record is hashed on its own and the digests are summed, so the result
+    does not depend on the order of the records, and is computed in linear time.
+    Children are sorted first, since their order has no bearing on the graph.
+    """
+    total = 0
+    for name, op_name, children, inputs in records:
+        # The repr of a tuple of strings is unambiguous, and quicker to build
+        # than an equivalent JSON encoding.
+        encoded = repr((name, op_name, sorted(children), tuple(inputs))).encode()
+        digest = blake2b(encoded, digest_size=32).digest()
+        total += int.from_bytes(digest, "little")
+    return (total % _MODULUS).to_bytes(32, "little").hex()
@@ -1,6 +1,33 @@
 import logging
 
-import colorlog
+
+class _ColoredFormatter(logging.Formatter):
+    # Defers importing `colorlog` (and building its formatter) until the first
+    # record is actually emitted, since most imports of daggery never log.
+    def __init__(self):
+        super().__init__()
+        self._formatter = None
+
+    def format(self, record: logging.LogRecord) -> str:
+        if self._formatter is None:
+            import colorlog
+
+            self._formatter = colorlog.ColoredFormatter(
+                fmt=(
+                    "%(log_color)s%(levelname)s%(reset)s: %(asctime)s [%(name)s]  "
+                    "%(message)s"
+                ),
+                datefmt=None,
+                reset=True,
+                log_colors={
+                    "DEBUG": "cyan",
+                    "INFO": "green",
+                    "WARNING": "yellow",
+                    "ERROR": "red",
+                    "CRITICAL": "red,bg_white",
+                },
+            )
+        return self._formatter.format(record)
 
 
 def logger_factory(name: str) -> logging.Logger:
@@ -14,19 +41,7 @@ def logger_factory(name: str) -> logging.Logger:
     console_handler.setLevel(logging.INFO)
 
     # Create a color formatter and set it for the handler
-    formatter = colorlog.ColoredFormatter(
-        fmt="%(log_color)s%(levelname)s%(reset)s: %(asctime)s [%(name)s]  %(message)s",
-        datefmt=None,
-        reset=True,
-        log_colors={
-            "DEBUG": "cyan",
-            "INFO": "green",
-            "WARNING": "yellow",
-            "ERROR": "red",
-            "CRITICAL": "red,bg_white",
-        },
-    )
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_ColoredFormatter())
 
     # Add the handler to the logger
     logger.addHandler(console_handler)
@@ -1,10 +1,14 @@
-from fastapi import FastAPI
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
+from daggery.cache import DAGCache
 from daggery.dag import FunctionDAG
 from daggery.description import DAGDescription
 from daggery.node import Node
 from daggery.prevalidate import InvalidDAG
+from daggery.registry import DAGRegistry
 from daggery.utils.decorators import logged, timed
 from daggery.utils.logging import logger_factory
 
@@ -56,6 +60,20 @@ custom_op_node_map: dict[str, type[Node]] = {
     "quux": Quux,
 }
 
+# Clients tend to send the same graphs repeatedly, so constructed DAGs are cached
+# rather than rebuilt (and revalidated) on every request.
+dag_cache = DAGCache(maxsize=512, ttl=3600)
+
+# The service's own catalogue of DAGs is built once, from the files in `dags/`.
+# Edited files are rebuilt (at most once a second) and swapped in, without
+# restarting the service or disturbing requests already being evaluated.
+dag_registry = DAGRegistry(
+    Path(__file__).parent / "dags",
+    FunctionDAG,
+    custom_op_node_map,
+    poll_interval=1.0,
+)
+
 
 # In this example, clients not only provide inputs, but also the desired graph
 # to evaluate.
@@ -73,12 +91,14 @@ def construct_graph(
     evaluate_request: EvaluateRequest,
 ) -> FunctionDAG | InvalidDAG:
     if isinstance(evaluate_request.operations, str):
-        return FunctionDAG.from_string(
+        return dag_cache.from_string(
+            FunctionDAG,
             dag_description=evaluate_request.operations,
             custom_op_node_map=custom_op_node_map,
         )
     else:
-        return FunctionDAG.from_dag_description(
+        return dag_cache.from_dag_description(
+            FunctionDAG,
             dag_description=evaluate_request.operations,
             custom_op_node_map=custom_op_node_map,
         )
@@ -113,3 +133,28 @@ async def process_evaluate_request(evaluate_request: EvaluateRequest):
             f"Result after evaluation: {result}"
         )
     )
+
+
+class EvaluateNamedRequest(BaseModel):
+    value: int
+
+
+@app.post("/evaluate/{dag_name}", response_model=EvaluateResponse)
+async def process_evaluate_named_request(
+    dag_name: str, evaluate_request: EvaluateNamedRequest
+):
+    """
+    This endpoint evaluates one of the service's own DAGs, named after its file
+    in `dags/`, with the given value.
+    """
+    dag = dag_registry.get(dag_name)
+    if dag is None:
+        raise HTTPException(status_code=404, detail=f"No DAG named {dag_name}")
+
+    result = dag.evaluate(evaluate_request.value)
+    return EvaluateResponse(
+        message=(
+            f"Evaluated DAG {dag_name} with value: {evaluate_request.value}. "
+            f"Result after evaluation: {result}"
+        )
+    )
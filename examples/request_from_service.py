@@ -40,6 +40,13 @@ def main():
     else:
         print("Error:", response.text)
 
+    # Example 3: A DAG from the service's own catalogue, named after its file
+    response = requests.post(f"{service_url}/foo_bar_baz", json={"value": 5})
+    if response.status_code == 200:
+        print("Catalogue request result:", response.json())
+    else:
+        print("Error:", response.text)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,231 @@
+import asyncio
+import weakref
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+
+# Nodes and DAGs shared between test modules. Node classes and op node maps
+# are used when test modules are imported (e.g. to build maps of their own),
+# so they are imported from here rather than provided as fixtures.
+
+
+class AddNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        return value + 1
+
+
+class MultiplyNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        return value * 2
+
+
+class ExpNode(Node, frozen=True):
+    def evaluate(self, base: float, exponent: float) -> float:
+        return base**exponent
+
+
+mock_op_node_map: dict[str, type[Node]] = {
+    "add": AddNode,
+    "mul": MultiplyNode,
+    "exp": ExpNode,
+}
+
+
+class AddAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        await asyncio.sleep(0)
+        return value + 1
+
+
+class MultiplyAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        await asyncio.sleep(0)
+        return value * 2
+
+
+class ExpAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, base: float, exponent: float) -> float:
+        await asyncio.sleep(0)
+        return base**exponent
+
+
+mock_async_op_node_map: dict[str, type[AsyncNode]] = {
+    "add": AddAsyncNode,
+    "mul": MultiplyAsyncNode,
+    "exp": ExpAsyncNode,
+}
+
+
+def diamond_description() -> DAGDescription:
+    ops = OperationSequence(
+        ops=(
+            Operation(name="add0", op_name="add", children=("add1", "mul0")),
+            Operation(name="add1", op_name="add", children=("exp0",)),
+            Operation(name="mul0", op_name="mul", children=("exp0",)),
+            Operation(name="exp0", op_name="exp"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="exp0", inputs=("mul0", "add1")),)
+    return DAGDescription(operations=ops, argument_mappings=mappings)
+
+
+def diamond_dag() -> FunctionDAG:
+    return FunctionDAG.throwable_from_dag_description(
+        diamond_description(), mock_op_node_map
+    )
+
+
+def async_diamond_dag() -> AsyncFunctionDAG:
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        diamond_description(), mock_async_op_node_map
+    )
+
+
+# Every buffer allocated during a test, so that nodes can count the live ones.
+allocated: list[weakref.ref] = []
+
+
+class Buffer:
+    pass
+
+
+def allocate() -> "Buffer":
+    buffer = Buffer()
+    allocated.append(weakref.ref(buffer))
+    return buffer
+
+
+def count_live() -> int:
+    return sum(ref() is not None for ref in allocated)
+
+
+class AllocateAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, *values) -> Buffer:
+        # The event loop holds on to a finished `gather` (and so its results)
+        # until the awaiting task next suspends, as real nodes would.
+        await asyncio.sleep(0)
+        return allocate()
+
+
+class CountLiveAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, *values) -> int:
+        return count_live()
+
+
+def wide_description() -> DAGDescription:
+    # alloc0 fans out to two chains of allocations, which count0 joins.
+    ops = OperationSequence(
+        ops=(
+            Operation(name="alloc0", op_name="alloc", children=("alloc1", "alloc3")),
+            Operation(name="alloc1", op_name="alloc", children=("alloc2",)),
+            Operation(name="alloc2", op_name="alloc", children=("count0",)),
+            Operation(name="alloc3", op_name="alloc", children=("alloc4",)),
+            Operation(name="alloc4", op_name="alloc", children=("count0",)),
+            Operation(name="count0", op_name="count"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="count0", inputs=("alloc2", "alloc4")),)
+    return DAGDescription(operations=ops, argument_mappings=mappings)
+
+
+# Set by the release node, and awaited by the wait node.
+released: dict[str, asyncio.Event] = {}
+cancelled: list[str] = []
+# The names of nodes in order of starting, and the number of nodes in flight.
+started: list[str] = []
+in_flight = {"now": 0, "max": 0}
+
+
+class WaitAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        await released["event"].wait()
+        return value
+
+
+class ReleaseAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        released["event"].set()
+        return value
+
+
+class SumAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, *values: float) -> float:
+        return sum(values)
+
+
+class FailAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        await asyncio.sleep(0)
+        raise ValueError("Node failed")
+
+
+class HangAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(self.name)
+            raise
+        return value
+
+
+class CancelAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, value: float) -> float:
+        # As when a node awaits something that is cancelled from elsewhere.
+        future = asyncio.get_running_loop().create_future()
+        future.cancel()
+        return await future
+
+
+class RecordAsyncNode(AsyncNode, frozen=True):
+    async def evaluate(self, *values: float) -> float:
+        started.append(self.name)
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0)
+        in_flight["now"] -= 1
+        return sum(values)
+
+
+scheduling_op_node_map: dict[str, type[AsyncNode]] = {
+    **mock_async_op_node_map,
+    "wait": WaitAsyncNode,
+    "release": ReleaseAsyncNode,
+    "sum": SumAsyncNode,
+    "fail": FailAsyncNode,
+    "hang": HangAsyncNode,
+    "cancel": CancelAsyncNode,
+    "rec": RecordAsyncNode,
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_nodes():
+    released["event"] = asyncio.Event()
+    cancelled.clear()
+    started.clear()
+    in_flight.update(now=0, max=0)
+    allocated.clear()
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def timer() -> FakeTimer:
+    return FakeTimer()
@@ -0,0 +1,152 @@
+import asyncio
+from typing import Any, ClassVar, Sequence, Tuple
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.batched_node import BatchedAsyncNode, _running
+from tests.conftest import mock_async_op_node_map
+
+# The size of each batch evaluated, in order.
+batch_sizes: list[int] = []
+
+
+class DoubleBatchedNode(BatchedAsyncNode, frozen=True):
+    batch_window: ClassVar[float] = 0.01
+
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        batch_sizes.append(len(calls))
+        await asyncio.sleep(0)
+        return [2 * value for (value,) in calls]
+
+
+class SmallBatchedNode(DoubleBatchedNode, frozen=True):
+    max_batch_size: ClassVar[int] = 4
+
+
+class FailBatchedNode(DoubleBatchedNode, frozen=True):
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        raise ValueError("Batch failed")
+
+
+class HangBatchedNode(DoubleBatchedNode, frozen=True):
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        await asyncio.Event().wait()
+        return []
+
+
+class ShortBatchedNode(DoubleBatchedNode, frozen=True):
+    async def evaluate_batch(self, calls: Sequence[Tuple[Any, ...]]) -> Sequence[Any]:
+        return []
+
+
+op_node_map: dict[str, type[AsyncNode]] = {
+    **mock_async_op_node_map,
+    "double": DoubleBatchedNode,
+    "small": SmallBatchedNode,
+    "fail": FailBatchedNode,
+    "hang": HangBatchedNode,
+    "short": ShortBatchedNode,
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_batch_sizes():
+    batch_sizes.clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_evaluations_are_coalesced():
+    dag = AsyncFunctionDAG.throwable_from_string("add >> double >> add", op_node_map)
+    outputs = await asyncio.gather(*(dag.evaluate(i) for i in range(10)))
+    assert outputs == [2 * (i + 1) + 1 for i in range(10)]
+    assert batch_sizes == [10]
+    # A lone evaluation is dispatched once the window closes.
+    assert await dag.evaluate(1) == 5
+    assert batch_sizes == [10, 1]
+
+
+@pytest.mark.asyncio
+async def test_equal_nodes_in_different_dags_are_coalesced():
+    dag = AsyncFunctionDAG.throwable_from_string("double >> add", op_node_map)
+    same = AsyncFunctionDAG.throwable_from_string("double >> add", op_node_map)
+    other = AsyncFunctionDAG.throwable_from_string("double >> mul", op_node_map)
+    outputs = await asyncio.gather(dag.evaluate(1), same.evaluate(2), other.evaluate(3))
+    assert outputs == [3, 5, 12]
+    # The double node of the last DAG has a different child.
+    assert sorted(batch_sizes) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped():
+    dag = AsyncFunctionDAG.throwable_from_string("small", op_node_map)
+    outputs = [output async for output in dag.evaluate_many(range(10))]
+    assert outputs == [2 * i for i in range(10)]
+    assert batch_sizes == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "op_name, message",
+    [
+        ("fail", "Batch failed"),
+        ("short", "short0 evaluate_batch returned 0 outputs for 3 calls"),
+    ],
+)
+async def test_batch_errors_are_raised_by_every_call(op_name, message):
+    dag = AsyncFunctionDAG.throwable_from_string(op_name, op_node_map)
+    results = await asyncio.gather(
+        *(dag.evaluate(i) for i in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert all(message in str(result) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_are_skipped():
+    dag = AsyncFunctionDAG.throwable_from_string("double", op_node_map)
+    cancelled = asyncio.ensure_future(dag.evaluate(1))
+    kept = asyncio.ensure_future(dag.evaluate(2))
+    # Lets both calls reach the node.
+    for _ in range(5):
+        await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await kept == 4
+    assert cancelled.cancelled()
+    assert batch_sizes == [2]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batches_cancel_every_call():
+    dag = AsyncFunctionDAG.throwable_from_string("hang", op_node_map)
+    calls = [asyncio.ensure_future(dag.evaluate(i)) for i in range(3)]
+    # Waits for the batch to be dispatched. Batches of earlier tests may not
+    # have been discarded before their event loop closed.
+    while not (batches := [task for task in _running if not task.done()]):
+        await asyncio.sleep(0.005)
+    (batch,) = batches
+    batch.cancel()
+    results = await asyncio.wait_for(
+        asyncio.gather(*calls, return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert batch.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_batches_cancelled_before_starting_cancel_every_call():
+    dag = AsyncFunctionDAG.throwable_from_string("small", op_node_map)
+    calls = [asyncio.ensure_future(dag.evaluate(i)) for i in range(4)]
+    # The last call dispatches the (full) batch, whose task is then seen here
+    # before its first step.
+    while not (batches := [task for task in _running if not task.done()]):
+        await asyncio.sleep(0)
+    (batch,) = batches
+    batch.cancel()
+    results = await asyncio.wait_for(
+        asyncio.gather(*calls, return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    # The batch was never evaluated.
+    assert batch_sizes == []
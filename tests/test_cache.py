@@ -0,0 +1,182 @@
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.cache import CacheInfo, DAGCache
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.prevalidate import InvalidDAG
+
+
+class Foo(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value * value
+
+
+class Bar(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value + 10
+
+
+class AsyncFoo(AsyncNode, frozen=True):
+    async def evaluate(self, value: int) -> int:
+        return value * value
+
+
+mock_op_node_map: dict[str, type[Node]] = {"foo": Foo, "bar": Bar}
+mock_async_op_node_map: dict[str, type[AsyncNode]] = {"foo": AsyncFoo}
+
+
+def test_cache_hit_returns_same_instance():
+    cache = DAGCache()
+    first = cache.from_string(FunctionDAG, "foo >> bar", mock_op_node_map)
+    second = cache.from_string(FunctionDAG, "foo >> bar", mock_op_node_map)
+    assert isinstance(first, FunctionDAG)
+    assert first is second
+    assert first.evaluate(2) == 14
+    assert cache.cache_info() == CacheInfo(hits=1, misses=1, maxsize=128, currsize=1)
+
+
+def test_cache_keyed_on_dag_description_contents():
+    cache = DAGCache()
+
+    def description() -> DAGDescription:
+        ops = OperationSequence(
+            ops=(
+                Operation(name="foo", op_name="foo", children=("bar",)),
+                Operation(name="bar", op_name="bar"),
+            )
+        )
+        return DAGDescription(operations=ops)
+
+    # Equal descriptions built independently share an entry.
+    first = cache.from_dag_description(FunctionDAG, description(), mock_op_node_map)
+    second = cache.from_dag_description(FunctionDAG, description(), mock_op_node_map)
+    assert first is second
+    assert cache.cache_info().hits == 1
+
+
+def test_cache_keyed_on_dag_description_fingerprint_and_order():
+    cache = DAGCache()
+    ops = (
+        Operation(name="foo", op_name="foo", children=("bar", "baz")),
+        Operation(name="bar", op_name="bar", children=("qux",)),
+        Operation(name="baz", op_name="bar", children=("qux",)),
+        Operation(name="qux", op_name="foo"),
+    )
+    mappings = (
+        ArgumentMapping(op_name="bar", inputs=("foo",)),
+        ArgumentMapping(op_name="qux", inputs=("bar", "baz")),
+    )
+
+    def description(ops, mappings=mappings) -> DAGDescription:
+        return DAGDescription(
+            operations=OperationSequence(ops=ops), argument_mappings=mappings
+        )
+
+    # Listing the argument mappings in a different order gives the same DAG.
+    first = cache.from_dag_description(FunctionDAG, description(ops), mock_op_node_map)
+    second = cache.from_dag_description(
+        FunctionDAG, description(ops, mappings[::-1]), mock_op_node_map
+    )
+    assert first is second
+    assert cache.cache_info().hits == 1
+
+    # Listing independent operations in a different order gives the same graph,
+    # but a DAG with its nodes in that order.
+    reordered = (ops[0], ops[2], ops[1], ops[3])
+    third = cache.from_dag_description(
+        FunctionDAG, description(reordered), mock_op_node_map
+    )
+    assert isinstance(first, FunctionDAG) and isinstance(third, FunctionDAG)
+    assert third is not first
+    assert [node.naked_node.name for node in third.nodes] == [
+        "foo",
+        "baz",
+        "bar",
+        "qux",
+    ]
+    assert cache.cache_info().hits == 1
+
+
+def test_cache_does_not_return_valid_dags_for_unsorted_descriptions():
+    cache = DAGCache()
+    ops = (
+        Operation(name="foo", op_name="foo", children=("bar",)),
+        Operation(name="bar", op_name="bar"),
+    )
+    dag = cache.from_dag_description(
+        FunctionDAG,
+        DAGDescription(operations=OperationSequence(ops=ops)),
+        mock_op_node_map,
+    )
+    assert isinstance(dag, FunctionDAG)
+    # The same graph, with its operations not topologically sorted.
+    unsorted = cache.from_dag_description(
+        FunctionDAG,
+        DAGDescription(operations=OperationSequence(ops=ops[::-1])),
+        mock_op_node_map,
+    )
+    assert isinstance(unsorted, InvalidDAG)
+    assert cache.cache_info().hits == 0
+
+
+def test_cache_keyed_on_dag_class_and_op_node_map_identity():
+    cache = DAGCache()
+    sync_dag = cache.from_string(FunctionDAG, "foo", mock_op_node_map)
+    async_dag = cache.from_string(AsyncFunctionDAG, "foo", mock_async_op_node_map)
+    other_map_dag = cache.from_string(FunctionDAG, "foo", dict(mock_op_node_map))
+    assert isinstance(sync_dag, FunctionDAG)
+    assert isinstance(async_dag, AsyncFunctionDAG)
+    assert other_map_dag is not sync_dag
+    assert cache.cache_info().misses == 3
+
+
+def test_cache_evicts_least_recently_used():
+    cache = DAGCache(maxsize=2)
+    foo = cache.from_string(FunctionDAG, "foo", mock_op_node_map)
+    cache.from_string(FunctionDAG, "bar", mock_op_node_map)
+    # Touch `foo` so that `bar` is the least recently used entry.
+    assert cache.from_string(FunctionDAG, "foo", mock_op_node_map) is foo
+    cache.from_string(FunctionDAG, "foo >> bar", mock_op_node_map)
+    assert cache.cache_info().currsize == 2
+    assert cache.from_string(FunctionDAG, "foo", mock_op_node_map) is foo
+    cache.from_string(FunctionDAG, "bar", mock_op_node_map)
+    assert cache.cache_info() == CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+
+
+def test_cache_evicts_expired_entries(timer):
+    cache = DAGCache(ttl=10, timer=timer)
+    first = cache.from_string(FunctionDAG, "foo", mock_op_node_map)
+    timer.now = 9.0
+    assert cache.from_string(FunctionDAG, "foo", mock_op_node_map) is first
+    timer.now = 10.0
+    assert cache.from_string(FunctionDAG, "foo", mock_op_node_map) is not first
+    assert cache.cache_info().misses == 2
+
+
+def test_cache_does_not_store_invalid_dags():
+    cache = DAGCache()
+    result = cache.from_string(FunctionDAG, "invalid", mock_op_node_map)
+    assert isinstance(result, InvalidDAG)
+    assert cache.cache_info().currsize == 0
+
+
+def test_cache_clear():
+    cache = DAGCache()
+    cache.from_string(FunctionDAG, "foo", mock_op_node_map)
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(hits=0, misses=0, maxsize=128, currsize=0)
+
+
+def test_cache_rejects_invalid_configuration():
+    with pytest.raises(ValueError, match="maxsize of at least 1"):
+        DAGCache(maxsize=0)
+    with pytest.raises(ValueError, match="ttl must be positive"):
+        DAGCache(ttl=0)
@@ -0,0 +1,71 @@
+import linecache
+import logging
+
+import pytest
+
+from tests.conftest import async_diamond_dag, diamond_dag
+
+
+def source_of(function) -> str:
+    return "".join(linecache.getlines(function.__code__.co_filename))
+
+
+def test_compiled_matches_evaluate():
+    dag = diamond_dag()
+    compiled = dag.compile()
+    for value in range(5):
+        assert compiled(value) == dag.evaluate(value)
+    # exp(mul(add(1)), add(add(1))) = 4 ** 3
+    assert compiled(1) == 64
+
+
+def test_compiled_source_is_straight_line():
+    source = source_of(diamond_dag().compile())
+    assert "for " not in source
+    assert "v4 = e3(v3, v2)" in source
+    assert source.rstrip().endswith("return v4")
+
+
+def test_compiled_sources_are_dropped_with_their_functions():
+    compiled = diamond_dag().compile()
+    filename = compiled.__code__.co_filename
+    assert filename in linecache.cache
+    del compiled
+    assert filename not in linecache.cache
+
+
+def test_compiled_logs_each_node(caplog):
+    compiled = diamond_dag().compile()
+    with caplog.at_level(logging.INFO, logger="daggery.dag"):
+        compiled(1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Node: exp0:" in messages
+    assert "  Input(s): ('4@mul0', '3@add1')" in messages
+    assert "  Output(s): 64" in messages
+
+
+@pytest.mark.asyncio
+async def test_compiled_async_matches_evaluate():
+    dag = async_diamond_dag()
+    compiled = dag.compile()
+    for value in range(5):
+        assert await compiled(value) == await dag.evaluate(value)
+    assert await compiled(1) == 64
+
+
+def test_compiled_async_gathers_only_diverging_batches():
+    source = source_of(async_diamond_dag().compile())
+    assert source.count("gather(") == 1
+    assert "v1 = await e0(v0)" in source
+    assert "v4 = await e3(v3, v2)" in source
+
+
+@pytest.mark.asyncio
+async def test_compiled_async_logs_each_node(caplog):
+    compiled = async_diamond_dag().compile()
+    with caplog.at_level(logging.INFO, logger="daggery.async_dag"):
+        await compiled(1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Node: mul0:" in messages
+    assert "  Input(s): ('4@mul0', '3@add1')" in messages
+    assert "  Output(s): 64" in messages
@@ -107,3 +107,73 @@ def test_dag_description_with_valid_argument_mappings():
     desc = DAGDescription(operations=ops, argument_mappings=mappings)
     assert desc.operations == ops
     assert desc.argument_mappings == mappings
+
+
+def diamond_description(reordered: bool = False) -> DAGDescription:
+    ops = [
+        Operation(name="a", op_name="foo", children=("b", "c")),
+        Operation(name="b", op_name="bar", children=("d",)),
+        Operation(name="c", op_name="baz", children=("d",)),
+        Operation(name="d", op_name="qux"),
+    ]
+    mappings = [
+        ArgumentMapping(op_name="d", inputs=("b", "c")),
+        ArgumentMapping(op_name="b", inputs=("a",)),
+    ]
+    if reordered:
+        ops = [
+            ops[0].model_copy(update={"children": ("c", "b")}),
+            ops[2],
+            ops[1],
+            ops[3],
+        ]
+        mappings.reverse()
+    return DAGDescription(
+        operations=OperationSequence(ops=tuple(ops)),
+        argument_mappings=tuple(mappings),
+    )
+
+
+def test_fingerprint_is_stable():
+    desc = diamond_description()
+    assert desc.fingerprint() == desc.fingerprint()
+    assert desc.fingerprint() == diamond_description().fingerprint()
+    assert len(desc.fingerprint()) == 64
+
+
+def test_fingerprint_ignores_order():
+    assert diamond_description().fingerprint() == (
+        diamond_description(reordered=True).fingerprint()
+    )
+
+
+def test_fingerprint_ignores_redundant_mappings():
+    desc = diamond_description()
+    without_redundant_mapping = desc.model_copy(
+        update={"argument_mappings": desc.argument_mappings[:1]}
+    )
+    assert desc.fingerprint() == without_redundant_mapping.fingerprint()
+
+
+def test_fingerprint_depends_on_structure():
+    desc = diamond_description()
+    swapped_inputs = desc.model_copy(
+        update={"argument_mappings": (ArgumentMapping(op_name="d", inputs=("c", "b")),)}
+    )
+    assert desc.fingerprint() != swapped_inputs.fingerprint()
+    ops = desc.operations.ops
+    renamed_op = desc.model_copy(
+        update={
+            "operations": OperationSequence(
+                ops=(*ops[:3], Operation(name="d", op_name="foo"))
+            )
+        }
+    )
+    assert desc.fingerprint() != renamed_op.fingerprint()
+
+
+def test_fingerprint_does_not_affect_equality():
+    desc = diamond_description()
+    desc.fingerprint()
+    assert desc == diamond_description()
+    assert hash(desc) == hash(diamond_description())
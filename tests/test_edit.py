@@ -0,0 +1,221 @@
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.edit import EditableDAG
+from daggery.node import Node
+from daggery.prevalidate import InvalidDAG
+from tests.conftest import (
+    AddAsyncNode,
+    AddNode,
+    ExpNode,
+    MultiplyAsyncNode,
+    MultiplyNode,
+    async_diamond_dag,
+    diamond_dag,
+    mock_op_node_map,
+)
+
+
+class MutableNode(Node, frozen=False):  # type: ignore
+    def evaluate(self, value: float) -> float:
+        return value
+
+
+def build(ops, mappings=()) -> FunctionDAG:
+    return FunctionDAG.throwable_from_dag_description(
+        DAGDescription(
+            operations=OperationSequence(ops=ops), argument_mappings=mappings
+        ),
+        mock_op_node_map,
+    )
+
+
+def bypass_dag() -> FunctionDAG:
+    return build(
+        (
+            Operation(name="add0", op_name="add", children=("add1", "mul0")),
+            Operation(name="add1", op_name="add", children=("mul0",)),
+            Operation(name="mul0", op_name="mul"),
+        ),
+        (ArgumentMapping(op_name="mul0", inputs=("add1", "add0")),),
+    )
+
+
+def test_replace_node():
+    dag = diamond_dag()
+    edited = dag.replace_node("mul0", AddNode)
+    assert isinstance(edited, FunctionDAG)
+    # exp(add(add(1)), add(add(1))) = 3 ** 3
+    assert edited.evaluate(1) == 27
+    assert dag.evaluate(1) == 64
+    assert edited.nodes[2].naked_node == AddNode(name="mul0", children=("exp0",))
+    for old, new in zip(dag.nodes, edited.nodes):
+        if old.naked_node.name != "mul0":
+            assert old is new
+
+
+def test_replace_node_invalid():
+    dag = diamond_dag()
+    assert isinstance(dag.replace_node("missing", AddNode), InvalidDAG)
+    assert isinstance(dag.replace_node("mul0", MutableNode), InvalidDAG)
+    assert isinstance(dag.replace_node("mul0", AddAsyncNode), InvalidDAG)
+
+
+def test_insert_node_matches_rebuilt_dag():
+    dag = diamond_dag()
+    edited = dag.insert_node("add2", AddNode, inputs=("exp0",))
+    expected = build(
+        (
+            Operation(name="add0", op_name="add", children=("add1", "mul0")),
+            Operation(name="add1", op_name="add", children=("exp0",)),
+            Operation(name="mul0", op_name="mul", children=("exp0",)),
+            Operation(name="exp0", op_name="exp", children=("add2",)),
+            Operation(name="add2", op_name="add"),
+        ),
+        (ArgumentMapping(op_name="exp0", inputs=("mul0", "add1")),),
+    )
+    assert edited == expected
+    assert edited.evaluate(1) == 65
+
+
+def test_insert_branch():
+    dag = FunctionDAG.throwable_from_string("add >> exp", mock_op_node_map)
+    # add0 feeds both mul0 and exp0, which takes mul0 as its second argument.
+    edited = dag.insert_node("mul0", MultiplyNode, inputs=("add0",), children=("exp0",))
+    assert isinstance(edited, FunctionDAG)
+    assert [node.naked_node.name for node in edited.nodes] == ["add0", "mul0", "exp0"]
+    assert edited.nodes[2].input_nodes == ("add0", "mul0")
+    # exp(add(1), mul(add(1))) = 2 ** 4
+    assert edited.evaluate(1) == 16
+
+
+@pytest.mark.parametrize(
+    "name, inputs, children",
+    [
+        ("add0", ("exp0",), ()),
+        ("new", (), ("exp0",)),
+        ("new", ("missing",), ()),
+        ("new", ("add1", "add1"), ("exp0",)),
+        # A second tail.
+        ("new", ("add1",), ()),
+        # Its child comes before its input.
+        ("new", ("mul0",), ("add1",)),
+    ],
+)
+def test_insert_node_invalid(name, inputs, children):
+    dag = diamond_dag()
+    assert isinstance(dag.insert_node(name, AddNode, inputs, children), InvalidDAG)
+
+
+def test_remove_node():
+    dag = FunctionDAG.throwable_from_string(
+        "add >> mul >> add >> mul", mock_op_node_map
+    )
+    expected = FunctionDAG.throwable_from_dag_description(
+        DAGDescription(
+            operations=OperationSequence(
+                ops=(
+                    Operation(name="add0", op_name="add", children=("add1",)),
+                    Operation(name="add1", op_name="add", children=("mul1",)),
+                    Operation(name="mul1", op_name="mul"),
+                )
+            )
+        ),
+        mock_op_node_map,
+    )
+    assert dag.remove_node("mul0") == expected
+    head_removed = dag.remove_node("add0")
+    assert isinstance(head_removed, FunctionDAG)
+    assert head_removed.nodes[0].input_nodes == ("__INPUT__",)
+    assert head_removed.evaluate(1) == 6
+    tail_removed = dag.remove_node("mul1")
+    assert isinstance(tail_removed, FunctionDAG)
+    assert tail_removed.nodes[-1].naked_node.children == ()
+    assert tail_removed.evaluate(1) == 5
+
+
+def test_remove_node_invalid():
+    dag = diamond_dag()
+    # exp0 has two inputs, and add0 has two children.
+    assert isinstance(dag.remove_node("exp0"), InvalidDAG)
+    assert isinstance(dag.remove_node("add0"), InvalidDAG)
+    assert isinstance(dag.remove_node("missing"), InvalidDAG)
+    # mul0 would take add0 as both of its inputs.
+    assert isinstance(bypass_dag().remove_node("add1"), InvalidDAG)
+
+
+def test_rewire():
+    dag = diamond_dag()
+    swapped = dag.rewire("exp0", ("add1", "mul0"))
+    assert isinstance(swapped, FunctionDAG)
+    # exp(add(add(1)), mul(add(1))) = 3 ** 4
+    assert swapped.evaluate(1) == 81
+    assert swapped.nodes[:3] == dag.nodes[:3]
+
+    # add0 loses mul0 as a child, but still feeds add1.
+    rewired = bypass_dag().rewire("mul0", ("add1",))
+    assert isinstance(rewired, FunctionDAG)
+    assert rewired == FunctionDAG.throwable_from_string(
+        "add >> add >> mul", mock_op_node_map
+    ).replace_node("add1", AddNode)
+
+
+def test_rewire_invalid():
+    dag = diamond_dag()
+    assert isinstance(dag.rewire("add0", ("add1",)), InvalidDAG)
+    assert isinstance(dag.rewire("exp0", ()), InvalidDAG)
+    assert isinstance(dag.rewire("add1", ("exp0",)), InvalidDAG)
+    # A node cannot be its own input.
+    assert isinstance(dag.rewire("exp0", ("add1", "mul0", "exp0")), InvalidDAG)
+    # mul0 would be left with no children.
+    assert isinstance(dag.rewire("exp0", ("add1",)), InvalidDAG)
+
+
+def test_edits_chain():
+    dag = FunctionDAG.throwable_from_string("add >> mul", mock_op_node_map)
+    edited = dag.insert_node("exp0", ExpNode, inputs=("add0", "mul0"))
+    assert isinstance(edited, FunctionDAG)
+    edited = edited.replace_node("mul0", AddNode)
+    assert isinstance(edited, FunctionDAG)
+    # exp(add(1), add(add(1))) = 2 ** 3
+    assert edited.evaluate(1) == 8
+
+
+@pytest.mark.asyncio
+async def test_async_edits_are_rebatched():
+    dag = async_diamond_dag()
+    edited = dag.insert_node("mul1", MultiplyAsyncNode, inputs=("exp0",))
+    assert isinstance(edited, AsyncFunctionDAG)
+    assert [[n.naked_node.name for n in batch] for batch in edited.nodes] == [
+        ["add0"],
+        ["add1", "mul0"],
+        ["exp0"],
+        ["mul1"],
+    ]
+    assert await edited.evaluate(1) == 128
+    edited = edited.remove_node("mul0")
+    assert isinstance(edited, AsyncFunctionDAG)
+    assert [[n.naked_node.name for n in batch] for batch in edited.nodes] == [
+        ["add0"],
+        ["add1"],
+        ["exp0"],
+        ["mul1"],
+    ]
+    # mul(exp(add(1), add(add(1)))) = 2 * 2 ** 3
+    assert await edited.evaluate(1) == 16
+
+
+def test_editable_dags_must_implement_every_hook():
+    class PartialDAG(EditableDAG):
+        def _ordered_nodes(self):
+            return ()
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialDAG()  # type: ignore
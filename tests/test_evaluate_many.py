@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import pickle
+from itertools import count
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.dag import FunctionDAG
+from daggery.scheduling import ReadyScheduler
+from tests.conftest import (
+    async_diamond_dag,
+    diamond_dag,
+    in_flight,
+    mock_op_node_map,
+)
+from tests.conftest import scheduling_op_node_map as op_node_map
+
+
+def async_record_dag() -> AsyncFunctionDAG:
+    return AsyncFunctionDAG.throwable_from_string("rec >> add", op_node_map)
+
+
+@pytest.mark.parametrize("level", [logging.INFO, logging.WARNING])
+def test_evaluate_many_matches_evaluate(caplog, level):
+    dag = diamond_dag()
+    chain = FunctionDAG.throwable_from_string("add >> mul >> add", mock_op_node_map)
+    with caplog.at_level(level, logger="daggery.dag"):
+        assert list(dag.evaluate_many(range(5))) == [dag.evaluate(i) for i in range(5)]
+        assert list(chain.evaluate_many([1, 2])) == [5, 7]
+        assert list(chain.evaluate_many([])) == []
+        assert list(chain.evaluate_many([1, 2], ordered=False)) == [(0, 5), (1, 7)]
+
+
+def test_evaluate_many_requires_concurrency():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        next(diamond_dag().evaluate_many([1], max_concurrency=0))
+
+
+def test_evaluate_many_takes_inputs_lazily():
+    inputs = count()
+    outputs = diamond_dag().evaluate_many(inputs)
+    assert next(outputs) == diamond_dag().evaluate(0)
+    assert next(outputs) == 64
+    assert next(inputs) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ready", [False, True])
+async def test_async_evaluate_many_matches_evaluate(ready):
+    dag = async_diamond_dag()
+    if ready:
+        dag = dag.with_scheduler(ReadyScheduler())
+    expected = [await dag.evaluate(i) for i in range(10)]
+    outputs = [output async for output in dag.evaluate_many(range(10), 3)]
+    assert outputs == expected
+    pairs = [pair async for pair in dag.evaluate_many(range(10), 3, ordered=False)]
+    assert sorted(pairs) == list(enumerate(expected))
+
+
+@pytest.mark.asyncio
+async def test_async_evaluate_many_logs_each_node(caplog):
+    dag = async_diamond_dag()
+    with caplog.at_level(logging.INFO, logger="daggery.async_dag"):
+        assert [output async for output in dag.evaluate_many([1])] == [64]
+    messages = [record.getMessage() for record in caplog.records]
+    assert "  Input(s): ('4@mul0', '3@add1')" in messages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ordered", [False, True])
+async def test_async_evaluate_many_bounds_evaluations(ordered):
+    dag = async_record_dag()
+    outputs = [output async for output in dag.evaluate_many(range(20), 4, ordered)]
+    assert len(outputs) == 20
+    assert in_flight["max"] == 4
+
+
+@pytest.mark.asyncio
+async def test_async_evaluate_many_takes_inputs_lazily():
+    inputs = count()
+    outputs = async_record_dag().evaluate_many(inputs, max_concurrency=2)
+    assert await outputs.__anext__() == 1
+    await outputs.aclose()
+    # Two inputs were in flight, and the first was replaced when it finished.
+    assert next(inputs) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ordered", [False, True])
+async def test_async_evaluate_many_raises_and_cancels(ordered):
+    dag = AsyncFunctionDAG.throwable_from_string("hang", op_node_map)
+    failing = AsyncFunctionDAG.throwable_from_string("fail", op_node_map)
+    with pytest.raises(ValueError, match="Node failed"):
+        async for _ in failing.evaluate_many(range(3), ordered=ordered):
+            pass
+    outputs = dag.evaluate_many(range(3), ordered=ordered)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(outputs.__anext__(), timeout=0.01)
+    await outputs.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_evaluate_many_requires_concurrency():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        await async_diamond_dag().evaluate_many([1], max_concurrency=0).__anext__()
+
+
+@pytest.mark.asyncio
+async def test_async_dags_can_be_pickled_after_evaluating_many():
+    dag = async_diamond_dag()
+    assert [output async for output in dag.evaluate_many([1])] == [64]
+    # The compiled evaluator is a generated function, so is not pickled.
+    loaded = pickle.loads(pickle.dumps(dag))
+    assert loaded == dag
+    assert "_compiled" not in loaded.__dict__
+    assert await loaded.evaluate(1) == 64
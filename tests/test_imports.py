@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import daggery
+
+
+def imported_modules(statement: str) -> dict[str, int]:
+    # With `-X importtime`, Python reports every module imported (with its
+    # cumulative import time in microseconds) on stderr.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_import_does_not_load_optional_dependencies():
+    modules = imported_modules("import daggery")
+    assert "daggery" in modules
+    assert "daggery.dag" in modules
+    for name in (
+        "requests",
+        "colorlog",
+        "daggery.utils.decorators",
+        "daggery.stream",
+        "multiprocessing",
+    ):
+        assert name not in modules
+
+
+def test_logging_loads_colorlog_on_first_record():
+    modules = imported_modules(
+        "from daggery.utils.logging import logger_factory; "
+        "logger_factory('daggery.test').info('')"
+    )
+    assert "colorlog" in modules
+
+
+def test_lazy_modules_are_available():
+    assert daggery.decorators.logged is not None
+    assert daggery.serialise.dumps is not None
+    assert daggery.stream.load is not None
+    assert daggery.registry.DAGRegistry is not None
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.dag import FunctionDAG
+from daggery.node import Node
+from tests.conftest import (
+    AllocateAsyncNode,
+    Buffer,
+    CountLiveAsyncNode,
+    allocate,
+    allocated,
+    count_live,
+    wide_description,
+)
+
+
+class AllocateNode(Node, frozen=True):
+    def evaluate(self, *values) -> Buffer:
+        return allocate()
+
+
+class CountLiveNode(Node, frozen=True):
+    def evaluate(self, *values) -> int:
+        return count_live()
+
+
+def test_plan_releases_slots_after_last_consumer():
+    dag = FunctionDAG.throwable_from_dag_description(
+        wide_description(), {"alloc": AllocateNode, "count": CountLiveNode}
+    )
+    release_slots = {
+        step.node.naked_node.name: step.release_slots for step in dag.plan.steps
+    }
+    slots = dag.plan.slots_by_name
+    assert release_slots["alloc0"] == (slots["__INPUT__"],)
+    assert release_slots["alloc1"] == ()
+    assert release_slots["alloc4"] == (slots["alloc3"],)
+    assert release_slots["count0"] == (slots["alloc2"], slots["alloc4"])
+
+
+@pytest.mark.parametrize("level", [logging.INFO, logging.WARNING])
+def test_evaluate_frees_intermediate_outputs(caplog, level):
+    dag = FunctionDAG.throwable_from_string(
+        "alloc >> alloc >> alloc >> count",
+        {"alloc": AllocateNode, "count": CountLiveNode},
+    )
+    with caplog.at_level(level, logger="daggery.dag"):
+        assert dag.evaluate(None) == 1
+    allocated.clear()
+    wide_dag = FunctionDAG.throwable_from_dag_description(
+        wide_description(), {"alloc": AllocateNode, "count": CountLiveNode}
+    )
+    with caplog.at_level(level, logger="daggery.dag"):
+        assert wide_dag.evaluate(None) == 2
+
+
+def test_compiled_frees_intermediate_outputs():
+    dag = FunctionDAG.throwable_from_dag_description(
+        wide_description(), {"alloc": AllocateNode, "count": CountLiveNode}
+    )
+    assert dag.compile()(None) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_evaluate_frees_intermediate_outputs():
+    dag = AsyncFunctionDAG.throwable_from_dag_description(
+        wide_description(), {"alloc": AllocateAsyncNode, "count": CountLiveAsyncNode}
+    )
+    assert await dag.evaluate(None) == 2
+    allocated.clear()
+    assert await dag.compile()(None) == 2
@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar, Union
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.prevalidate import InvalidDAG
+from daggery.scheduling import ReadyScheduler
+from tests.conftest import mock_async_op_node_map
+
+# The name of the thread each node was evaluated on, by node name.
+threads: dict[str, str] = {}
+# Only passed by two nodes waiting on it at the same time.
+barrier: dict[str, threading.Barrier] = {}
+
+
+class SyncAddNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        threads[self.name] = threading.current_thread().name
+        return value + 1
+
+
+class InlineAddNode(SyncAddNode, frozen=True):
+    run_inline: ClassVar[bool] = True
+
+
+class BarrierNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        barrier["barrier"].wait()
+        return value
+
+
+class CoroutineNode(Node, frozen=True):
+    async def evaluate(self, value: float) -> float:  # type: ignore[override]
+        return value
+
+
+op_node_map: dict[str, type[Union[AsyncNode, Node]]] = {
+    **mock_async_op_node_map,
+    "sadd": SyncAddNode,
+    "iadd": InlineAddNode,
+    "barrier": BarrierNode,
+    "coroutine": CoroutineNode,
+}
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    threads.clear()
+    barrier["barrier"] = threading.Barrier(2, timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_sync_nodes_run_off_the_event_loop():
+    dag = AsyncFunctionDAG.throwable_from_string("sadd >> mul >> iadd", op_node_map)
+    assert await dag.evaluate(1) == 5
+    loop_thread = threading.current_thread().name
+    assert threads["sadd0"] != loop_thread
+    assert threads["iadd0"] == loop_thread
+    assert await dag.compile()(1) == 5
+    assert await dag.with_scheduler(ReadyScheduler()).evaluate(1) == 5
+    assert [output async for output in dag.evaluate_many([1, 2])] == [5, 7]
+
+
+@pytest.mark.asyncio
+async def test_sync_nodes_run_on_the_executor():
+    with ThreadPoolExecutor(2, thread_name_prefix="daggery-test") as executor:
+        dag = AsyncFunctionDAG.throwable_from_string("sadd >> add", op_node_map)
+        dag = dag.with_executor(executor)
+        assert dag.executor is executor
+        assert await dag.evaluate(1) == 3
+        assert threads["sadd0"].startswith("daggery-test")
+        # Edits and other copies keep the executor.
+        edited = dag.replace_node("add0", SyncAddNode)
+        assert isinstance(edited, AsyncFunctionDAG)
+        assert edited.executor is executor
+        assert dag.with_scheduler(ReadyScheduler()).executor is executor
+
+
+@pytest.mark.asyncio
+async def test_independent_sync_nodes_run_concurrently():
+    # Each barrier node blocks its thread until the other one arrives.
+    ops = OperationSequence(
+        ops=(
+            Operation(name="add0", op_name="add", children=("barrier0", "barrier1")),
+            Operation(name="barrier0", op_name="barrier", children=("exp0",)),
+            Operation(name="barrier1", op_name="barrier", children=("exp0",)),
+            Operation(name="exp0", op_name="exp"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="exp0", inputs=("barrier0", "barrier1")),)
+    dag = AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+    with ThreadPoolExecutor(2) as executor:
+        assert await dag.with_executor(executor).evaluate(1) == 4
+
+
+def test_sync_nodes_must_not_be_coroutines():
+    dag = AsyncFunctionDAG.from_string("add >> coroutine", op_node_map)
+    assert isinstance(dag, InvalidDAG)
+    assert "should not be a coroutine function" in dag.message
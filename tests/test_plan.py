@@ -0,0 +1,148 @@
+import logging
+import pickle
+
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.plan import INPUT_NAME, ExecutionPlan
+from tests.conftest import diamond_dag, mock_op_node_map
+
+
+def test_plan_resolves_names_to_slots():
+    dag = diamond_dag()
+    plan = dag.plan
+    assert isinstance(plan, ExecutionPlan)
+    assert plan.num_slots == 5
+    assert plan.slots_by_name == {
+        INPUT_NAME: 0,
+        "add0": 1,
+        "add1": 2,
+        "mul0": 3,
+        "exp0": 4,
+    }
+    assert [step.input_slots for step in plan.steps] == [(0,), (1,), (1,), (3, 2)]
+    assert [step.output_slot for step in plan.steps] == [1, 2, 3, 4]
+    assert [step.single_input for step in plan.steps] == [True, True, True, False]
+
+
+def test_plan_is_built_once():
+    dag = diamond_dag()
+    assert dag.plan is dag.plan
+
+
+def test_plan_does_not_affect_equality():
+    dag = diamond_dag()
+    other = diamond_dag()
+    dag.evaluate(1)
+    assert dag == other
+    assert hash(dag) == hash(other)
+
+
+def test_evaluate_with_plan_respects_argument_order():
+    dag = diamond_dag()
+    # exp(mul(add(1)), add(add(1))) = 4 ** 3
+    assert dag.evaluate(1) == 64
+
+
+def test_evaluate_logs_each_node(caplog):
+    dag = diamond_dag()
+    with caplog.at_level(logging.INFO, logger="daggery.dag"):
+        dag.evaluate(1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Node: exp0:" in messages
+    assert "  Input(s): ('4@mul0', '3@add1')" in messages
+    assert "  Output(s): 64" in messages
+
+
+def segment_names(dag: FunctionDAG) -> list[list[str]]:
+    return [
+        [step.node.naked_node.name for step in segment.steps]
+        for segment in dag.plan.segments
+    ]
+
+
+def test_plan_fuses_chains(caplog):
+    dag = FunctionDAG.throwable_from_string("add >> mul >> add", mock_op_node_map)
+    assert segment_names(dag) == [["add0", "mul0", "add1"]]
+    with caplog.at_level(logging.WARNING, logger="daggery.dag"):
+        assert dag.evaluate(1) == 5
+
+
+def test_plan_does_not_fuse_branches():
+    dag = diamond_dag()
+    assert segment_names(dag) == [["add0"], ["add1"], ["mul0"], ["exp0"]]
+
+
+def test_plan_fuses_linear_runs_within_graphs(caplog):
+    ops = OperationSequence(
+        ops=(
+            Operation(name="add0", op_name="add", children=("add1", "mul0")),
+            Operation(name="add1", op_name="add", children=("add2",)),
+            Operation(name="mul0", op_name="mul", children=("exp0",)),
+            Operation(name="add2", op_name="add", children=("exp0",)),
+            Operation(name="exp0", op_name="exp", children=("mul1",)),
+            Operation(name="mul1", op_name="mul"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="exp0", inputs=("mul0", "add2")),)
+    dag = FunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings),
+        mock_op_node_map,
+    )
+    assert segment_names(dag) == [
+        ["add0"],
+        ["add1", "add2"],
+        ["mul0"],
+        ["exp0", "mul1"],
+    ]
+    # mul(exp(mul(add(1)), add(add(add(1))))) = 2 * 4 ** 4
+    assert dag.evaluate(1) == 512
+    with caplog.at_level(logging.WARNING, logger="daggery.dag"):
+        assert dag.evaluate(1) == 512
+
+
+def test_fused_chains_log_each_node(caplog):
+    dag = FunctionDAG.throwable_from_string("add >> mul >> add", mock_op_node_map)
+    with caplog.at_level(logging.INFO, logger="daggery.dag"):
+        assert dag.evaluate(1) == 5
+        # Fused segments log their own nodes, so are used when logging too.
+        assert dag.plan.segments[0].evaluate(2) == 7
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages.count("Node: mul0:") == 2
+    assert "  Input(s): 2@add0" in messages
+    assert "  Input(s): 3@add0" in messages
+    assert "  Output(s): 4" in messages
+    assert "  Output(s): 7" in messages
+
+
+def test_plan_fuses_long_chains(caplog):
+    dag = FunctionDAG.throwable_from_string(
+        " >> ".join(["add"] * 1000), mock_op_node_map
+    )
+    assert len(dag.plan.segments) == 1
+    with caplog.at_level(logging.WARNING, logger="daggery.dag"):
+        assert dag.evaluate(0) == 1000
+
+
+def test_plan_runs_from_given_slots():
+    # The nodes after the head, given the head's output.
+    plan = ExecutionPlan.from_nodes(diamond_dag().nodes[1:], inputs=("add0",))
+    slots = [2] + [None] * (plan.num_slots - 1)
+    # exp(mul(2), add(2)) = 4 ** 3
+    assert plan.run(slots) == 64
+    # Only the output is still held once the plan has run.
+    assert slots == [None] * (plan.num_slots - 1) + [64]
+
+
+def test_evaluated_dags_can_be_pickled():
+    dag = FunctionDAG.throwable_from_string("add >> mul >> add", mock_op_node_map)
+    assert dag.evaluate(1) == 5
+    # The plan's fused segments are generated functions, so are not pickled.
+    loaded = pickle.loads(pickle.dumps(dag))
+    assert loaded == dag
+    assert "plan" not in loaded.__dict__
+    assert loaded.evaluate(1) == 5
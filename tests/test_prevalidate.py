@@ -395,3 +395,54 @@ def test_prevalidated_dag_not_topologically_sorted():
     )
     assert isinstance(actual, InvalidDAG)
     assert "Input is not topologically sorted" in actual.message
+
+
+def test_prevalidated_dag_from_dag_description_duplicate_inputs():
+    operations = OperationSequence(
+        ops=(
+            Operation(name="foo", op_name="foo", children=("bar",)),
+            Operation(name="bar", op_name="bar"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="bar", inputs=("foo", "foo")),)
+    actual = PrevalidatedDAG.from_dag_description(
+        DAGDescription(operations=operations, argument_mappings=mappings)
+    )
+    assert isinstance(actual, InvalidDAG)
+    assert "Input has duplicate inputs" in actual.message
+
+
+def test_fingerprint_matches_dag_description():
+    ops = OperationSequence(
+        ops=(
+            Operation(name="a", op_name="foo", children=("b", "c")),
+            Operation(name="b", op_name="bar", children=("d",)),
+            Operation(name="c", op_name="baz", children=("d",)),
+            Operation(name="d", op_name="qux"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="d", inputs=("b", "c")),)
+    description = DAGDescription(operations=ops, argument_mappings=mappings)
+    dag = PrevalidatedDAG.from_dag_description(description)
+    assert isinstance(dag, PrevalidatedDAG)
+    assert dag.fingerprint() == description.fingerprint()
+
+
+def test_fingerprint_matches_equivalent_string():
+    from_string = PrevalidatedDAG.from_string("foo >> bar >> foo")
+    assert isinstance(from_string, PrevalidatedDAG)
+    ops = OperationSequence(
+        ops=(
+            Operation(name="foo0", op_name="foo", children=("bar0",)),
+            Operation(name="bar0", op_name="bar", children=("foo1",)),
+            Operation(name="foo1", op_name="foo"),
+        )
+    )
+    from_description = PrevalidatedDAG.from_dag_description(
+        DAGDescription(operations=ops)
+    )
+    assert isinstance(from_description, PrevalidatedDAG)
+    assert from_string.fingerprint() == from_description.fingerprint()
+    other = PrevalidatedDAG.from_string("foo >> foo >> bar")
+    assert isinstance(other, PrevalidatedDAG)
+    assert other.fingerprint() != from_string.fingerprint()
@@ -0,0 +1,279 @@
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from daggery import stream
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.prevalidate import InvalidDAG
+from daggery.process_dag import ProcessFunctionDAG
+from daggery.registry import DAGRegistry
+from daggery.serialise import dumps
+from tests.conftest import mock_op_node_map
+
+
+class PidNode(Node, frozen=True):
+    def evaluate(self, value: float) -> int:
+        return os.getpid()
+
+
+class FailNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        raise ValueError("Node failed")
+
+
+class SleepNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        time.sleep(1)
+        return value
+
+
+class SumNode(Node, frozen=True):
+    def evaluate(self, *values: float) -> float:
+        return sum(values)
+
+
+op_node_map: dict[str, type[Node]] = {
+    **mock_op_node_map,
+    "pid": PidNode,
+    "fail": FailNode,
+    "sleep": SleepNode,
+    "sum": SumNode,
+}
+
+
+def branches_description(
+    blocks: dict[str, str], left: str = "mul", right: str = "add"
+) -> DAGDescription:
+    # add0 fans out to two chains, left0 >> left1 and right0 >> right1, which
+    # are joined by exp0.
+    ops = (
+        ("add0", "add", ("left0", "right0")),
+        ("left0", left, ("left1",)),
+        ("left1", "add", ("exp0",)),
+        ("right0", right, ("right1",)),
+        ("right1", "mul", ("exp0",)),
+        ("exp0", "exp", ()),
+    )
+    return DAGDescription(
+        operations=OperationSequence(
+            ops=tuple(
+                Operation(
+                    name=name,
+                    op_name=op_name,
+                    children=children,
+                    block=blocks.get(name),
+                )
+                for name, op_name, children in ops
+            )
+        ),
+        argument_mappings=(
+            ArgumentMapping(op_name="exp0", inputs=("left1", "right1")),
+        ),
+    )
+
+
+BLOCKS = {"left0": "left", "left1": "left", "right0": "right", "right1": "right"}
+
+
+def test_outputs_match_function_dag():
+    description = branches_description(BLOCKS)
+    expected = FunctionDAG.throwable_from_dag_description(description, op_node_map)
+    with ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ) as dag:
+        assert [block.name for block in dag.blocks] == ["left", "right"]
+        assert [block.inputs for block in dag.blocks] == [("add0",), ("add0",)]
+        # Each block is a single step of the plan.
+        assert len(dag.plan.steps) == 4
+        assert dag.evaluate(1) == expected.evaluate(1) == 5**6
+        assert list(dag.evaluate_many(range(3))) == [
+            expected.evaluate(i) for i in range(3)
+        ]
+        assert sorted(dag.evaluate_many(range(3), 2, ordered=False)) == [
+            (i, expected.evaluate(i)) for i in range(3)
+        ]
+        assert dag.compile()(2) == expected.evaluate(2)
+
+
+def test_blocks_are_evaluated_on_workers():
+    description = DAGDescription(
+        operations=OperationSequence(
+            ops=(
+                Operation(name="add0", op_name="add", children=("pid0",)),
+                Operation(name="pid0", op_name="pid", block="block"),
+            )
+        )
+    )
+    with ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ).with_workers(1) as dag:
+        dag.start()
+        assert dag.evaluate(1) != os.getpid()
+        # Workers are kept between evaluations.
+        assert dag.evaluate(1) == dag.evaluate(2)
+    # Closed DAGs start new workers.
+    assert dag.evaluate(1) != os.getpid()
+    dag.close()
+
+
+def test_blocks_with_several_inputs():
+    # The block holds exp0 and its child, taking both branches as inputs.
+    description = DAGDescription(
+        operations=OperationSequence(
+            ops=(
+                Operation(name="add0", op_name="add", children=("add1", "mul0")),
+                Operation(name="add1", op_name="add", children=("exp0",)),
+                Operation(name="mul0", op_name="mul", children=("exp0",)),
+                Operation(name="exp0", op_name="exp", children=("add2",), block="b"),
+                Operation(name="add2", op_name="add", block="b"),
+            )
+        ),
+        argument_mappings=(ArgumentMapping(op_name="exp0", inputs=("mul0", "add1")),),
+    )
+    with ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ) as dag:
+        assert dag.blocks[0].inputs == ("mul0", "add1")
+        assert dag.evaluate(1) == 4**3 + 1
+
+
+def test_blocks_in_flight_do_not_hold_threads():
+    # add0 fans out to four blocks of a node each, which sum0 joins.
+    sleeps = tuple(f"sleep{i}" for i in range(4))
+    description = DAGDescription(
+        operations=OperationSequence(
+            ops=(
+                Operation(name="add0", op_name="add", children=sleeps),
+                *(
+                    Operation(
+                        name=name, op_name="sleep", children=("sum0",), block=name
+                    )
+                    for name in sleeps
+                ),
+                Operation(name="sum0", op_name="sum"),
+            )
+        ),
+        argument_mappings=(ArgumentMapping(op_name="sum0", inputs=sleeps),),
+    )
+    dag = ProcessFunctionDAG.throwable_from_dag_description(description, op_node_map)
+    with ThreadPoolExecutor(1) as executor:
+        with dag.with_workers(4).with_executor(executor) as dag:
+            dag.start()
+            start = time.perf_counter()
+            assert dag.evaluate(1) == 8
+            # All four blocks are evaluated at once, not two (or one per
+            # thread) at a time.
+            assert time.perf_counter() - start < 1.8
+
+
+def test_unblocked_dags_need_no_workers():
+    dag = ProcessFunctionDAG.throwable_from_string("add >> mul", op_node_map)
+    assert dag.blocks == ()
+    assert dag.evaluate(1) == 4
+    assert "_pool_executor" not in dag.__dict__
+
+
+@pytest.mark.parametrize(
+    "blocks, message",
+    [
+        (
+            {"left0": "b", "right0": "b"},
+            "Nodes of block b are not contiguous in topological order",
+        ),
+        (
+            {"add0": "b", "left0": "b"},
+            "Node add0 of block b has children outside of the block",
+        ),
+    ],
+)
+def test_invalid_blocks(blocks, message):
+    dag = ProcessFunctionDAG.from_dag_description(
+        branches_description(blocks), op_node_map
+    )
+    assert isinstance(dag, InvalidDAG)
+    assert message in dag.message
+
+
+def test_node_errors_are_raised():
+    description = branches_description(BLOCKS, left="fail")
+    with ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ) as dag:
+        with pytest.raises(ValueError, match="Node failed"):
+            dag.evaluate(1)
+
+
+def test_edits_keep_valid_blocks(caplog):
+    dag = ProcessFunctionDAG.throwable_from_dag_description(
+        branches_description(BLOCKS), op_node_map
+    ).with_workers(2)
+    edited = dag.replace_node("left0", op_node_map["add"])
+    assert isinstance(edited, ProcessFunctionDAG)
+    assert [block.name for block in edited.blocks] == ["left", "right"]
+    assert edited.max_workers == 2
+    with caplog.at_level(logging.WARNING, logger="daggery.dag"):
+        edited = dag.insert_node("mul9", op_node_map["mul"], ("left0",), ("left1",))
+    assert isinstance(edited, ProcessFunctionDAG)
+    edited = edited.rewire("left1", ("mul9",))
+    assert isinstance(edited, ProcessFunctionDAG)
+    assert [block.name for block in edited.blocks] == ["right"]
+    assert "Nodes of block left are not contiguous" in caplog.text
+    with edited:
+        assert edited.evaluate(1) == 9**6
+
+
+def test_blocks_are_part_of_the_fingerprint():
+    assert (
+        branches_description(BLOCKS).fingerprint()
+        != branches_description({}).fingerprint()
+    )
+    with pytest.raises(ValueError, match="block must not be empty"):
+        Operation(name="add0", op_name="add", block="")
+
+
+def test_blocks_are_kept_by_stream_loads_but_not_serialised(tmp_path):
+    path = tmp_path / "branches.json"
+    path.write_text(branches_description(BLOCKS).model_dump_json())
+    dag = stream.load(ProcessFunctionDAG, path, op_node_map)
+    assert isinstance(dag, ProcessFunctionDAG)
+    assert [block.name for block in dag.blocks] == ["left", "right"]
+    registry = DAGRegistry(tmp_path, ProcessFunctionDAG, op_node_map)
+    loaded = registry["branches"]
+    assert isinstance(loaded, ProcessFunctionDAG)
+    assert loaded.blocks == dag.blocks
+    # Artifacts have no blocks, so would load as a different DAG.
+    with pytest.raises(ValueError, match="Cannot serialise ProcessFunctionDAG"):
+        dumps(dag, op_node_map)
+
+    path.write_text(
+        branches_description({"left0": "b", "right0": "b"}).model_dump_json()
+    )
+    dag = stream.load(ProcessFunctionDAG, path, op_node_map)
+    assert isinstance(dag, InvalidDAG)
+    assert "Nodes of block b are not contiguous" in dag.message
+
+
+def test_evaluated_dags_can_be_pickled():
+    description = branches_description(BLOCKS)
+    with ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ).with_workers(1) as dag:
+        assert dag.evaluate(1) == 5**6
+        # Neither the plan nor the workers are pickled.
+        with pickle.loads(pickle.dumps(dag)) as loaded:
+            assert loaded == dag
+            assert loaded.blocks == dag.blocks
+            assert loaded.max_workers == 1
+            assert "_pool_executor" not in loaded.__dict__
+            assert loaded.evaluate(1) == 5**6
@@ -0,0 +1,153 @@
+import json
+import os
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.dag import FunctionDAG
+from daggery.node import Node
+from daggery.prevalidate import InvalidDAG
+from daggery.registry import DAGRegistry
+
+
+class Foo(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value * value
+
+
+class Bar(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value + 10
+
+
+class AsyncFoo(AsyncNode, frozen=True):
+    async def evaluate(self, value: int) -> int:
+        return value * value
+
+
+mock_op_node_map: dict[str, type[Node]] = {"foo": Foo, "bar": Bar}
+mock_async_op_node_map: dict[str, type[AsyncNode]] = {"foo": AsyncFoo}
+
+
+def chain(*op_names: str) -> str:
+    ops = [
+        {
+            "name": f"{op_name}{i}",
+            "op_name": op_name,
+            "children": [f"{op_names[i + 1]}{i + 1}"] if i + 1 < len(op_names) else [],
+        }
+        for i, op_name in enumerate(op_names)
+    ]
+    return json.dumps({"operations": {"ops": ops}})
+
+
+def write(path, text: str) -> None:
+    # Written atomically, as a deployment would, and with a distinct mtime so
+    # that the change is seen regardless of the filesystem's resolution.
+    mtime_ns = path.stat().st_mtime_ns + 10**9 if path.exists() else None
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(text)
+    if mtime_ns is not None:
+        os.utime(temporary, ns=(mtime_ns, mtime_ns))
+    os.replace(temporary, path)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    write(tmp_path / "square.json", chain("foo"))
+    write(tmp_path / "square_add.json", chain("foo", "bar"))
+    (tmp_path / "notes.txt").write_text("Not a DAG")
+    return tmp_path
+
+
+def test_registry_builds_each_file(directory):
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map)
+    assert sorted(registry) == ["square", "square_add"]
+    assert len(registry) == 2
+    assert "square" in registry
+    assert isinstance(registry["square"], FunctionDAG)
+    assert registry["square"].evaluate(3) == 9
+    assert registry["square_add"].evaluate(3) == 19
+    assert registry.get("missing") is None
+    with pytest.raises(KeyError):
+        registry["missing"]
+
+
+def test_refresh_only_rebuilds_changed_files(directory):
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map)
+    square, square_add = registry["square"], registry["square_add"]
+    assert registry.refresh() == {}
+
+    write(directory / "square_add.json", chain("foo", "bar", "bar"))
+    results = registry.refresh()
+    assert list(results) == ["square_add"]
+    assert registry["square"] is square
+    assert registry["square_add"] is not square_add
+    assert registry["square_add"].evaluate(3) == 29
+    # The old instance is untouched, so in-flight evaluations are unaffected.
+    assert square_add.evaluate(3) == 19
+
+
+def test_refresh_adds_and_removes_files(directory):
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map)
+    write(directory / "add.json", chain("bar"))
+    (directory / "square.json").unlink()
+    registry.refresh()
+    assert sorted(registry) == ["add", "square_add"]
+    assert registry["add"].evaluate(3) == 13
+
+
+def test_invalid_change_keeps_last_valid_dag(directory):
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map)
+    square = registry["square"]
+    write(directory / "square.json", chain("foo", "missing"))
+    results = registry.refresh()
+    assert isinstance(results["square"], InvalidDAG)
+    assert registry["square"] is square
+    assert list(registry.errors) == ["square"]
+
+    write(directory / "square.json", chain("foo", "foo"))
+    registry.refresh()
+    assert registry["square"].evaluate(3) == 81
+    assert registry.errors == {}
+
+
+def test_invalid_file_is_not_registered(directory):
+    write(directory / "broken.json", "{")
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map)
+    assert "broken" not in registry
+    assert registry.errors["broken"].message.startswith("Malformed DAG description")
+
+
+def test_lookups_poll_for_changes(directory, timer):
+    registry = DAGRegistry(
+        directory, FunctionDAG, mock_op_node_map, poll_interval=5, timer=timer
+    )
+    square = registry["square"]
+    write(directory / "square.json", chain("foo", "foo"))
+    timer.now = 4
+    assert registry["square"] is square
+    timer.now = 5
+    assert registry["square"].evaluate(3) == 81
+
+
+def test_registry_without_poll_interval_does_not_poll(directory, timer):
+    registry = DAGRegistry(directory, FunctionDAG, mock_op_node_map, timer=timer)
+    square = registry["square"]
+    write(directory / "square.json", chain("foo", "foo"))
+    timer.now = 10**6
+    assert registry["square"] is square
+
+
+@pytest.mark.asyncio
+async def test_async_registry(directory):
+    write(directory / "square_add.json", chain("foo"))
+    registry = DAGRegistry(directory, AsyncFunctionDAG, mock_async_op_node_map)
+    assert isinstance(registry["square"], AsyncFunctionDAG)
+    assert await registry["square"].evaluate(3) == 9
+
+
+def test_invalid_poll_interval(directory):
+    with pytest.raises(ValueError):
+        DAGRegistry(directory, FunctionDAG, mock_op_node_map, poll_interval=0)
@@ -0,0 +1,100 @@
+import pytest
+
+from daggery import serialise
+from daggery.async_dag import AsyncFunctionDAG, BatchingInfo
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.scheduling import ReadyScheduler
+from tests.conftest import async_diamond_dag, mock_async_op_node_map
+from tests.conftest import scheduling_op_node_map as op_node_map
+
+# Two chains and a single node between add0 and sum0, with each chain given
+# in full before the next, so that the description batches sequentially.
+CHAINS = {
+    "add0": ("add1", "mul0", "add5"),
+    "add1": ("add2",),
+    "add2": ("add3",),
+    "add3": ("add4",),
+    "add4": ("sum0",),
+    "mul0": ("mul1",),
+    "mul1": ("mul2",),
+    "mul2": ("mul3",),
+    "mul3": ("sum0",),
+    "add5": ("sum0",),
+    "sum0": (),
+}
+REORDERED = [
+    ["add0"],
+    ["add1", "mul0"],
+    ["add2", "mul1"],
+    ["add3", "mul2"],
+    ["add4", "mul3", "add5"],
+    ["sum0"],
+]
+
+
+def sequential_dag(names=tuple(CHAINS)) -> AsyncFunctionDAG:
+    ops = tuple(
+        Operation(name=name, op_name=name[:3], children=CHAINS[name]) for name in names
+    )
+    mappings = (ArgumentMapping(op_name="sum0", inputs=("add4", "mul3", "add5")),)
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(
+            operations=OperationSequence(ops=ops), argument_mappings=mappings
+        ),
+        op_node_map,
+    )
+
+
+def batch_names(dag: AsyncFunctionDAG) -> list[list[str]]:
+    return [[node.naked_node.name for node in batch] for batch in dag.nodes]
+
+
+@pytest.mark.asyncio
+async def test_reorder_minimises_batches():
+    dag = sequential_dag()
+    assert dag.batching_info() == BatchingInfo(
+        batches=9, max_width=2, mean_width=11 / 9
+    )
+    reordered = dag.reorder()
+    assert batch_names(reordered) == REORDERED
+    assert reordered.batching_info() == BatchingInfo(
+        batches=6, max_width=3, mean_width=11 / 6
+    )
+    assert await reordered.evaluate(1) == await dag.evaluate(1) == 6 + 32 + 3
+
+
+def test_reorder_is_independent_of_order():
+    # Moving the single node to any valid position gives the same batches.
+    names = [name for name in CHAINS if name != "add5"]
+    for offset in range(1, len(names)):
+        dag = sequential_dag(names[:offset] + ["add5"] + names[offset:])
+        assert sorted(map(sorted, batch_names(dag.reorder()))) == sorted(
+            map(sorted, REORDERED)
+        )
+
+
+def test_reorder_keeps_optimal_batches():
+    dag = async_diamond_dag()
+    assert dag.reorder() == dag
+    single = AsyncFunctionDAG.throwable_from_string("add", mock_async_op_node_map)
+    assert single.reorder() == single
+    assert single.batching_info() == BatchingInfo(
+        batches=1, max_width=1, mean_width=1.0
+    )
+
+
+def test_reordered_batches_survive_serialisation():
+    reordered = sequential_dag().reorder()
+    loaded = serialise.loads(serialise.dumps(reordered, op_node_map), op_node_map)
+    assert loaded == reordered
+
+
+def test_reorder_keeps_the_scheduler():
+    scheduler = ReadyScheduler()
+    dag = sequential_dag().with_scheduler(scheduler)
+    assert dag.reorder().scheduler is scheduler
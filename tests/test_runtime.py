@@ -0,0 +1,121 @@
+import copy
+import json
+import pickle
+
+import pytest
+from pydantic import ValidationError
+
+from daggery.async_dag import AsyncDAGNode, AsyncFunctionDAG
+from daggery.dag import DAGNode, FunctionDAG
+from tests.conftest import (
+    AddAsyncNode,
+    AddNode,
+    MultiplyNode,
+    async_diamond_dag,
+    diamond_dag,
+    mock_op_node_map,
+)
+
+
+def test_dag_node_holds_node_and_inputs():
+    naked_node = AddNode(name="add0")
+    node = DAGNode(naked_node=naked_node, input_nodes=["__INPUT__"])  # type: ignore
+    assert node.naked_node is naked_node
+    assert node.input_nodes == ("__INPUT__",)
+    assert node.evaluate(1) == 2
+    assert repr(node) == (
+        "DAGNode(naked_node=AddNode(name='add0', children=()), "
+        "input_nodes=('__INPUT__',))"
+    )
+
+
+def test_dag_node_is_immutable():
+    node = DAGNode(AddNode(name="add0"), ("__INPUT__",))
+    with pytest.raises(AttributeError):
+        node.input_nodes = ("add1",)
+    with pytest.raises(AttributeError):
+        del node.naked_node
+    with pytest.raises(AttributeError):
+        node.extra = 1
+
+
+def test_dag_node_equality():
+    node = DAGNode(AddNode(name="add0"), ("__INPUT__",))
+    same = DAGNode(AddNode(name="add0"), ("__INPUT__",))
+    assert node == same
+    assert hash(node) == hash(same)
+    assert node != DAGNode(MultiplyNode(name="add0"), ("__INPUT__",))
+    assert node != DAGNode(AddNode(name="add0"), ("mul0",))
+    assert node != AsyncDAGNode(AddAsyncNode(name="add0"), ("__INPUT__",))
+
+
+def test_dag_node_checks_its_contents():
+    with pytest.raises(TypeError, match="must be an instance of Node"):
+        DAGNode(AddAsyncNode(name="add0"), ("__INPUT__",))
+    with pytest.raises(TypeError, match="must be an instance of AsyncNode or Node"):
+        AsyncDAGNode("add0", ("__INPUT__",))
+    with pytest.raises(TypeError, match="must be strings"):
+        DAGNode(AddNode(name="add0"), (1,))  # type: ignore
+
+
+def test_dag_validates_its_nodes():
+    dag = diamond_dag()
+    assert FunctionDAG(nodes=dag.nodes) == dag
+    with pytest.raises(ValidationError):
+        FunctionDAG(nodes=(AddNode(name="add0"),))  # type: ignore
+
+
+def test_dags_can_be_copied_and_pickled():
+    dag = diamond_dag()
+    for copied in (copy.deepcopy(dag), pickle.loads(pickle.dumps(dag))):
+        assert copied == dag
+        assert copied.evaluate(1) == 64
+
+
+def test_dags_can_be_dumped():
+    dag = FunctionDAG.throwable_from_string("add >> mul", mock_op_node_map)
+    assert json.loads(dag.model_dump_json()) == {
+        "nodes": [
+            {
+                "naked_node": {"name": "add0", "children": ["mul0"]},
+                "input_nodes": ["__INPUT__"],
+            },
+            {
+                "naked_node": {"name": "mul0", "children": []},
+                "input_nodes": ["add0"],
+            },
+        ]
+    }
+    assert dag.model_dump()["nodes"][1] == {
+        "naked_node": {"name": "mul0", "children": ()},
+        "input_nodes": ("add0",),
+    }
+    async_dag = async_diamond_dag()
+    assert json.loads(async_dag.model_dump_json())["nodes"][2] == [
+        {
+            "naked_node": {"name": "exp0", "children": []},
+            "input_nodes": ["mul0", "add1"],
+        }
+    ]
+
+
+@pytest.mark.parametrize("mode", ["validation", "serialization"])
+def test_dags_have_json_schemas(mode):
+    node_schema = FunctionDAG.model_json_schema(mode=mode)["properties"]["nodes"]
+    assert node_schema["items"] == {
+        "properties": {
+            "naked_node": {"$ref": "#/$defs/Node", "title": "Naked Node"},
+            "input_nodes": {
+                "items": {"type": "string"},
+                "title": "Input Nodes",
+                "type": "array",
+            },
+        },
+        "required": ["naked_node", "input_nodes"],
+        "title": "DAGNode",
+        "type": "object",
+    }
+    async_schema = AsyncFunctionDAG.model_json_schema(mode=mode)
+    assert async_schema["$defs"].keys() == {"AsyncNode", "Node"}
+    batch_schema = async_schema["properties"]["nodes"]["items"]
+    assert batch_schema["items"]["title"] == "AsyncDAGNode"
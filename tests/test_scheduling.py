@@ -0,0 +1,281 @@
+import asyncio
+import logging
+
+import pytest
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.scheduling import (
+    BatchScheduler,
+    ConcurrencyLimits,
+    CriticalPathScheduler,
+    ReadyScheduler,
+)
+from tests.conftest import (
+    AllocateAsyncNode,
+    CountLiveAsyncNode,
+    RecordAsyncNode,
+    async_diamond_dag,
+    cancelled,
+    in_flight,
+    mock_async_op_node_map,
+    released,
+    started,
+    wide_description,
+)
+from tests.conftest import scheduling_op_node_map as op_node_map
+
+
+def skewed_dag(slow_op: str, fast_op: str) -> AsyncFunctionDAG:
+    # add0 fans out to a slow node and a chain of two fast nodes, which sum0
+    # joins. The second fast node is in a later batch than the slow node.
+    ops = OperationSequence(
+        ops=(
+            Operation(name="add0", op_name="add", children=("slow0", "add1")),
+            Operation(name="slow0", op_name=slow_op, children=("sum0",)),
+            Operation(name="add1", op_name="add", children=("fast0",)),
+            Operation(name="fast0", op_name=fast_op, children=("sum0",)),
+            Operation(name="sum0", op_name="sum"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="sum0", inputs=("slow0", "fast0")),)
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_matches_batch_scheduler():
+    dag = async_diamond_dag()
+    ready_dag = dag.with_scheduler(ReadyScheduler())
+    assert await dag.evaluate(1) == 64
+    assert await ready_dag.evaluate(1) == 64
+    assert await ready_dag.compile()(1) == 64
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_evaluates_single_node():
+    dag = AsyncFunctionDAG.throwable_from_string("add", mock_async_op_node_map)
+    assert await dag.with_scheduler(ReadyScheduler()).evaluate(1) == 2
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_starts_nodes_once_inputs_are_ready():
+    # The slow node only finishes once the second fast node has started, which
+    # batching never allows.
+    dag = skewed_dag("wait", "release")
+    assert await dag.with_scheduler(ReadyScheduler()).evaluate(1) == 5
+    released["event"] = asyncio.Event()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(dag.evaluate(1), timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_logs_each_node(caplog):
+    dag = async_diamond_dag().with_scheduler(ReadyScheduler())
+    with caplog.at_level(logging.INFO, logger="daggery.async_dag"):
+        await dag.evaluate(1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Node: mul0:" in messages
+    assert "  Input(s): ('4@mul0', '3@add1')" in messages
+    assert "  Output(s): 64" in messages
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_cancels_running_nodes_on_error():
+    dag = skewed_dag("hang", "fail").with_scheduler(ReadyScheduler())
+    with pytest.raises(ValueError, match="Node failed"):
+        await dag.evaluate(1)
+    await asyncio.sleep(0)
+    assert cancelled == ["slow0"]
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_raises_cancelled_nodes():
+    dag = skewed_dag("hang", "cancel").with_scheduler(ReadyScheduler())
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(dag.evaluate(1), timeout=1)
+    await asyncio.sleep(0)
+    assert cancelled == ["slow0"]
+
+
+@pytest.mark.asyncio
+async def test_ready_scheduler_frees_intermediate_outputs():
+    dag = AsyncFunctionDAG.throwable_from_dag_description(
+        wide_description(), {"alloc": AllocateAsyncNode, "count": CountLiveAsyncNode}
+    ).with_scheduler(ReadyScheduler())
+    assert await dag.evaluate(None) == 2
+
+
+def test_with_scheduler_shares_the_dag():
+    dag = async_diamond_dag()
+    plan = dag.plan
+    ready_dag = dag.with_scheduler(ReadyScheduler())
+    assert ready_dag == dag
+    assert ready_dag.nodes is dag.nodes
+    assert ready_dag.plan is plan
+    assert isinstance(ready_dag.scheduler, ReadyScheduler)
+    assert isinstance(dag.scheduler, BatchScheduler)
+
+
+def test_edits_keep_the_scheduler():
+    scheduler = ReadyScheduler()
+    dag = async_diamond_dag().with_scheduler(scheduler)
+    edited = dag.replace_node("mul0", mock_async_op_node_map["add"])
+    assert isinstance(edited, AsyncFunctionDAG)
+    assert edited.scheduler is scheduler
+
+
+def chains_dag() -> AsyncFunctionDAG:
+    # rec0 fans out to a single node and a chain of three, which rec5 joins.
+    # The single node is given first, so is first in its batch.
+    ops = OperationSequence(
+        ops=(
+            Operation(name="rec0", op_name="rec", children=("short0", "long0")),
+            Operation(name="short0", op_name="rec", children=("rec5",)),
+            Operation(name="long0", op_name="rec", children=("long1",)),
+            Operation(name="long1", op_name="rec", children=("long2",)),
+            Operation(name="long2", op_name="rec", children=("rec5",)),
+            Operation(name="rec5", op_name="rec"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="rec5", inputs=("short0", "long2")),)
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+@pytest.mark.asyncio
+async def test_critical_path_scheduler_starts_longest_path_first():
+    scheduler = CriticalPathScheduler(max_concurrency=1, learn=False)
+    assert await chains_dag().with_scheduler(scheduler).evaluate(1) == 2
+    # Ties (here short0 and long2) are broken by order.
+    assert started == ["rec0", "long0", "long1", "short0", "long2", "rec5"]
+    started.clear()
+    # A costly enough node outweighs a longer path.
+    costs = {"rec0": 1, "short0": 10, "long0": 1, "long1": 1, "long2": 1, "rec5": 1}
+    scheduler = CriticalPathScheduler(1, costs=costs, learn=False)
+    await chains_dag().with_scheduler(scheduler).evaluate(1)
+    assert started == ["rec0", "short0", "long0", "long1", "long2", "rec5"]
+
+
+def test_critical_path_scheduler_priorities():
+    plan = chains_dag().plan
+    costs = {"rec0": 1, "short0": 5, "long0": 1, "long1": 2, "long2": 1}
+    scheduler = CriticalPathScheduler(2, costs=costs)
+    # The tail has the mean cost of the others.
+    assert scheduler.priorities(plan) == [8, 7, 6, 5, 3, 2]
+    assert CriticalPathScheduler(2).priorities(plan) == [5, 2, 4, 3, 2, 1]
+
+
+def wide_dag(width: int = 8) -> AsyncFunctionDAG:
+    names = tuple(f"w{i}" for i in range(width))
+    ops = OperationSequence(
+        ops=(
+            Operation(name="rec0", op_name="rec", children=names),
+            *(
+                Operation(name=name, op_name="rec", children=("rec1",))
+                for name in names
+            ),
+            Operation(name="rec1", op_name="rec"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="rec1", inputs=names),)
+    return AsyncFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+@pytest.mark.asyncio
+async def test_critical_path_scheduler_limits_concurrency():
+    dag = wide_dag()
+    for max_concurrency in (1, 3, 8):
+        in_flight["max"] = 0
+        scheduler = CriticalPathScheduler(max_concurrency)
+        assert await dag.with_scheduler(scheduler).evaluate(1) == 8
+        assert in_flight["max"] == max_concurrency
+
+
+@pytest.mark.asyncio
+async def test_critical_path_scheduler_learns_costs():
+    scheduler = CriticalPathScheduler(2, costs={"short0": 100.0})
+    await chains_dag().with_scheduler(scheduler).evaluate(1)
+    assert scheduler.costs.keys() == {
+        "rec0",
+        "short0",
+        "long0",
+        "long1",
+        "long2",
+        "rec5",
+    }
+    assert 80 < scheduler.costs["short0"] < 100
+    assert scheduler.costs["long0"] < 1
+    fixed = CriticalPathScheduler(2, costs={"short0": 100.0}, learn=False)
+    await chains_dag().with_scheduler(fixed).evaluate(1)
+    assert fixed.costs == {"short0": 100.0}
+
+
+@pytest.mark.asyncio
+async def test_critical_path_scheduler_cancels_running_nodes_on_error():
+    scheduler = CriticalPathScheduler(2)
+    dag = skewed_dag("hang", "fail").with_scheduler(scheduler)
+    with pytest.raises(ValueError, match="Node failed"):
+        await dag.evaluate(1)
+    await asyncio.sleep(0)
+    assert cancelled == ["slow0"]
+
+
+@pytest.mark.asyncio
+async def test_critical_path_scheduler_raises_cancelled_nodes():
+    dag = skewed_dag("hang", "cancel").with_scheduler(CriticalPathScheduler(2))
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(dag.evaluate(1), timeout=1)
+    await asyncio.sleep(0)
+    assert cancelled == ["slow0"]
+
+
+def test_critical_path_scheduler_requires_concurrency():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        CriticalPathScheduler(0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scheduler_class", [BatchScheduler, ReadyScheduler])
+async def test_limits_apply_across_evaluations(scheduler_class):
+    limits = ConcurrencyLimits(per_class={RecordAsyncNode: 3})
+    dag = wide_dag().with_scheduler(scheduler_class(limits))
+    assert await asyncio.gather(*(dag.evaluate(1) for _ in range(4))) == [8] * 4
+    assert in_flight["max"] == 3
+    in_flight["max"] = 0
+    limits = ConcurrencyLimits(max_in_flight=5)
+    dag = wide_dag().with_scheduler(scheduler_class(limits))
+    assert await asyncio.gather(*(dag.evaluate(1) for _ in range(4))) == [8] * 4
+    assert in_flight["max"] == 5
+
+
+@pytest.mark.asyncio
+async def test_limits_by_op_name():
+    limits = ConcurrencyLimits.by_op_name({"rec": 2}, op_node_map)
+    assert limits.per_class == {RecordAsyncNode: 2}
+    dag = wide_dag().with_scheduler(CriticalPathScheduler(8, limits=limits))
+    assert await dag.evaluate(1) == 8
+    assert in_flight["max"] == 2
+    # Nodes of other classes are not limited.
+    in_flight["max"] = 0
+    limits = ConcurrencyLimits.by_op_name({"add": 1}, op_node_map)
+    assert await wide_dag().with_scheduler(ReadyScheduler(limits)).evaluate(1) == 8
+    assert in_flight["max"] == 8
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError, match="max_in_flight"):
+        ConcurrencyLimits(max_in_flight=0)
+    with pytest.raises(ValueError, match="RecordAsyncNode must be >= 1"):
+        ConcurrencyLimits(per_class={RecordAsyncNode: 0})
+    with pytest.raises(ValueError, match=r"\['nope'\]"):
+        ConcurrencyLimits.by_op_name({"nope": 1}, op_node_map)
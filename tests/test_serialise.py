@@ -0,0 +1,87 @@
+import pytest
+
+from daggery import serialise
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.dag import FunctionDAG
+from daggery.prevalidate import InvalidDAG
+from tests.conftest import (
+    async_diamond_dag,
+    diamond_dag,
+    mock_async_op_node_map,
+    mock_op_node_map,
+)
+
+
+def test_round_trip():
+    dag = diamond_dag()
+    loaded = serialise.loads(serialise.dumps(dag, mock_op_node_map), mock_op_node_map)
+    assert isinstance(loaded, FunctionDAG)
+    assert loaded == dag
+    assert loaded.evaluate(1) == 64
+
+
+def test_round_trip_string_dag():
+    dag = FunctionDAG.throwable_from_string("add >> mul >> add", mock_op_node_map)
+    loaded = serialise.loads(serialise.dumps(dag, mock_op_node_map), mock_op_node_map)
+    assert loaded == dag
+
+
+@pytest.mark.asyncio
+async def test_round_trip_async():
+    dag = async_diamond_dag()
+    data = serialise.dumps(dag, mock_async_op_node_map)
+    loaded = serialise.loads(data, mock_async_op_node_map)
+    assert isinstance(loaded, AsyncFunctionDAG)
+    assert loaded == dag
+    assert await loaded.evaluate(1) == 64
+
+
+def test_dump_and_load(tmp_path):
+    path = tmp_path / "diamond.dag"
+    dag = diamond_dag()
+    serialise.dump(dag, path, mock_op_node_map)
+    assert serialise.load(path, mock_op_node_map) == dag
+    # Loading again maps the same file, rather than consuming it.
+    assert serialise.load(path, mock_op_node_map) == dag
+    assert [p.name for p in tmp_path.iterdir()] == ["diamond.dag"]
+
+
+def test_dumps_unknown_node_class():
+    with pytest.raises(ValueError, match="is not in the custom_op_node_map"):
+        serialise.dumps(diamond_dag(), {"add": mock_op_node_map["add"]})
+
+
+def test_loads_unknown_op_name():
+    data = serialise.dumps(diamond_dag(), mock_op_node_map)
+    loaded = serialise.loads(data, {"add": mock_op_node_map["add"]})
+    assert isinstance(loaded, InvalidDAG)
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"", "Malformed DAG artifact"),
+        (b"NOPE" + bytes(20), "Not a DAG artifact"),
+        (b"DAGY\x02\x00" + bytes(18), "Unsupported DAG artifact version"),
+    ],
+)
+def test_loads_invalid(data, message):
+    loaded = serialise.loads(data, mock_op_node_map)
+    assert isinstance(loaded, InvalidDAG)
+    assert loaded.message.startswith(message)
+
+
+def test_loads_corrupted():
+    data = bytearray(serialise.dumps(diamond_dag(), mock_op_node_map))
+    data[-1] ^= 0xFF
+    loaded = serialise.loads(data, mock_op_node_map)
+    assert isinstance(loaded, InvalidDAG)
+    assert loaded.message == "DAG artifact checksum does not match"
+    loaded = serialise.loads(data[:-3], mock_op_node_map)
+    assert isinstance(loaded, InvalidDAG)
+
+
+def test_load_truncated(tmp_path):
+    path = tmp_path / "empty.dag"
+    path.write_bytes(b"")
+    assert isinstance(serialise.load(path, mock_op_node_map), InvalidDAG)
@@ -0,0 +1,154 @@
+import io
+import json
+
+import pytest
+
+from daggery import stream
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.prevalidate import InvalidDAG, PrevalidatedDAG
+from tests.conftest import mock_async_op_node_map, mock_op_node_map
+
+DIAMOND_OPS = [
+    {"name": "add0", "op_name": "add", "children": ["add1", "mul0"]},
+    {"name": "add1", "op_name": "add", "children": ["exp0"]},
+    {"name": "mul0", "op_name": "mul", "children": ["exp0"]},
+    {"name": "exp0", "op_name": "exp"},
+]
+DIAMOND_MAPPINGS = [{"op_name": "exp0", "inputs": ["mul0", "add1"]}]
+
+
+def diamond_description() -> DAGDescription:
+    return DAGDescription(
+        operations=OperationSequence(
+            ops=tuple(Operation.model_validate(op) for op in DIAMOND_OPS)
+        ),
+        argument_mappings=(ArgumentMapping.model_validate(DIAMOND_MAPPINGS[0]),),
+    )
+
+
+def document(ops=DIAMOND_OPS, mappings=DIAMOND_MAPPINGS, mappings_first=False) -> str:
+    operations = {"ops": ops}
+    if mappings_first:
+        return json.dumps({"argument_mappings": mappings, "operations": operations})
+    return json.dumps({"operations": operations, "argument_mappings": mappings})
+
+
+def test_load_prevalidated_matches_description(tmp_path):
+    path = tmp_path / "diamond.json"
+    path.write_text(diamond_description().model_dump_json(indent=2))
+    prevalidated_dag = stream.load_prevalidated(path)
+    assert isinstance(prevalidated_dag, PrevalidatedDAG)
+    assert prevalidated_dag == PrevalidatedDAG.from_dag_description(
+        diamond_description()
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64])
+@pytest.mark.parametrize("mappings_first", [False, True])
+def test_load_in_small_chunks(chunk_size, mappings_first):
+    source = io.StringIO(document(mappings_first=mappings_first))
+    dag = stream.load(FunctionDAG, source, mock_op_node_map, chunk_size=chunk_size)
+    assert isinstance(dag, FunctionDAG)
+    assert dag == FunctionDAG.throwable_from_dag_description(
+        diamond_description(), mock_op_node_map
+    )
+    assert dag.evaluate(1) == 64
+
+
+@pytest.mark.asyncio
+async def test_load_async_dag():
+    source = io.StringIO(document())
+    dag = stream.load(AsyncFunctionDAG, source, mock_async_op_node_map)
+    assert isinstance(dag, AsyncFunctionDAG)
+    assert await dag.evaluate(1) == 64
+
+
+def test_load_linear_dag_without_mappings():
+    ops = [
+        {"name": "add0", "op_name": "add", "children": ["mul0"]},
+        {"name": "mul0", "op_name": "mul"},
+    ]
+    source = io.StringIO(json.dumps({"operations": {"ops": ops}, "extra": [1, 2]}))
+    dag = stream.load(FunctionDAG, source, mock_op_node_map)
+    assert isinstance(dag, FunctionDAG)
+    assert dag.evaluate(1) == 4
+
+
+def test_invalid_graph_is_rejected_as_soon_as_it_is_read():
+    ops = [
+        {"name": "add0", "op_name": "add", "children": ["add1"]},
+        {"name": "add1", "op_name": "add", "children": ["add0"]},
+    ] + [{"name": f"add{i}", "op_name": "add"} for i in range(2, 1000)]
+    text = document(ops=ops, mappings=[])
+    source = io.StringIO(text)
+    result = stream.load_prevalidated(source, chunk_size=64)
+    assert isinstance(result, InvalidDAG)
+    assert "not topologically sorted" in result.message
+    # Nothing after the offending operation was needed.
+    assert source.tell() < 256
+
+
+@pytest.mark.parametrize(
+    "ops, mappings, message",
+    [
+        (DIAMOND_OPS, [], "exp0 has parents ['add1', 'mul0'] but no argument"),
+        (
+            DIAMOND_OPS,
+            [{"op_name": "exp0", "inputs": ["mul0", "add0"]}],
+            "Input has invalid mappings",
+        ),
+        (
+            DIAMOND_OPS,
+            [{"op_name": "exp0", "inputs": ["mul0", "add1", "mul0"]}],
+            "Input has duplicate inputs",
+        ),
+        (
+            DIAMOND_OPS,
+            DIAMOND_MAPPINGS + [{"op_name": "exp0", "inputs": ["add1", "mul0"]}],
+            "duplicate mappings for exp0",
+        ),
+        (
+            DIAMOND_OPS,
+            DIAMOND_MAPPINGS + [{"op_name": "nope0", "inputs": ["mul0"]}],
+            "must all reference ops in operations: ['nope0']",
+        ),
+        (DIAMOND_OPS[:1] + DIAMOND_OPS, DIAMOND_MAPPINGS, "duplicate operations"),
+        (DIAMOND_OPS[1:], DIAMOND_MAPPINGS, ">1 root node: mul0"),
+        (DIAMOND_OPS[:3], [], "references missing operations: ['exp0']"),
+        (
+            [{"name": "add0", "op_name": "add", "children": ["add1", "mul0"]}]
+            + [{"name": "add1", "op_name": "add"}, {"name": "mul0", "op_name": "mul"}],
+            [],
+            "Input has 2 tails",
+        ),
+        ([], [], "contains no operations"),
+        ([{"name": "", "op_name": "add"}], [], "Malformed DAG description"),
+    ],
+)
+def test_invalid_descriptions(ops, mappings, message):
+    result = stream.load_prevalidated(io.StringIO(document(ops, mappings)))
+    assert isinstance(result, InvalidDAG)
+    assert message in result.message
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "[]",
+        '{"operations": {"ops": [{"name": "add0", "op_name": "add"}',
+        '{"operations": {"ops": [{"name": "add0", "op_name": "add"}]}} trailing',
+        '{"operations": {"ops": [{"name": "add0", "op_name": "add"};]}}',
+    ],
+)
+def test_malformed_json(text):
+    result = stream.load_prevalidated(io.StringIO(text), chunk_size=4)
+    assert isinstance(result, InvalidDAG)
+    assert result.message.startswith("Malformed DAG description")
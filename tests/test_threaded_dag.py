@@ -0,0 +1,169 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from daggery.dag import FunctionDAG
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.serialise import dumps, loads
+from daggery.threaded_dag import ThreadedFunctionDAG
+from tests.conftest import diamond_dag, mock_op_node_map
+
+# The name of the thread each node was evaluated on, by node name.
+threads: dict[str, str] = {}
+# Only passed by two nodes waiting on it at the same time.
+barrier: dict[str, threading.Barrier] = {}
+
+
+class BarrierNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        threads[self.name] = threading.current_thread().name
+        barrier["barrier"].wait()
+        return value
+
+
+class FailNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        raise ValueError("Node failed")
+
+
+# The DAG evaluated by nested nodes.
+nested: dict[str, ThreadedFunctionDAG] = {}
+
+
+class NestedNode(Node, frozen=True):
+    def evaluate(self, value: float) -> float:
+        return nested["dag"].evaluate(value)
+
+
+op_node_map: dict[str, type[Node]] = {
+    **mock_op_node_map,
+    "barrier": BarrierNode,
+    "fail": FailNode,
+    "nested": NestedNode,
+}
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    threads.clear()
+    barrier["barrier"] = threading.Barrier(2, timeout=5)
+
+
+def fan_out_dag(left: str, right: str) -> ThreadedFunctionDAG:
+    ops = OperationSequence(
+        ops=(
+            Operation(name="add0", op_name="add", children=("left", "right")),
+            Operation(name="left", op_name=left, children=("exp0",)),
+            Operation(name="right", op_name=right, children=("exp0",)),
+            Operation(name="exp0", op_name="exp"),
+        )
+    )
+    mappings = (ArgumentMapping(op_name="exp0", inputs=("left", "right")),)
+    return ThreadedFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=ops, argument_mappings=mappings), op_node_map
+    )
+
+
+def test_outputs_match_function_dag():
+    # The same DAG as `diamond_dag`, with different names.
+    dag = fan_out_dag("mul", "add")
+    diamond = diamond_dag()
+    assert dag.evaluate(1) == diamond.evaluate(1) == 64
+    assert list(dag.evaluate_many(range(3))) == [diamond.evaluate(i) for i in range(3)]
+    chain = ThreadedFunctionDAG.throwable_from_string("add >> mul >> add", op_node_map)
+    same = FunctionDAG.throwable_from_string("add >> mul >> add", op_node_map)
+    assert chain.evaluate(1) == same.evaluate(1) == 5
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_evaluate_many_runs_evaluations_concurrently(ordered):
+    # The barrier nodes of two evaluations block until both have started.
+    dag = ThreadedFunctionDAG.throwable_from_string("add >> barrier", op_node_map)
+    with ThreadPoolExecutor(2) as executor:
+        outputs = list(dag.with_executor(executor).evaluate_many(range(6), 2, ordered))
+    if ordered:
+        assert outputs == [1, 2, 3, 4, 5, 6]
+    else:
+        assert sorted(outputs) == [(i, i + 1) for i in range(6)]
+    assert list(fan_out_dag("mul", "add").evaluate_many(range(3), 3)) == [
+        diamond_dag().evaluate(i) for i in range(3)
+    ]
+
+
+def test_independent_nodes_run_concurrently():
+    # Each barrier node blocks its thread until the other one arrives.
+    dag = fan_out_dag("barrier", "barrier")
+    assert dag.evaluate(1) == 4
+    # The calling thread takes one branch, and the pool the other.
+    assert threading.current_thread().name in threads.values()
+    assert any(name.startswith("daggery") for name in threads.values())
+
+
+def test_node_errors_are_raised():
+    dag = fan_out_dag("fail", "add")
+    with pytest.raises(ValueError, match="Node failed"):
+        dag.evaluate(1)
+    with pytest.raises(ValueError, match="Node failed"):
+        list(dag.evaluate_many(range(3), max_concurrency=2))
+
+
+def test_concurrent_evaluations_are_independent():
+    dag = fan_out_dag("mul", "add")
+    with ThreadPoolExecutor(8) as callers:
+        outputs = list(callers.map(dag.evaluate, range(100)))
+    assert outputs == [diamond_dag().evaluate(i) for i in range(100)]
+
+
+def test_evaluate_logs_each_node(caplog):
+    dag = fan_out_dag("mul", "add")
+    with caplog.at_level(logging.INFO, logger="daggery.dag"):
+        dag.evaluate(1)
+    messages = [record.getMessage() for record in caplog.records]
+    # Each node's lines are logged together.
+    index = messages.index("Node: exp0:")
+    assert messages[index + 1] == "  Input(s): ('4@left', '3@right')"
+    assert messages[index + 2] == "  Output(s): 64"
+
+
+def test_nodes_run_on_the_executor():
+    with ThreadPoolExecutor(2, thread_name_prefix="daggery-test") as executor:
+        dag = fan_out_dag("barrier", "barrier").with_executor(executor)
+        assert dag.executor is executor
+        assert dag == fan_out_dag("barrier", "barrier")
+        assert dag.evaluate(1) == 4
+        assert any(name.startswith("daggery-test") for name in threads.values())
+        # Edits keep the executor.
+        edited = dag.replace_node("add0", op_node_map["mul"])
+        assert isinstance(edited, ThreadedFunctionDAG)
+        assert edited.executor is executor
+
+
+def test_nested_evaluations_do_not_wait_on_a_busy_pool():
+    with ThreadPoolExecutor(1) as executor:
+        nested["dag"] = fan_out_dag("mul", "add").with_executor(executor)
+        dag = fan_out_dag("nested", "nested").with_executor(executor)
+        # Each branch (one on the pool's only thread) evaluates the nested DAG,
+        # whose own branches cannot be left waiting for the pool.
+        outputs = []
+        caller = threading.Thread(target=lambda: outputs.append(dag.evaluate(1)))
+        caller.start()
+        caller.join(timeout=5)
+        assert not caller.is_alive()
+        inner = fan_out_dag("mul", "add").evaluate(2)
+        assert outputs == [inner**inner]
+
+
+def test_round_trip():
+    dag = fan_out_dag("mul", "add")
+    loaded = loads(dumps(dag, op_node_map), op_node_map)
+    assert isinstance(loaded, ThreadedFunctionDAG)
+    assert loaded == dag
+    assert loaded.evaluate(1) == 64
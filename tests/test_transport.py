@@ -0,0 +1,143 @@
+import os
+
+import pytest
+
+from daggery.description import (
+    ArgumentMapping,
+    DAGDescription,
+    Operation,
+    OperationSequence,
+)
+from daggery.node import Node
+from daggery.process_dag import ProcessFunctionDAG
+from daggery.transport import SharedBuffer, SharedMemoryTransport
+
+MIN_SIZE = 1024
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir("/dev/shm"), reason="Segments are only listed in /dev/shm"
+)
+
+
+def segments() -> set[str]:
+    # Every shared memory segment (still) linked on this machine.
+    return set(os.listdir("/dev/shm"))
+
+
+class MakeBytes(Node, frozen=True):
+    def evaluate(self, size: int) -> bytes:
+        return bytes(range(256)) * (size // 256)
+
+
+class Describe(Node, frozen=True):
+    def evaluate(self, value: bytes) -> tuple[str, bool, int]:
+        return type(value).__name__, memoryview(value).readonly, len(value)
+
+
+class Reverse(Node, frozen=True):
+    def evaluate(self, value: bytes) -> bytes:
+        return bytes(value)[::-1]
+
+
+class Join(Node, frozen=True):
+    def evaluate(self, *values: bytes) -> tuple[str, int]:
+        return type(values[0]).__name__, sum(value[0] for value in values)
+
+
+op_node_map: dict[str, type[Node]] = {
+    "make": MakeBytes,
+    "describe": Describe,
+    "reverse": Reverse,
+    "join": Join,
+}
+
+
+def fan_out_dag(op_name: str, width: int = 2) -> ProcessFunctionDAG:
+    # make0 fans out to a block per branch, joined by join0.
+    branches = tuple(f"{op_name}{i}" for i in range(width))
+    ops = (
+        Operation(name="make0", op_name="make", children=branches),
+        *(
+            Operation(name=name, op_name=op_name, children=("join0",), block=name)
+            for name in branches
+        ),
+        Operation(name="join0", op_name="join"),
+    )
+    description = DAGDescription(
+        operations=OperationSequence(ops=ops),
+        argument_mappings=(ArgumentMapping(op_name="join0", inputs=branches),),
+    )
+    return ProcessFunctionDAG.throwable_from_dag_description(
+        description, op_node_map
+    ).with_transport(SharedMemoryTransport(MIN_SIZE))
+
+
+def test_large_buffers_are_shared():
+    before = segments()
+    with fan_out_dag("reverse") as dag:
+        # Block outputs arrive as views of shared memory.
+        assert dag.evaluate(4096) == ("memoryview", 2 * 255)
+        # Small buffers are pickled.
+        assert dag.evaluate(512) == ("bytes", 2 * 255)
+    assert segments() == before
+
+
+def test_block_inputs_are_read_only_views():
+    ops = (
+        Operation(name="make0", op_name="make", children=("describe0",)),
+        Operation(name="describe0", op_name="describe", block="describe"),
+    )
+    dag = ProcessFunctionDAG.throwable_from_dag_description(
+        DAGDescription(operations=OperationSequence(ops=ops)), op_node_map
+    ).with_transport(SharedMemoryTransport(MIN_SIZE))
+    before = segments()
+    with dag:
+        assert dag.evaluate(4096) == ("memoryview", True, 4096)
+        assert dag.evaluate(512) == ("bytes", True, 512)
+    assert segments() == before
+
+
+def test_sent_values_are_shared_until_released():
+    transport = SharedMemoryTransport(MIN_SIZE)
+    value = bytes(4096)
+    handle = transport.acquire(value)
+    assert isinstance(handle, SharedBuffer)
+    assert transport.acquire(value) == handle
+    assert handle.name.lstrip("/") in segments()
+    view = transport.open(handle, unlink=False)
+    assert bytes(view) == value
+    transport.release(value)
+    assert handle.name.lstrip("/") in segments()
+    transport.release(value)
+    assert handle.name.lstrip("/") not in segments()
+    # Views outlive the segment's name.
+    assert bytes(view) == value
+    assert transport.acquire(bytes(512)) == bytes(512)
+
+
+def test_exported_values_are_unlinked_when_opened():
+    transport = SharedMemoryTransport(MIN_SIZE)
+    handle = transport.export(bytearray(b"x" * 2048))
+    assert handle.name.lstrip("/") in segments()
+    view = transport.open(handle, unlink=True)
+    assert handle.name.lstrip("/") not in segments()
+    assert bytes(view) == b"x" * 2048
+    assert transport.export("not a buffer") == "not a buffer"
+
+
+def test_arrays_are_shared():
+    np = pytest.importorskip("numpy")
+    transport = SharedMemoryTransport(MIN_SIZE)
+    array = np.arange(1024, dtype=np.float64).reshape(32, 32)
+    handle = transport.acquire(array)
+    shared = transport.open(handle, unlink=False)
+    assert isinstance(shared, np.ndarray)
+    assert np.array_equal(shared, array)
+    assert not shared.flags.writeable
+    transport.release(array)
+    output = transport.open(transport.export(array.T), unlink=True)
+    assert np.array_equal(output, array.T)
+    assert output.flags.writeable
+    # Arrays of Python objects are pickled.
+    objects = np.array([object()] * 1024)
+    assert transport.export(objects) is objects
@@ -0,0 +1,155 @@
+import gc
+
+import pytest
+from pydantic import ValidationError, model_validator
+
+from daggery.async_dag import AsyncFunctionDAG
+from daggery.async_node import AsyncNode
+from daggery.dag import FunctionDAG
+from daggery.node import Node
+from daggery.prevalidate import PrevalidatedDAG
+from daggery.utils.construction import (
+    _interned_nodes,
+    node_factory,
+    supports_trusted_construction,
+)
+
+
+class Foo(Node, frozen=True):
+    def evaluate(self, value: int) -> int:
+        return value * value
+
+
+class AsyncFoo(AsyncNode, frozen=True):
+    async def evaluate(self, value: int) -> int:
+        return value * value
+
+
+class WithDefault(Node, frozen=True):
+    offset: int = 3
+
+    def evaluate(self, value: int) -> int:
+        return value + self.offset
+
+
+class WithRequiredField(Node, frozen=True):
+    offset: int
+
+    def evaluate(self, value: int) -> int:
+        return value + self.offset
+
+
+class WithValidator(Node, frozen=True):
+    @model_validator(mode="after")
+    def name_is_lowercase(self):
+        if self.name != self.name.lower():
+            raise ValueError("WithValidator must have a lowercase name")
+        return self
+
+    def evaluate(self, value: int) -> int:
+        return value
+
+
+def test_supports_trusted_construction():
+    node_fields = ("name", "children")
+    assert supports_trusted_construction(Foo, node_fields)
+    assert supports_trusted_construction(AsyncFoo, node_fields)
+    # Fields Daggery does not provide need their defaults filled in.
+    assert not supports_trusted_construction(WithDefault, node_fields)
+    assert not supports_trusted_construction(WithRequiredField, node_fields)
+    assert not supports_trusted_construction(WithValidator, node_fields)
+
+
+def test_trusted_construction_matches_validated_construction():
+    for node_class in (Foo, WithDefault):
+        trusted = node_factory(node_class, trusted=True)("foo0", ("bar0",))
+        validated = node_factory(node_class)("foo0", ("bar0",))
+        assert trusted == validated
+        assert trusted.model_fields_set == validated.model_fields_set
+    assert node_factory(WithDefault, trusted=True)("foo0", ()).offset == 3
+
+
+def test_trusted_construction_rejects_abstract_classes():
+    with pytest.raises(TypeError, match="Can't instantiate abstract class Node"):
+        node_factory(Node, trusted=True)("foo0", ())  # type: ignore
+
+
+def test_trusted_construction_falls_back_to_validation():
+    with pytest.raises(ValidationError, match="must have a lowercase name"):
+        node_factory(WithValidator, trusted=True)("FOO", ())
+    with pytest.raises(ValidationError, match="offset"):
+        node_factory(WithRequiredField, trusted=True)("foo", ())
+
+
+def test_trusted_dag_matches_validated_dag():
+    prevalidated_dag = PrevalidatedDAG.from_string("foo >> foo >> foo")
+    assert isinstance(prevalidated_dag, PrevalidatedDAG)
+    op_node_map: dict[str, type[Node]] = {"foo": Foo}
+    trusted = FunctionDAG.from_prevalidated_dag(
+        prevalidated_dag, op_node_map, trusted=True
+    )
+    validated = FunctionDAG.from_prevalidated_dag(prevalidated_dag, op_node_map)
+    assert isinstance(trusted, FunctionDAG)
+    assert trusted == validated
+    assert trusted.evaluate(2) == 256
+
+
+def test_trusted_async_dag_matches_validated_async_dag():
+    prevalidated_dag = PrevalidatedDAG.from_string("foo >> foo")
+    assert isinstance(prevalidated_dag, PrevalidatedDAG)
+    op_node_map: dict[str, type[AsyncNode]] = {"foo": AsyncFoo}
+    trusted = AsyncFunctionDAG.from_prevalidated_dag(
+        prevalidated_dag, op_node_map, trusted=True
+    )
+    validated = AsyncFunctionDAG.from_prevalidated_dag(prevalidated_dag, op_node_map)
+    assert isinstance(trusted, AsyncFunctionDAG)
+    assert trusted == validated
+
+
+class Mutable(Node, frozen=False):  # type: ignore
+    def evaluate(self, value: int) -> int:
+        return value
+
+
+def test_interned_nodes_are_shared():
+    build = node_factory(Foo, trusted=True, interned=True)
+    node = build("foo0", ("bar0",))
+    assert build("foo0", ("bar0",)) is node
+    assert node_factory(Foo, interned=True)("foo0", ("bar0",)) is node
+    assert build("foo0", ("baz0",)) is not node
+    assert node_factory(Foo, trusted=True)("foo0", ("bar0",)) is not node
+
+
+def test_interned_nodes_are_released():
+    build = node_factory(Foo, trusted=True, interned=True)
+    build("released0", ())
+    gc.collect()
+    assert not any(key[1] == "released0" for key in _interned_nodes.keys())
+
+
+def test_mutable_nodes_are_not_interned():
+    build = node_factory(Mutable, interned=True)
+    assert build("mutable0", ()) is not build("mutable0", ())
+
+
+def test_dags_share_nodes():
+    op_node_map: dict[str, type[Node]] = {"foo": Foo}
+    first = FunctionDAG.throwable_from_string("foo >> foo >> foo", op_node_map)
+    second = FunctionDAG.throwable_from_string("foo >> foo", op_node_map)
+    # Only the tail of the shorter DAG differs, as it has no children.
+    assert first.nodes[0] is second.nodes[0]
+    assert first.nodes[0].naked_node is second.nodes[0].naked_node
+    assert first.nodes[1].naked_node is not second.nodes[1].naked_node
+    assert first.evaluate(2) == 256
+    assert second.evaluate(2) == 16
+
+
+def test_validated_dag_nodes_are_shared():
+    prevalidated_dag = PrevalidatedDAG.from_string("foo >> foo")
+    assert isinstance(prevalidated_dag, PrevalidatedDAG)
+    op_node_map: dict[str, type[Node]] = {"foo": Foo}
+    first = FunctionDAG.from_prevalidated_dag(prevalidated_dag, op_node_map)
+    second = FunctionDAG.from_prevalidated_dag(prevalidated_dag, op_node_map)
+    assert isinstance(first, FunctionDAG) and isinstance(second, FunctionDAG)
+    assert first.nodes[1] is second.nodes[1]
+    assert first.nodes[1].naked_node is second.nodes[1].naked_node